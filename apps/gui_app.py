@@ -1,16 +1,75 @@
+import os
+import queue
 import sys
+import threading
 from pathlib import Path
 import tkinter as tk
-from tkinter import Canvas, Button, Label
-
-import numpy as np
-from PIL import Image, ImageDraw
+from tkinter import Canvas, Button, Checkbutton, Label
 
 # Add project root to path
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from digit_recognition import load_trained_model, predict_preprocessed, preprocess_image_array
+from digit_recognition import (
+    IncrementalRaster,
+    enable_prediction_cache,
+    load_trained_model,
+    predict_preprocessed,
+)
+from digit_recognition.model import DEFAULT_BACKEND
+
+# Repeated Predict clicks on an unchanged canvas are served from the cache
+PREDICTION_CACHE_ENTRIES = int(os.environ.get('DIGIT_PREDICTION_CACHE', 64))
+# Live prediction waits this long after the last stroke before predicting
+LIVE_DEBOUNCE_MS = int(os.environ.get('DIGIT_LIVE_DEBOUNCE_MS', 60))
+# How often the Tk event loop picks up finished predictions
+RESULT_POLL_MS = 20
+
+
+class PredictionWorker:
+    """
+    Runs predictions on a background thread so the Tk event loop never blocks.
+
+    Only the most recent request is kept: submitting while a prediction is
+    queued replaces it, so a fast-drawing user never builds up a backlog.
+    Results land in `results` as (tag, digit, probabilities) tuples.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.results = queue.Queue()
+        self._pending = None
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='prediction-worker', daemon=True)
+        self._thread.start()
+
+    def submit(self, tag, preprocessed):
+        with self._condition:
+            self._pending = (tag, preprocessed)
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                tag, preprocessed = self._pending
+                self._pending = None
+            try:
+                digit, probabilities = predict_preprocessed(self.model, preprocessed)
+            except Exception as e:
+                self.results.put((tag, None, e))
+            else:
+                self.results.put((tag, digit, probabilities))
+
 
 class DigitRecognizerGUI:
     def __init__(self, root):
@@ -19,24 +78,33 @@ class DigitRecognizerGUI:
         
         # Load model
         try:
-            self.model = load_trained_model()
+            self.model = load_trained_model(backend=DEFAULT_BACKEND)
         except Exception as e:
             raise RuntimeError(f"Could not load model. Error: {e}. You may need to retrain the model with: python scripts/recognition.py")
+        if PREDICTION_CACHE_ENTRIES > 0:
+            enable_prediction_cache(PREDICTION_CACHE_ENTRIES)
         
         # Canvas settings
         self.canvas_size = 250  # 25x25 grid * 10 pixels per cell
         self.grid_size = 25
         self.pixel_size = self.canvas_size // self.grid_size
         
-        # Internal image buffer (mirrors canvas content for reliable capture)
-        self.image_buffer = Image.new('RGB', (self.canvas_size, self.canvas_size), 'white')
-        self.draw_buffer = ImageDraw.Draw(self.image_buffer)
+        # Internal image buffer (mirrors canvas content for reliable capture); its
+        # 28x28 model input is updated per stroke instead of per prediction
+        self.raster = IncrementalRaster(self.canvas_size)
         
         # Drawing state
         self.drawing = False
         self.last_x = None
         self.last_y = None
         
+        # Predictions run off the event loop; results older than the last
+        # clear are dropped by comparing generations
+        self.worker = PredictionWorker(self.model)
+        self.generation = 0
+        self.live_after_id = None
+        self.live = tk.BooleanVar(value=True)
+        
         # Create canvas (white background for black-on-white drawing, matching digit images)
         self.canvas = Canvas(root, width=self.canvas_size, height=self.canvas_size, 
                             bg='white', cursor='crosshair')
@@ -63,6 +131,15 @@ class DigitRecognizerGUI:
                           font=('Arial', 14), bg='#f44336', fg='white', width=10)
         clear_btn.pack(side=tk.LEFT, padx=5)
         
+        live_check = Checkbutton(button_frame, text="Live", variable=self.live,
+                                 font=('Arial', 14))
+        live_check.pack(side=tk.LEFT, padx=5)
+        
+        # Warm the model up off the event loop so the first real prediction is fast
+        self.worker.submit(None, self.raster.raster.copy())
+        self.root.after(RESULT_POLL_MS, self.poll_results)
+        self.root.protocol('WM_DELETE_WINDOW', self.close)
+        
     def start_draw(self, event):
         self.drawing = True
         self.last_x = event.x
@@ -70,8 +147,8 @@ class DigitRecognizerGUI:
         # Draw initial point on canvas and buffer
         self.canvas.create_oval(event.x-4, event.y-4, event.x+4, event.y+4, 
                                fill='black', outline='black')
-        self.draw_buffer.ellipse([event.x-4, event.y-4, event.x+4, event.y+4], 
-                                fill='black', outline='black')
+        self.raster.dot(event.x, event.y)
+        self.schedule_live_prediction()
         
     def draw(self, event):
         if self.drawing:
@@ -83,15 +160,15 @@ class DigitRecognizerGUI:
                                        fill='black', width=8, capstyle=tk.ROUND, 
                                        smooth=tk.TRUE)
                 # Mirror to internal image buffer
-                self.draw_buffer.line([(self.last_x, self.last_y), (x, y)], 
-                                     fill='black', width=8)
+                self.raster.line(self.last_x, self.last_y, x, y, width=8)
             else:
                 # Draw on Tkinter canvas
                 self.canvas.create_oval(x-4, y-4, x+4, y+4, fill='black', outline='black')
                 # Mirror to internal image buffer
-                self.draw_buffer.ellipse([x-4, y-4, x+4, y+4], fill='black', outline='black')
+                self.raster.dot(x, y)
             self.last_x = x
             self.last_y = y
+            self.schedule_live_prediction()
             
     def stop_draw(self, event):
         self.drawing = False
@@ -100,30 +177,53 @@ class DigitRecognizerGUI:
         
     def clear_canvas(self):
         self.canvas.delete("all")
-        # Clear internal image buffer
-        self.image_buffer = Image.new('RGB', (self.canvas_size, self.canvas_size), 'white')
-        self.draw_buffer = ImageDraw.Draw(self.image_buffer)
+        # Clear internal image buffer; predictions still in flight are now stale
+        self.raster.clear()
+        self.generation += 1
+        self.cancel_live_prediction()
         self.prediction_label.config(text="Draw a digit")
         
+    def schedule_live_prediction(self):
+        # Debounce: restart the timer on every stroke so only pauses trigger a prediction
+        if not self.live.get():
+            return
+        self.cancel_live_prediction()
+        self.live_after_id = self.root.after(LIVE_DEBOUNCE_MS, self.predict)
+        
+    def cancel_live_prediction(self):
+        if self.live_after_id is not None:
+            self.root.after_cancel(self.live_after_id)
+            self.live_after_id = None
+        
     def predict(self):
-        # Use internal image buffer (matches web app approach - direct image capture)
-        # Convert to grayscale (black on white, matching digit images format)
-        img = self.image_buffer.convert('L')
-        img = img.resize((28, 28), Image.Resampling.LANCZOS)
-        
-        # Convert to numpy array and preprocess
-        # preprocess_image_array inverts (black on white -> white on black) and normalizes to [0, 1]
-        img_array = np.array(img)
-        img_array = preprocess_image_array(img_array)
-        
-        # Predict
-        predicted_digit, probabilities = predict_preprocessed(self.model, img_array)
-        confidence = probabilities[predicted_digit] * 100
-        
-        # Update label
-        self.prediction_label.config(
-            text=f"Prediction: {predicted_digit}\nConfidence: {confidence:.1f}%"
-        )
+        self.live_after_id = None
+        if not self.raster.version:
+            return
+        # The raster already holds the preprocessed input (inverted, area-averaged
+        # to 28x28, normalized to [0, 1]); the worker gets a snapshot of it
+        self.worker.submit(self.generation, self.raster.raster.copy())
+        
+    def poll_results(self):
+        try:
+            while True:
+                generation, predicted_digit, probabilities = self.worker.results.get_nowait()
+                if generation != self.generation:
+                    continue
+                if predicted_digit is None:
+                    self.prediction_label.config(text=f"Prediction failed\n{probabilities}")
+                    continue
+                confidence = probabilities[predicted_digit] * 100
+                self.prediction_label.config(
+                    text=f"Prediction: {predicted_digit}\nConfidence: {confidence:.1f}%"
+                )
+        except queue.Empty:
+            pass
+        self.root.after(RESULT_POLL_MS, self.poll_results)
+        
+    def close(self):
+        self.cancel_live_prediction()
+        self.worker.close()
+        self.root.destroy()
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,277 @@
+"""
+Production serving for the web app: pre-forks N worker processes that share
+one copy of the model weights.
+
+    python run.py web --workers 4
+    python apps/serve.py --workers 4 --host 0.0.0.0 --port 5000
+
+The parent process never imports TensorFlow. It converts the Keras model to
+NumPy weights in a short-lived spawned process (or loads a `.npz` directly),
+copies them into a shared memory segment, binds the listening socket and
+forks the workers. Each worker imports `web_app`, which maps the shared
+weights read-only, and accepts connections on the inherited socket.
+SIGINT/SIGTERM stop the workers gracefully; workers that die are restarted.
+
+The parent also watches the versioned model directory. A new version is
+converted once, published in a fresh segment and announced with SIGHUP;
+every worker (and any worker restarted later) re-attaches to it, so all of
+them serve the same version from one copy of the weights.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from digit_recognition import MODEL_PATH, MODEL_VERSIONS_DIR, ModelWatcher, SharedWeights, load_numpy_model
+from digit_recognition.model import DEFAULT_BACKEND
+from digit_recognition.quantize import quantize_model
+from digit_recognition.serving import DEFAULT_POLL_INTERVAL, latest_version
+
+# Workers get this long to finish in-flight requests before being killed
+SHUTDOWN_TIMEOUT = 10.0
+# Pause before replacing a dead worker so a crash loop doesn't spin
+RESTART_DELAY = 1.0
+# How often the parent reaps dead workers between version checks
+REAP_INTERVAL = 0.2
+
+
+class ShutdownRequested(Exception):
+    pass
+
+
+def convert_keras_model(path):
+    """Runs in a spawned process so TensorFlow never loads in the forking parent."""
+    from digit_recognition import NumpyDigitModel, load_trained_model
+
+    return NumpyDigitModel.from_keras(load_trained_model(Path(path)))
+
+
+def serving_model_path(weights=None):
+    """Explicit weights, else the newest version in the versioned directory, else MODEL_PATH."""
+    return Path(weights or latest_version(MODEL_VERSIONS_DIR) or MODEL_PATH)
+
+
+def load_serving_model(path, backend=DEFAULT_BACKEND):
+    """
+    NumPy weights for serving, from a `.npz` artifact or converted from Keras.
+
+    For the float16 and int8 backends the weights are rounded the same way
+    their artifacts are, so workers serve what the backend would.
+    """
+    path = Path(path)
+    if path.suffix == '.npz':
+        model = load_numpy_model(path)
+    elif not path.exists():
+        raise FileNotFoundError(f"Model file not found at {path}")
+    else:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            model = executor.submit(convert_keras_model, str(path)).result()
+    return quantize_model(model, backend) if backend in ('float16', 'int8') else model
+
+
+class SharedWeightsPublisher:
+    """
+    Stands in for the workers' `ServedModel` as the parent's watcher target:
+    a swap copies the new version into a fresh segment, publishes its spec
+    and signals every worker to re-attach, then drops the old segment's name
+    (workers still mapping it keep their pages until they let go).
+    """
+
+    def __init__(self, shared, spec_path, workers):
+        self.shared = shared
+        self.spec_path = spec_path
+        self.workers = workers
+        self.last_error = None
+
+    def swap(self, model, version):
+        incoming = SharedWeights.create(model, version=version)
+        incoming.publish(self.spec_path)
+        previous, self.shared = self.shared, incoming
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGHUP)
+            except ProcessLookupError:
+                pass
+        previous.close()
+        print(f"✓ Published model version {version} to {len(self.workers)} workers", flush=True)
+
+
+def bind_socket(host, port, backlog=128):
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def worker_main(sock, host, port):
+    """Serve the web app on the inherited listening socket until SIGTERM."""
+    from werkzeug.serving import make_server
+
+    sys.path.insert(0, str(PROJECT_ROOT / 'apps'))
+    import web_app
+
+    server = make_server(host, port, web_app.app, threaded=True, fd=sock.fileno())
+    # shutdown() blocks until serve_forever returns, so it can't run in the handler itself
+    stop = lambda signum, frame: threading.Thread(target=server.shutdown, daemon=True).start()
+    signal.signal(signal.SIGTERM, stop)
+    # The parent published a new model version; swap to it off the signal handler
+    reload = lambda signum, frame: threading.Thread(target=reload_weights, args=(web_app,), daemon=True).start()
+    signal.signal(signal.SIGHUP, reload)
+    # A version published while this worker was starting up was signalled before the handler existed
+    reload_weights(web_app)
+    server.serve_forever()
+    server.server_close()
+
+
+def reload_weights(web_app):
+    try:
+        web_app.reload_shared_weights()
+    except Exception:
+        import traceback
+
+        traceback.print_exc()
+
+
+def spawn_worker(sock, host, port):
+    pid = os.fork()
+    if pid:
+        return pid
+    # Ctrl+C reaches the whole process group; only the parent acts on it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # Until worker_main installs its handler, a version announcement must not kill the worker
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    status = 0
+    try:
+        worker_main(sock, host, port)
+    except BaseException:
+        import traceback
+
+        traceback.print_exc()
+        status = 1
+    finally:
+        os._exit(status)
+
+
+def stop_workers(workers, timeout=SHUTDOWN_TIMEOUT):
+    for pid in workers:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    deadline = time.monotonic() + timeout
+    while workers and time.monotonic() < deadline:
+        pid, _ = os.waitpid(-1, os.WNOHANG)
+        if pid:
+            workers.discard(pid)
+        else:
+            time.sleep(0.05)
+    for pid in workers:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+
+
+def serve(workers, host='127.0.0.1', port=5000, weights=None):
+    path = serving_model_path(weights)
+    if DEFAULT_BACKEND in ('tflite', 'tflite-dynamic'):
+        print(f"Note: workers serve NumPy weights from shared memory, not the {DEFAULT_BACKEND} backend",
+              file=sys.stderr, flush=True)
+    model = load_serving_model(path)
+    shared = SharedWeights.create(model, version=path.stem)
+    del model
+    # Workers attach to whichever segment this file currently names, including
+    # workers restarted after a hot swap
+    spec_fd, spec_path = tempfile.mkstemp(prefix='digit-weights-', suffix='.json')
+    os.close(spec_fd)
+    shared.publish(spec_path)
+    os.environ['DIGIT_SHARED_WEIGHTS_FILE'] = spec_path
+    # A live session only exists in the worker that opened it, and requests are
+    # spread over all workers; DIGIT_LIVE=1 is for sticky proxies that pin clients
+    if workers > 1 and os.environ.setdefault('DIGIT_LIVE', '0') == '0':
+        print("Note: live drawing is disabled with several workers (set DIGIT_LIVE=1 behind a sticky proxy)",
+              file=sys.stderr, flush=True)
+    sock = bind_socket(host, port)
+
+    def request_shutdown(signum, frame):
+        raise ShutdownRequested()
+
+    signal.signal(signal.SIGINT, request_shutdown)
+    signal.signal(signal.SIGTERM, request_shutdown)
+
+    running = set()
+    publisher = SharedWeightsPublisher(shared, spec_path, running)
+    # Explicit --weights pin the served model; otherwise new versions are hot-swapped
+    watcher = None
+    if weights is None and MODEL_VERSIONS_DIR.is_dir():
+        watcher = ModelWatcher(
+            publisher,
+            MODEL_VERSIONS_DIR,
+            load_serving_model,
+            current=path.stem if path.parent == MODEL_VERSIONS_DIR else None,
+            interval=float(os.environ.get('DIGIT_MODEL_POLL_SECONDS', DEFAULT_POLL_INTERVAL)),
+        )
+    try:
+        for _ in range(workers):
+            running.add(spawn_worker(sock, host, port))
+        print(f"✓ Serving {path.name} on http://{host}:{port} with {workers} workers "
+              f"({shared.nbytes / 1024:.0f} KiB shared weights)", flush=True)
+        next_check = time.monotonic()
+        while True:
+            # Forking stays on this thread: the watcher runs here too instead of in a thread
+            if watcher is not None and time.monotonic() >= next_check:
+                watcher.check()
+                next_check = time.monotonic() + watcher.interval
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if not pid:
+                time.sleep(REAP_INTERVAL)
+                continue
+            if pid not in running:
+                continue  # e.g. the multiprocessing resource tracker
+            running.discard(pid)
+            print(f"✗ Worker {pid} exited with status {status}; restarting", file=sys.stderr, flush=True)
+            time.sleep(RESTART_DELAY)
+            running.add(spawn_worker(sock, host, port))
+    except ShutdownRequested:
+        print("Stopping workers...", flush=True)
+    finally:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        stop_workers(running)
+        sock.close()
+        publisher.shared.close()
+        os.unlink(spec_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes (default: one per CPU)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--weights', type=Path,
+                        help='Serve this .npz weight file instead of converting the Keras model')
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    serve(args.workers, args.host, args.port, args.weights)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,73 +1,507 @@
 import base64
 import io
+import json
+import logging
+import os
 import re
 import sys
+import threading
+import time
+import uuid
 from pathlib import Path
 
 import numpy as np
-from flask import Flask, jsonify, render_template, request
-from PIL import Image
+from flask import Flask, Response, g, jsonify, render_template, request
+from PIL import Image, UnidentifiedImageError
+from werkzeug.exceptions import HTTPException
 
 # Add project root to path
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from digit_recognition import load_trained_model, predict_preprocessed, preprocess_image_array
+from digit_recognition import (
+    MODEL_PATH,
+    MODEL_VERSIONS_DIR,
+    LiveSessions,
+    MicroBatcher,
+    ModelWatcher,
+    ServedModel,
+    SharedWeights,
+    enable_prediction_cache,
+    load_model_version,
+    load_trained_model,
+    predict_preprocessed,
+    predict_preprocessed_batch,
+    preprocess_fast,
+)
+from digit_recognition.metrics import (
+    LATENCY_BUCKETS,
+    SIZE_BUCKETS,
+    MetricsRegistry,
+    StageTimer,
+)
+from digit_recognition.cascade import CascadeModel
+from digit_recognition.paths import CORRECTIONS_DIR
+from digit_recognition.model import DEFAULT_BACKEND
+from digit_recognition.segment import recognize_numbers
+from digit_recognition.serving import DEFAULT_POLL_INTERVAL, latest_version
 
 app = Flask(__name__, template_folder=str(PROJECT_ROOT / "templates"))
 
-# Load model
+# Batch sizes predicted once at startup (and before every hot swap) so the first
+# real request doesn't pay for lazy graph building; empty disables warm-up
+WARMUP_BATCH_SIZES = [int(size) for size in os.environ.get('DIGIT_WARMUP_BATCH_SIZES', '1,8,32').split(',') if size.strip()]
+
+# Load model (pre-forked workers started by apps/serve.py instead map the
+# weights their parent process placed in shared memory). The newest file in
+# the versioned model directory takes precedence over MODEL_PATH, and every
+# source is loaded for the configured DIGIT_BACKEND.
+served = ServedModel(WARMUP_BATCH_SIZES)
+shared_weights = None
+# serve.py rewrites this file with each newly published segment, then sends SIGHUP
+SHARED_WEIGHTS_FILE = os.environ.get('DIGIT_SHARED_WEIGHTS_FILE')
+# Segments replaced by a hot swap, unmapped once no in-flight request holds their views
+retired_weights = []
+shared_weights_lock = threading.Lock()
+
+def shared_model(weights):
+    """The model served from shared weights, wrapped for the configured backend."""
+    model = weights.model()
+    return CascadeModel.load(model) if DEFAULT_BACKEND == 'cascade' else model
+
+def reload_shared_weights():
+    """Switch to the segment serve.py most recently published; returns True if the model changed."""
+    global shared_weights
+    with shared_weights_lock:
+        incoming = SharedWeights.attach_published(SHARED_WEIGHTS_FILE)
+        if incoming.segment.name == shared_weights.segment.name:
+            incoming.close()
+            return False
+        served.swap(shared_model(incoming), incoming.version)
+        retired_weights.append(shared_weights)
+        shared_weights = incoming
+        for weights in list(retired_weights):
+            try:
+                weights.close()
+            except BufferError:
+                continue
+            retired_weights.remove(weights)
+        return True
+
+initial_version = latest_version(MODEL_VERSIONS_DIR)
 try:
-    model = load_trained_model()
+    if SHARED_WEIGHTS_FILE:
+        shared_weights = SharedWeights.attach_published(SHARED_WEIGHTS_FILE)
+    elif os.environ.get('DIGIT_SHARED_WEIGHTS'):
+        shared_weights = SharedWeights.attach(os.environ['DIGIT_SHARED_WEIGHTS'])
+    if shared_weights is not None:
+        model, version = shared_model(shared_weights), shared_weights.version
+    elif initial_version is not None:
+        model, version = load_model_version(initial_version, DEFAULT_BACKEND), initial_version.stem
+    else:
+        model, version = load_trained_model(backend=DEFAULT_BACKEND), MODEL_PATH.stem
 except Exception as e:
     raise RuntimeError(f"Could not load model. Error: {e}. You may need to retrain the model with: python scripts/recognition.py")
+served.swap(model, version)
+del model
+
+# Hot swap: newer versions dropped into the versioned directory are loaded and
+# warmed up in the background, then replace the served model between requests.
+# Pre-forked workers don't watch: the serve.py parent converts each new version
+# once, publishes it in a fresh shared segment and signals them to re-attach.
+watcher = None
+if MODEL_VERSIONS_DIR.is_dir() and shared_weights is None:
+    watcher = ModelWatcher(
+        served,
+        MODEL_VERSIONS_DIR,
+        lambda path: load_model_version(path, DEFAULT_BACKEND),
+        current=version if initial_version is not None and initial_version.stem == version else None,
+        interval=float(os.environ.get('DIGIT_MODEL_POLL_SECONDS', DEFAULT_POLL_INTERVAL)),
+    ).start()
+
+# Optional micro-batching: coalesce concurrent /predict requests into one forward pass
+batcher = None
+if os.environ.get('DIGIT_MICROBATCH', '') not in ('', '0'):
+    batcher = MicroBatcher(
+        served.model,
+        max_batch_size=int(os.environ.get('DIGIT_MICROBATCH_SIZE', 32)),
+        max_wait=float(os.environ.get('DIGIT_MICROBATCH_WAIT_MS', 2)) / 1000,
+    )
+    # The batcher reads its model once per forward pass, so repointing it is enough
+    served.on_swap(lambda model, version: setattr(batcher, 'model', model))
+
+# Live drawing: clients stream stroke deltas into a per-session server-side raster
+# and receive debounced predictions over server-sent events (see /live). Sessions
+# live in this process, so serve.py turns this off (DIGIT_LIVE=0) for several workers.
+live_sessions = None
+if os.environ.get('DIGIT_LIVE', '1') != '0':
+    live_sessions = LiveSessions(
+        served.model,
+        raster_size=int(os.environ.get('DIGIT_LIVE_RASTER_SIZE', 112)),
+        debounce=float(os.environ.get('DIGIT_LIVE_DEBOUNCE_MS', 60)) / 1000,
+        idle_timeout=float(os.environ.get('DIGIT_LIVE_IDLE_SECONDS', 60)),
+        max_sessions=int(os.environ.get('DIGIT_LIVE_MAX_SESSIONS', 1000)),
+    )
+    served.on_swap(lambda model, version: setattr(live_sessions, 'model', model))
+# Seconds between keep-alive comments on an idle event stream
+LIVE_HEARTBEAT_SECONDS = 15
+
+# Optional LRU cache for repeated inputs (retried POSTs, identical canvases)
+prediction_cache = None
+if int(os.environ.get('DIGIT_PREDICTION_CACHE', 0)) > 0:
+    prediction_cache = enable_prediction_cache(int(os.environ['DIGIT_PREDICTION_CACHE']))
+
+# Hot-path instrumentation, exposed in Prometheus text format on /metrics
+metrics = MetricsRegistry()
+REQUESTS = metrics.counter('digit_requests_total', 'Requests by endpoint and HTTP status')
+ERRORS = metrics.counter('digit_request_errors_total', 'Failed requests by endpoint and error type')
+STAGE_SECONDS = metrics.histogram('digit_stage_seconds', 'Time spent in each request stage', LATENCY_BUCKETS)
+PAYLOAD_BYTES = metrics.histogram('digit_request_payload_bytes', 'Request body size', SIZE_BUCKETS)
+TRACE_REQUESTS = os.environ.get('DIGIT_TRACE_REQUESTS', '') not in ('', '0')
+if TRACE_REQUESTS:
+    app.logger.setLevel(logging.INFO)
+
+# Raw uploads are one 28x28 uint8 raster, black digit on white like the canvas
+RAW_IMAGE_SHAPE = (28, 28)
+# Binary responses: uint8 digit followed by 10 little-endian float32 probabilities
+BINARY_MIMETYPE = 'application/octet-stream'
+
+# Bad input gets a 400; anything else is our fault and gets a 500
+CLIENT_ERRORS = (ValueError, TypeError, UnidentifiedImageError)
+
+@app.before_request
+def start_request_timer():
+    endpoint = request.endpoint or 'unknown'
+    g.timer = StageTimer(STAGE_SECONDS, endpoint=endpoint)
+    g.request_start = time.perf_counter()
+    if request.content_length:
+        PAYLOAD_BYTES.observe(request.content_length, endpoint=endpoint)
+
+@app.after_request
+def record_request(response):
+    endpoint = request.endpoint or 'unknown'
+    elapsed = time.perf_counter() - g.request_start
+    STAGE_SECONDS.observe(elapsed, endpoint=endpoint, stage='total')
+    REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    if TRACE_REQUESTS and endpoint != 'metrics':
+        app.logger.info(
+            '%s %s status=%d total=%.3fms %s', request.method, request.path,
+            response.status_code, elapsed * 1000, g.timer.trace_line(),
+        )
+    return response
+
+def error_response(message, status, error_type):
+    ERRORS.inc(endpoint=request.endpoint or 'unknown', type=error_type)
+    return jsonify({'error': message}), status
+
+def exception_response(exc):
+    if isinstance(exc, HTTPException):
+        status = exc.code
+    else:
+        status = 400 if isinstance(exc, CLIENT_ERRORS) else 500
+    return error_response(str(exc), status, type(exc).__name__)
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return render_template('index.html', live_enabled=live_sessions is not None)
+
+def decode_image(image_data, timer):
+    """Decode a base64 (data URL) image into a grayscale uint8 array."""
+    # Remove data URL prefix if present
+    with timer.stage('strip_prefix'):
+        image_data = re.sub('^data:image/.+;base64,', '', image_data)
+    
+    # Decode base64 to image
+    with timer.stage('b64decode'):
+        image_bytes = base64.b64decode(image_data)
+    return decode_image_bytes(image_bytes, timer)
+
+def decode_image_bytes(image_bytes, timer):
+    """Decode encoded image bytes (PNG, JPEG, ...) into a grayscale uint8 array."""
+    with timer.stage('image_open'):
+        img = Image.open(io.BytesIO(image_bytes))
+        img.load()
+    
+    # Convert to grayscale; preprocess_fast area-averages it down to 28x28
+    # Match the format of digit images in digits/ folder: black digits on white background
+    with timer.stage('grayscale'):
+        return np.asarray(img.convert('L'))
+
+def decode_raw(raw_bytes, timer):
+    """View a raw 28x28 uint8 body as an image array without copying it."""
+    with timer.stage('frombuffer'):
+        expected = RAW_IMAGE_SHAPE[0] * RAW_IMAGE_SHAPE[1]
+        if len(raw_bytes) != expected:
+            raise ValueError(f'Raw body must be exactly {expected} bytes (28x28 uint8), got {len(raw_bytes)}')
+        return np.frombuffer(raw_bytes, dtype=np.uint8).reshape(RAW_IMAGE_SHAPE)
+
+def read_request_image(timer):
+    """Return the uploaded grayscale image array, or an error response for bad JSON bodies."""
+    if request.mimetype == BINARY_MIMETYPE:
+        return decode_raw(request.get_data(cache=False), timer), None
+    if request.mimetype.startswith('image/'):
+        return decode_image_bytes(request.get_data(cache=False), timer), None
+    
+    # Get base64 image data from request
+    with timer.stage('parse_json'):
+        data = request.json
+    if data is None:
+        return None, error_response('No JSON data provided', 400, 'NoJSON')
+    if 'image' not in data:
+        return None, error_response('Missing "image" field in request', 400, 'MissingField')
+    return decode_image(data['image'], timer), None
+
+def wants_binary():
+    return (
+        request.args.get('format') == 'binary'
+        or request.accept_mimetypes.best == BINARY_MIMETYPE
+    )
+
+def binary_prediction(predicted_digit, probabilities):
+    """Pack one prediction as 41 bytes: uint8 digit + 10 float32 probabilities (0-1)."""
+    body = bytes([int(predicted_digit)]) + np.asarray(probabilities, dtype='<f4').tobytes()
+    return Response(body, mimetype=BINARY_MIMETYPE)
+
+def run_prediction(prepped):
+    """Predict one preprocessed image through the cache and micro-batcher when enabled."""
+    if batcher is None:
+        return predict_preprocessed(served.model, prepped)
+    if prediction_cache is None:
+        return batcher.predict(prepped)
+    return prediction_cache.get_or_compute(batcher.model, prepped, batcher.predict)
+
+def format_prediction(predicted_digit, probabilities):
+    """Build the JSON payload for one prediction."""
+    confidence = float(probabilities[predicted_digit] * 100)
+    return {
+        'digit': int(predicted_digit),
+        'confidence': confidence,
+        'probabilities': [float(p) * 100 for p in probabilities]
+    }
 
 @app.route('/predict', methods=['POST'])
 def predict():
     try:
-        # Get base64 image data from request
-        data = request.json
-        if data is None:
-            return jsonify({'error': 'No JSON data provided'}), 400
+        # Accepts a JSON data URL, a raw image/* body, or a raw 28x28 uint8 octet-stream
+        timer = g.timer
+        img_array, failure = read_request_image(timer)
+        if failure is not None:
+            return failure
         
-        if 'image' not in data:
-            return jsonify({'error': 'Missing "image" field in request'}), 400
-        
-        image_data = data['image']
+        # preprocess_fast downsamples to 28x28, inverts (black on white -> white on black)
+        # and normalizes to [0, 1] in one pass
+        with timer.stage('preprocess'):
+            prepped = preprocess_fast(img_array)
         
-        # Remove data URL prefix if present
-        image_data = re.sub('^data:image/.+;base64,', '', image_data)
+        # Predict
+        with timer.stage('predict'):
+            predicted_digit, probabilities = run_prediction(prepped)
+        if wants_binary():
+            return binary_prediction(predicted_digit, probabilities)
+        return jsonify(format_prediction(predicted_digit, probabilities))
+    except Exception as e:
+        return exception_response(e)
+
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    try:
+        timer = g.timer
+        with timer.stage('parse_json'):
+            data = request.json
+        if data is None:
+            return error_response('No JSON data provided', 400, 'NoJSON')
         
-        # Decode base64 to image
-        image_bytes = base64.b64decode(image_data)
-        img = Image.open(io.BytesIO(image_bytes))
+        images = data.get('images')
+        if not isinstance(images, list):
+            return error_response('Missing "images" list in request', 400, 'MissingField')
         
-        # Convert to grayscale and resize to 28x28 (standard format)
-        # Match the format of digit images in digits/ folder: black digits on white background
-        img = img.convert('L')
-        img = img.resize((28, 28), Image.Resampling.LANCZOS)
+        # Decode every image, then run a single forward pass for the whole batch.
+        # An image that can't be decoded is reported on its own (its prediction
+        # is null) instead of failing the rest of the batch.
+        decoded, indices, errors = [], [], []
+        for index, image in enumerate(images):
+            try:
+                decoded.append(decode_image(image, timer))
+                indices.append(index)
+            except CLIENT_ERRORS as e:
+                ERRORS.inc(endpoint=request.endpoint, type=type(e).__name__)
+                errors.append({'index': index, 'error': str(e)})
+        with timer.stage('preprocess'):
+            prepped = np.empty((len(decoded), 28, 28), dtype=np.float32)
+            for row, img_array in enumerate(decoded):
+                preprocess_fast(img_array, out=prepped[row:row + 1])
+        with timer.stage('predict'):
+            digits, probabilities = predict_preprocessed_batch(served.model, prepped)
         
-        # Convert to numpy array and preprocess
-        # preprocess_image_array inverts (black on white -> white on black) and normalizes to [0, 1]
-        img_array = np.array(img)
-        prepped = preprocess_image_array(img_array)
+        predictions = [None] * len(images)
+        for index, digit, probs in zip(indices, digits, probabilities):
+            predictions[index] = format_prediction(digit, probs)
+        return jsonify({'predictions': predictions, 'errors': errors})
+    except Exception as e:
+        return exception_response(e)
+
+def format_numbers(result):
+    """Multi-digit result with confidences as percentages, like /predict."""
+    for number in result['numbers']:
+        number['confidence'] *= 100
+        for digit in number['digits']:
+            digit['confidence'] *= 100
+    return result
+
+@app.route('/predict_number', methods=['POST'])
+def predict_number():
+    try:
+        # Same inputs as /predict, but the image may hold any number of digits
+        # (a whole number, a form or a full page), segmented before prediction
+        timer = g.timer
+        img_array, failure = read_request_image(timer)
+        if failure is not None:
+            return failure
         
-        # Predict
-        predicted_digit, probabilities = predict_preprocessed(model, prepped)
-        confidence = float(probabilities[predicted_digit] * 100)
-        probabilities = [float(p) * 100 for p in probabilities]
+        # Every digit crop goes through one forward pass
+        with timer.stage('predict'):
+            result = recognize_numbers(served.model, [img_array])[0]
+        return jsonify(format_numbers(result))
+    except Exception as e:
+        return exception_response(e)
+
+@app.route('/feedback', methods=['POST'])
+def feedback():
+    """Store a labelled correction for scripts/fine_tune.py: {"image": dataurl, "label": 7}."""
+    try:
+        timer = g.timer
+        data = request.get_json(silent=True)
+        if data is None:
+            return error_response('No JSON data provided', 400, 'NoJSON')
+        if 'image' not in data:
+            return error_response('Missing "image" field in request', 400, 'MissingField')
+        label = data.get('label')
+        if not isinstance(label, int) or isinstance(label, bool) or not 0 <= label <= 9:
+            return error_response('"label" must be an integer digit 0-9', 400, 'InvalidLabel')
+        img_array = decode_image(data['image'], timer)
         
+        # The parent directory is the label, as scripts/evaluate.py and fine_tune.py expect
+        directory = CORRECTIONS_DIR / str(label)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f'{uuid.uuid4().hex}.png'
+        with timer.stage('save'):
+            Image.fromarray(img_array).save(path)
+        return jsonify({'saved': path.name, 'label': label}), 201
+    except Exception as e:
+        return exception_response(e)
+
+def live_disabled_response():
+    return error_response('Live drawing is disabled (set DIGIT_LIVE=1)', 404, 'LiveDisabled')
+
+@app.route('/live', methods=['POST'])
+def live_create():
+    """Open a live drawing session for a square canvas: {"canvas_size": 250}."""
+    if live_sessions is None:
+        return live_disabled_response()
+    try:
+        data = request.get_json(silent=True) or {}
+        session = live_sessions.create(float(data.get('canvas_size', 250)))
         return jsonify({
-            'digit': predicted_digit,
-            'confidence': confidence,
-            'probabilities': probabilities
-        })
+            'session': session.id,
+            'raster_size': live_sessions.raster_size,
+            'idle_timeout': live_sessions.idle_timeout,
+        }), 201
+    except RuntimeError as e:
+        return error_response(str(e), 503, 'TooManySessions')
+    except Exception as e:
+        return exception_response(e)
+
+@app.route('/live/<session_id>', methods=['POST'])
+def live_update(session_id):
+    """Apply a stroke delta: {"strokes": [[x0, y0, x1, y1, ...], ...], "width": 8, "clear": false}."""
+    if live_sessions is None:
+        return live_disabled_response()
+    try:
+        data = request.get_json(silent=True)
+        if data is None:
+            return error_response('No JSON data provided', 400, 'NoJSON')
+        version = live_sessions.update(
+            session_id, data.get('strokes', []), data.get('width', 8), bool(data.get('clear', False))
+        )
+        if version is None:
+            return error_response('Unknown or expired live session', 404, 'UnknownSession')
+        return jsonify({'version': version})
     except Exception as e:
-        return jsonify({'error': str(e)}), 400
+        return exception_response(e)
+
+@app.route('/live/<session_id>', methods=['DELETE'])
+def live_close(session_id):
+    if live_sessions is None:
+        return live_disabled_response()
+    if not live_sessions.close(session_id):
+        return error_response('Unknown or expired live session', 404, 'UnknownSession')
+    return '', 204
+
+@app.route('/live/<session_id>/events')
+def live_events(session_id):
+    """Server-sent events: one message per new prediction, until the session closes."""
+    if live_sessions is None:
+        return live_disabled_response()
+    session = live_sessions.get(session_id)
+    if session is None:
+        return error_response('Unknown or expired live session', 404, 'UnknownSession')
+    
+    def stream():
+        version = 0
+        yield 'retry: 1000\n\n'
+        while True:
+            result = live_sessions.wait(session, version, LIVE_HEARTBEAT_SECONDS)
+            if session.closed:
+                yield 'event: expired\ndata: {}\n\n'
+                return
+            if result is None:
+                yield ': keep-alive\n\n'
+                continue
+            version, digit, probabilities = result
+            payload = {'version': version, 'digit': None}
+            if digit is not None:
+                payload.update(format_prediction(digit, probabilities))
+            yield f'data: {json.dumps(payload)}\n\n'
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+@app.route('/live_stats')
+def live_stats():
+    if live_sessions is None:
+        return live_disabled_response()
+    return jsonify(live_sessions.stats())
+
+@app.route('/healthz')
+def healthz():
+    status = served.status()
+    status['watching'] = str(watcher.directory) if watcher is not None else None
+    return jsonify(status), 200 if status['ready'] else 503
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/batching_stats')
+def batching_stats():
+    if batcher is None:
+        return jsonify({'error': 'Micro-batching is disabled (set DIGIT_MICROBATCH=1)'}), 404
+    return jsonify(batcher.stats())
+
+@app.route('/cache_stats')
+def cache_stats():
+    if prediction_cache is None:
+        return jsonify({'error': 'Prediction cache is disabled (set DIGIT_PREDICTION_CACHE=<entries>)'}), 404
+    return jsonify(prediction_cache.stats())
+
+@app.route('/cascade_stats')
+def cascade_stats():
+    model = served.model
+    if not isinstance(model, CascadeModel):
+        return jsonify({'error': 'The served model is not a cascade (set DIGIT_BACKEND=cascade)'}), 404
+    return jsonify(model.stats())
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
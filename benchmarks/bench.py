@@ -0,0 +1,299 @@
+"""
+Performance benchmarks for preprocessing, inference, model loading, package
+import and the web app's /predict endpoint.
+
+    python benchmarks/bench.py run --output results.json
+    python benchmarks/bench.py compare baseline.json results.json --threshold 0.10
+
+Runs offline: when no trained model exists an untrained model with the same
+architecture is generated under benchmarks/.cache/ (latency does not depend on
+the weights). Every metric is a time in milliseconds, so lower is better.
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from digit_recognition import MODEL_PATH
+
+BENCH_CACHE = Path(__file__).resolve().parent / ".cache"
+DEFAULT_THRESHOLD = 0.10
+BATCH_SIZES = (1, 32, 256)
+
+
+def summarize(samples):
+    """Latency percentiles in milliseconds for a list of durations in seconds."""
+    ms = np.asarray(samples) * 1000
+    return {
+        "p50": float(np.percentile(ms, 50)),
+        "p95": float(np.percentile(ms, 95)),
+        "p99": float(np.percentile(ms, 99)),
+        "mean": float(ms.mean()),
+    }
+
+
+def timed(fn, repeats, warmup=3):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def prepare_model(path=None):
+    """Return a usable Keras model path, generating an untrained one if needed."""
+    path = Path(path) if path else MODEL_PATH
+    if path.exists():
+        return path
+    generated = BENCH_CACHE / "bench_model.keras"
+    if not generated.exists():
+        from digit_recognition import build_model
+
+        BENCH_CACHE.mkdir(parents=True, exist_ok=True)
+        build_model().save(generated)
+    return generated
+
+
+def sample_canvas(size=250, seed=0):
+    """A black-on-white stroke image like the ones drawn in the apps."""
+    rng = np.random.default_rng(seed)
+    img = np.full((size, size), 255, dtype=np.uint8)
+    for _ in range(6):
+        x, y = rng.integers(size // 4, 3 * size // 4, 2)
+        img[y:y + size // 10, x:x + size // 25] = 0
+    return img
+
+
+def bench_import(repeats):
+    probe = "import time; s = time.perf_counter(); import digit_recognition; print(time.perf_counter() - s)"
+    samples = []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-c", probe], cwd=str(PROJECT_ROOT),
+            capture_output=True, text=True, check=True,
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return {"import_package": summarize(samples)}
+
+
+def bench_load(model_path, repeats):
+    """Cold load (fresh interpreter, includes TensorFlow import) and warm in-process load."""
+    probe = (
+        "import sys, time; sys.path.insert(0, sys.argv[1]); s = time.perf_counter();"
+        "from digit_recognition import load_trained_model; from pathlib import Path;"
+        "load_trained_model(Path(sys.argv[2])); print(time.perf_counter() - s)"
+    )
+    cold = []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-c", probe, str(PROJECT_ROOT), str(model_path)],
+            capture_output=True, text=True, check=True,
+        )
+        cold.append(float(out.stdout.strip().splitlines()[-1]))
+
+    from digit_recognition import load_trained_model
+
+    # Reloading is slow, so a handful of in-process loads is enough
+    warm = timed(lambda: load_trained_model(model_path), max(repeats, 5), warmup=1)
+    return {"load_model_cold": summarize(cold), "load_model_warm": warm}
+
+
+def bench_preprocess(repeats):
+    from digit_recognition import preprocess_batch, preprocess_image_array
+
+    small = sample_canvas(28)
+    canvas = sample_canvas(250)
+    stack = np.stack([sample_canvas(28, seed) for seed in range(256)])
+    batch = timed(lambda: preprocess_batch(stack), repeats)
+    return {
+        "preprocess_28x28": timed(lambda: preprocess_image_array(small), repeats),
+        "preprocess_250x250": timed(lambda: preprocess_image_array(canvas), repeats),
+        "preprocess_batch_256_per_image": {k: v / len(stack) for k, v in batch.items()},
+    }
+
+
+def bench_inference(model_path, repeats):
+    from digit_recognition import (
+        NumpyDigitModel,
+        TFLiteDigitModel,
+        export_tflite,
+        load_trained_model,
+        predict_preprocessed_batch,
+    )
+
+    keras_model = load_trained_model(model_path)
+    BENCH_CACHE.mkdir(parents=True, exist_ok=True)
+    backends = {
+        "keras": keras_model,
+        "numpy": NumpyDigitModel.from_keras(keras_model),
+        "tflite": TFLiteDigitModel(export_tflite(keras_model, BENCH_CACHE / "bench_model.tflite")),
+    }
+    x = np.random.default_rng(0).random((max(BATCH_SIZES), 28, 28), dtype=np.float32)
+
+    results = {}
+    for name, model in backends.items():
+        for batch_size in BATCH_SIZES:
+            batch = x[:batch_size]
+            results[f"inference_{name}_batch{batch_size}"] = timed(
+                lambda: predict_preprocessed_batch(model, batch), repeats
+            )
+    return results
+
+
+def bench_endpoint(model_path, requests_per_client, clients):
+    """Run `endpoint_worker` in a fresh interpreter whose web app serves `model_path`."""
+    env = {**os.environ, "DIGIT_MODEL_PATH": str(model_path)}
+    out = subprocess.run(
+        [sys.executable, __file__, "endpoint",
+         "--clients", str(clients), "--endpoint-requests", str(requests_per_client)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def endpoint_worker(requests_per_client, clients):
+    """Drive /predict through the Flask test client from concurrent threads."""
+    sys.path.insert(0, str(PROJECT_ROOT / "apps"))
+    import web_app
+
+    buffer = io.BytesIO()
+    Image.fromarray(sample_canvas(250)).save(buffer, format="PNG")
+    payload = {"image": "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()}
+
+    web_app.app.test_client().post("/predict", json=payload)  # warm-up
+    samples, errors = [], []
+    lock = threading.Lock()
+
+    def client():
+        local = []
+        test_client = web_app.app.test_client()
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            response = test_client.post("/predict", json=payload)
+            local.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if errors:
+        raise RuntimeError(f"/predict returned errors: {sorted(set(errors))}")
+    stats = summarize(samples)
+    stats["requests_per_second"] = len(samples) / elapsed
+    return {f"endpoint_predict_{clients}_clients": stats}
+
+
+def run_all(args):
+    model_path = prepare_model(args.model)
+    results = {}
+    results.update(bench_import(args.process_repeats))
+    results.update(bench_load(model_path, args.process_repeats))
+    results.update(bench_preprocess(args.repeats))
+    results.update(bench_inference(model_path, args.repeats))
+    if not args.skip_endpoint:
+        results.update(bench_endpoint(model_path, args.endpoint_requests, args.clients))
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "model": str(model_path),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, stat="p50"):
+    """Return (name, baseline, current, change) rows and the names that regressed."""
+    rows, regressions = [], []
+    for name, base in baseline["results"].items():
+        if name not in current["results"] or stat not in base:
+            continue
+        before, after = base[stat], current["results"][name][stat]
+        change = (after - before) / before if before else 0.0
+        rows.append((name, before, after, change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks and write JSON results")
+    run_parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    run_parser.add_argument("--model", type=Path, help="Keras model (default: trained model or a generated one)")
+    run_parser.add_argument("--repeats", type=int, default=200, help="Timed calls for in-process benchmarks")
+    run_parser.add_argument("--process-repeats", type=int, default=3, help="Fresh interpreters for import/load timings")
+    run_parser.add_argument("--clients", type=int, default=8, help="Concurrent /predict clients")
+    run_parser.add_argument("--endpoint-requests", type=int, default=50, help="Requests per client")
+    run_parser.add_argument("--skip-endpoint", action="store_true", help="Skip the Flask /predict benchmark")
+
+    # Internal: runs the endpoint benchmark inside the subprocess started by `run`
+    endpoint_parser = commands.add_parser("endpoint")
+    endpoint_parser.add_argument("--clients", type=int, default=8)
+    endpoint_parser.add_argument("--endpoint-requests", type=int, default=50)
+
+    compare_parser = commands.add_parser("compare", help="Flag regressions between two result files")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown (0.10 = 10%%)")
+    compare_parser.add_argument("--stat", default="p50", choices=["p50", "p95", "p99", "mean"])
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run_all(args)
+        args.output.write_text(json.dumps(report, indent=2))
+        for name, stats in report["results"].items():
+            print(f"{name:<40} p50 {stats['p50']:>10.3f} ms   p99 {stats['p99']:>10.3f} ms")
+        print(f"\nResults written to {args.output}")
+        return
+
+    if args.command == "endpoint":
+        print(json.dumps(endpoint_worker(args.endpoint_requests, args.clients)))
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+    rows, regressions = compare(baseline, current, args.threshold, args.stat)
+    for name, before, after, change in rows:
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:<40} {before:>10.3f} -> {after:>10.3f} ms ({change:+.1%}){flag}")
+    if regressions:
+        print(f"\n✗ {len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\n✓ No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,102 @@
-"""Shared utilities for the handwritten digit recognition project."""
-
-from .model import (
-    build_model,
-    ensure_model,
-    load_trained_model,
-    train_model,
-)
-from .paths import DIGITS_DIR, MODEL_PATH, PROJECT_ROOT
-from .predict import predict_digit, predict_preprocessed
-from .preprocess import preprocess_image_array
-
-__all__ = [
-    "build_model",
-    "ensure_model",
-    "load_trained_model",
-    "train_model",
-    "DIGITS_DIR",
-    "MODEL_PATH",
-    "PROJECT_ROOT",
-    "predict_digit",
-    "predict_preprocessed",
-    "preprocess_image_array",
-]
+"""
+Shared utilities for the handwritten digit recognition project.
+
+Public names are resolved lazily on first access so that importing the
+package (or only `paths`, `preprocess` and `predict`) never loads TensorFlow.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .batching import MicroBatcher
+    from .cache import PredictionCache
+    from .cascade import CascadeModel
+    from .live import LiveSessions
+    from .model import (
+        build_model,
+        ensure_model,
+        load_model_version,
+        load_trained_model,
+        train_model,
+        train_model_streaming,
+    )
+    from .numpy_model import NumpyDigitModel, export_numpy_weights
+    from .paths import (
+        DIGITS_DIR,
+        MODEL_PATH,
+        MODEL_VERSIONS_DIR,
+        NUMPY_MODEL_PATH,
+        PROJECT_ROOT,
+    )
+    from .predict import (
+        enable_prediction_cache,
+        get_prediction_cache,
+        predict_batch,
+        predict_digit,
+        predict_preprocessed,
+        predict_preprocessed_batch,
+        set_prediction_cache,
+    )
+    from .preprocess import preprocess_batch, preprocess_fast, preprocess_image_array
+    from .quantize import Int8DigitModel, load_numpy_model, save_quantized
+    from .raster import IncrementalRaster
+    from .serving import ModelWatcher, ServedModel, warm_up
+    from .shared_weights import SharedWeights
+    from .tflite_model import TFLiteDigitModel, export_tflite
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    "MicroBatcher": ".batching",
+    "PredictionCache": ".cache",
+    "CascadeModel": ".cascade",
+    "LiveSessions": ".live",
+    "build_model": ".model",
+    "ensure_model": ".model",
+    "load_model_version": ".model",
+    "load_trained_model": ".model",
+    "train_model": ".model",
+    "train_model_streaming": ".model",
+    "NumpyDigitModel": ".numpy_model",
+    "export_numpy_weights": ".numpy_model",
+    "DIGITS_DIR": ".paths",
+    "MODEL_PATH": ".paths",
+    "MODEL_VERSIONS_DIR": ".paths",
+    "NUMPY_MODEL_PATH": ".paths",
+    "PROJECT_ROOT": ".paths",
+    "enable_prediction_cache": ".predict",
+    "get_prediction_cache": ".predict",
+    "predict_batch": ".predict",
+    "predict_digit": ".predict",
+    "predict_preprocessed": ".predict",
+    "predict_preprocessed_batch": ".predict",
+    "set_prediction_cache": ".predict",
+    "preprocess_batch": ".preprocess",
+    "preprocess_fast": ".preprocess",
+    "preprocess_image_array": ".preprocess",
+    "Int8DigitModel": ".quantize",
+    "load_numpy_model": ".quantize",
+    "save_quantized": ".quantize",
+    "IncrementalRaster": ".raster",
+    "ModelWatcher": ".serving",
+    "ServedModel": ".serving",
+    "warm_up": ".serving",
+    "SharedWeights": ".shared_weights",
+    "TFLiteDigitModel": ".tflite_model",
+    "export_tflite": ".tflite_model",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,252 @@
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .bulk import (
+    DEFAULT_CHUNK_SIZE,
+    IMAGE_EXTENSIONS,
+    ResultWriter,
+    decode_and_preprocess,
+    decode_and_segment,
+    write_chunk,
+)
+
+ARCHIVE_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz", ".zip")
+# Seconds between checks that the shard workers are still alive
+_POLL_INTERVAL = 1.0
+
+
+def is_archive(path) -> bool:
+    return Path(path).name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def expand_archives(patterns):
+    """Yield archive paths from directories (recursively) and glob patterns, in order."""
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            candidates = sorted(path.rglob("*"))
+        else:
+            candidates = sorted(Path(p) for p in glob.glob(pattern, recursive=True))
+        for candidate in candidates:
+            if candidate.is_file() and is_archive(candidate):
+                yield candidate
+
+
+def iter_archive_images(path):
+    """
+    Yield (member name, encoded bytes) for every image in a tar or zip archive.
+
+    Tar archives (compressed or not) are read as a forward-only stream, so
+    nothing is extracted to disk and only one member is in memory at a time.
+    """
+    path = Path(path)
+    if path.name.lower().endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and Path(info.filename).suffix.lower() in IMAGE_EXTENSIONS:
+                    yield info.filename, archive.read(info)
+    else:
+        with tarfile.open(path, "r|*") as archive:
+            for member in archive:
+                if member.isfile() and Path(member.name).suffix.lower() in IMAGE_EXTENSIONS:
+                    yield member.name, archive.extractfile(member).read()
+
+
+class ShardProgress:
+    """
+    Per-shard progress markers: one small JSON file per archive recording
+    how many of its images have been written and whether it is finished.
+
+    A marker is only trusted while the archive's size and modification time
+    are unchanged, so a replaced shard is processed again from the start.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def clear(self):
+        for marker in self.directory.glob("*.json"):
+            marker.unlink()
+
+    def _marker(self, archive: Path) -> Path:
+        digest = hashlib.sha1(str(Path(archive).resolve()).encode()).hexdigest()[:12]
+        return self.directory / f"{Path(archive).name}.{digest}.json"
+
+    @staticmethod
+    def _identity(archive: Path):
+        stat = Path(archive).stat()
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def load(self, archive: Path):
+        """The saved marker for `archive`, or None if there is none or it is stale."""
+        try:
+            marker = json.loads(self._marker(archive).read_text())
+        except (OSError, ValueError):
+            return None
+        if {key: marker.get(key) for key in ("size", "mtime_ns")} != self._identity(archive):
+            return None
+        return marker
+
+    def save(self, archive: Path, members: int, done: bool = False):
+        marker = {"archive": str(archive), **self._identity(archive), "members": members, "done": done}
+        path = self._marker(archive)
+        staged = path.with_name(path.name + ".tmp")
+        staged.write_text(json.dumps(marker))
+        os.replace(staged, path)
+
+
+_results = None
+_stop = None
+
+
+def _init_shard_worker(results, stop):
+    global _results, _stop
+    _results, _stop = results, stop
+    # Workers only exit once the parent has read their last message, except
+    # when it is aborting, where waiting to flush an unread queue would hang
+    _results.cancel_join_thread()
+
+
+def _post(message) -> bool:
+    """Queue a message for the parent, giving up (False) once it asks the workers to stop."""
+    while not _stop.is_set():
+        try:
+            _results.put(message, timeout=_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _read_shard(archive: str, skip: int, chunk_size: int, numbers: bool):
+    """
+    Stream one archive in a worker process, decoding `chunk_size` members at a
+    time and posting each chunk's result to the shared queue. The first
+    `skip` images (already written by an earlier run) are read past without
+    decoding.
+    """
+    decode = decode_and_segment if numbers else decode_and_preprocess
+    chunk = []
+    try:
+        for index, member in enumerate(iter_archive_images(archive)):
+            if index < skip:
+                continue
+            chunk.append(member)
+            if len(chunk) == chunk_size:
+                if not _post(("chunk", archive, len(chunk), decode(chunk))):
+                    return
+                chunk = []
+    except Exception as exc:
+        # Keep what was read before a truncated or corrupt archive gave out
+        if chunk and not _post(("chunk", archive, len(chunk), decode(chunk))):
+            return
+        _post(("failed", archive, 0, f"{type(exc).__name__}: {exc}"))
+        return
+    if chunk and not _post(("chunk", archive, len(chunk), decode(chunk))):
+        return
+    _post(("done", archive, 0, None))
+
+
+def run_archives(model, archives, writer: ResultWriter, progress_dir: Path = None, jobs: int = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, numbers: bool = False, resume: bool = True):
+    """
+    Recognize every image inside `archives` (tar/zip shards) without extracting them.
+
+    Up to `jobs` shards are read in parallel, each by its own worker process,
+    which streams the archive and decodes its members from memory in chunks.
+    Chunks are predicted in one forward pass each as they arrive and written
+    with an `archive` field, `path` being the member name. With
+    `progress_dir`, each shard's marker is updated after every written chunk:
+    finished shards are skipped on the next run and interrupted ones resume
+    after their last written chunk (`resume=False` discards old markers and
+    starts every shard over). At most `2 * jobs` chunks wait in memory.
+    Returns a throughput summary.
+    """
+    start = time.perf_counter()
+    progress = ShardProgress(progress_dir) if progress_dir is not None else None
+    if progress is not None and not resume:
+        progress.clear()
+    jobs = jobs or os.cpu_count() or 1
+    processed = failed = digit_count = skipped = 0
+    shard_errors = {}
+
+    positions = {}
+    for archive in archives:
+        marker = progress.load(archive) if progress is not None else None
+        if marker is not None and marker["done"]:
+            skipped += 1
+            continue
+        positions[str(archive)] = marker["members"] if marker is not None else 0
+
+    # Spawned workers: forking a process that already runs TensorFlow threads can deadlock
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue(maxsize=2 * jobs)
+    stop = context.Event()
+    with ProcessPoolExecutor(
+        max_workers=jobs, mp_context=context, initializer=_init_shard_worker, initargs=(results, stop)
+    ) as executor:
+        futures = {
+            archive: executor.submit(_read_shard, archive, skip, chunk_size, numbers)
+            for archive, skip in positions.items()
+        }
+        open_shards = set(futures)
+        try:
+            while open_shards:
+                try:
+                    kind, archive, members, payload = results.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    # A worker that died outright (not an exception) never reports back
+                    for archive in list(open_shards):
+                        future = futures[archive]
+                        if future.done() and future.exception() is not None:
+                            open_shards.discard(archive)
+                            shard_errors[archive] = str(future.exception())
+                            writer.write_error(None, shard_errors[archive], archive=archive)
+                    continue
+
+                if kind == "chunk":
+                    images, errors, crops = write_chunk(model, writer, payload, numbers, archive=archive)
+                    processed += images
+                    failed += errors
+                    digit_count += crops
+                    positions[archive] += members
+                    if progress is not None:
+                        progress.save(archive, positions[archive])
+                elif kind == "done":
+                    open_shards.discard(archive)
+                    if progress is not None:
+                        progress.save(archive, positions[archive], done=True)
+                else:
+                    open_shards.discard(archive)
+                    shard_errors[archive] = payload
+                    writer.write_error(None, payload, archive=archive)
+                    writer.flush()
+        except BaseException:
+            # Unblock workers waiting on the full queue so the pool can shut down
+            stop.set()
+            executor.shutdown(cancel_futures=True)
+            raise
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "shards": len(positions),
+        "skipped_shards": skipped,
+        "failed_shards": len(shard_errors),
+        "images": processed,
+        "errors": failed,
+        "seconds": elapsed,
+        "images_per_second": processed / elapsed if elapsed else 0.0,
+    }
+    if numbers:
+        summary["digits"] = digit_count
+    return summary
@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from .predict import predict_preprocessed_batch
+
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_WAIT = 0.002
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-image predictions into batched forward passes.
+
+    Callers submit preprocessed images from any thread. A background worker
+    collects them until either `max_batch_size` images are queued or the
+    oldest one has waited `max_wait` seconds, runs one forward pass, and
+    resolves each caller's future with its own row.
+    """
+
+    def __init__(
+        self,
+        model,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait: float = DEFAULT_MAX_WAIT,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self._requests = 0
+        self._batches = 0
+        self._batch_sizes = Counter()
+        self._total_wait = 0.0
+
+        self._worker = threading.Thread(
+            target=self._run, name="micro-batcher", daemon=True
+        )
+        self._worker.start()
+
+    def submit(self, preprocessed) -> Future:
+        """Queue one preprocessed image and return a future for (digit, probabilities)."""
+        image = np.asarray(preprocessed)
+        image = image.reshape(image.shape[-2:])
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._pending.append((image, future, time.monotonic()))
+            self._requests += 1
+            self._cond.notify()
+        return future
+
+    def predict(self, preprocessed, timeout=None):
+        """Blocking drop-in for `predict_preprocessed`."""
+        return self.submit(preprocessed).result(timeout)
+
+    def stats(self):
+        """Return queue depth and batch-size statistics for tuning."""
+        with self._cond:
+            images = sum(size * count for size, count in self._batch_sizes.items())
+            return {
+                "queue_depth": len(self._pending),
+                "requests": self._requests,
+                "batches": self._batches,
+                "mean_batch_size": images / self._batches if self._batches else 0.0,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "mean_queue_wait_ms": (
+                    self._total_wait / images * 1000 if images else 0.0
+                ),
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+            }
+
+    def close(self, timeout=None):
+        """Stop accepting work, drain the queue, and join the worker."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return []
+
+            # Wait for the batch to fill, but never past the oldest request's deadline
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            size = min(len(self._pending), self.max_batch_size)
+            batch = [self._pending.popleft() for _ in range(size)]
+
+            now = time.monotonic()
+            self._batches += 1
+            self._batch_sizes[size] += 1
+            self._total_wait += sum(now - queued_at for _, _, queued_at in batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+
+            futures = [future for _, future, _ in batch]
+            try:
+                stacked = np.stack([image for image, _, _ in batch])
+                digits, probabilities = predict_preprocessed_batch(self.model, stacked)
+            except Exception as exc:
+                for future in futures:
+                    future.set_exception(exc)
+                continue
+
+            for future, digit, probs in zip(futures, digits, probabilities):
+                future.set_result((int(digit), probs))
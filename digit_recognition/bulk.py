@@ -0,0 +1,285 @@
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .predict import predict_preprocessed_batch
+from .preprocess import preprocess_fast, preprocess_image_array
+from .segment import assemble_numbers, segment_digits
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"}
+DEFAULT_CHUNK_SIZE = 256
+
+
+def expand_inputs(patterns):
+    """Yield image paths from directories (recursively) and glob patterns, in order."""
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            candidates = sorted(path.rglob("*"))
+        else:
+            candidates = sorted(Path(p) for p in glob.glob(pattern, recursive=True))
+        for candidate in candidates:
+            if candidate.is_file() and candidate.suffix.lower() in IMAGE_EXTENSIONS:
+                yield candidate
+
+
+def decode_image(data, flags=cv2.IMREAD_COLOR):
+    """Decode an encoded image (PNG, JPEG, ...) from memory, as `cv2.imread` does a file; None if it can't."""
+    if not len(data):
+        return None
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+
+
+def _imread(path, flags):
+    return cv2.imread(str(path), flags)
+
+
+def _preprocess_each(items, decode, fast=False):
+    names, images, errors = [], [], []
+    for name, source in items:
+        try:
+            img_raw = decode(source, cv2.IMREAD_GRAYSCALE if fast else cv2.IMREAD_COLOR)
+            if img_raw is None:
+                raise ValueError(f"Failed to load image {Path(name).name}")
+            if fast:
+                images.append(preprocess_fast(img_raw)[0])
+            else:
+                images.append(preprocess_image_array(img_raw[:, :, 0])[0])
+            names.append(name)
+        except Exception as exc:
+            errors.append((name, str(exc)))
+    return names, _stack(images), errors
+
+
+def _segment_each(items, decode):
+    names, crops, layouts, errors = [], [], [], []
+    for name, source in items:
+        try:
+            img_raw = decode(source, cv2.IMREAD_GRAYSCALE)
+            if img_raw is None:
+                raise ValueError(f"Failed to load image {Path(name).name}")
+            batch, layout = segment_digits(img_raw)
+            crops.append(batch)
+            layouts.append(layout)
+            names.append(name)
+        except Exception as exc:
+            errors.append((name, str(exc)))
+    batch = np.concatenate(crops) if crops else np.empty((0, 28, 28), dtype="float32")
+    return names, batch, layouts, errors
+
+
+def load_and_preprocess(paths):
+    """
+    Decode and preprocess a chunk of image files (runs in worker processes).
+
+    Returns the names and an (N, 28, 28) batch for the images that loaded,
+    plus (name, error) pairs for those that did not.
+    """
+    return _preprocess_each(((str(path), path) for path in paths), _imread)
+
+
+def load_and_preprocess_fast(paths):
+    """
+    `load_and_preprocess` with the serving preprocessing: grayscale decode and
+    `preprocess_fast`, so images saved from the app come out as `/predict` saw them.
+    """
+    return _preprocess_each(((str(path), path) for path in paths), _imread, fast=True)
+
+
+def load_and_segment(paths):
+    """
+    Decode a chunk of scans and split each into digit crops (runs in worker processes).
+
+    Returns the names, every crop of the chunk as one (M, 28, 28) batch, one
+    `segment_digits` layout per loaded image, and (name, error) pairs.
+    """
+    return _segment_each(((str(path), path) for path in paths), _imread)
+
+
+def decode_and_preprocess(members):
+    """`load_and_preprocess` for in-memory (name, encoded bytes) pairs such as archive members."""
+    return _preprocess_each(members, decode_image)
+
+
+def decode_and_segment(members):
+    """`load_and_segment` for in-memory (name, encoded bytes) pairs such as archive members."""
+    return _segment_each(members, decode_image)
+
+
+def _stack(images):
+    if not images:
+        return np.empty((0, 28, 28), dtype="float32")
+    return np.stack(images)
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ResultWriter:
+    """Stream prediction rows to a JSONL or CSV file as they are produced."""
+
+    FIELDS = ("path", "digit", "confidence", "error")
+    NUMBER_FIELDS = ("path", "text", "confidence", "error")
+
+    def __init__(self, stream, fmt: str = "jsonl", numbers: bool = False, archives: bool = False,
+                 header: bool = True):
+        """
+        With `archives`, rows also carry the `archive` they came from and
+        `path` is the member name inside it. Pass `header=False` when
+        appending to an existing CSV.
+        """
+        if fmt not in ("jsonl", "csv"):
+            raise ValueError(f"Unknown output format {fmt!r}; expected 'jsonl' or 'csv'")
+        self.stream = stream
+        self.fmt = fmt
+        self._csv = None
+        if fmt == "csv":
+            fields = self.NUMBER_FIELDS + ("numbers",) if numbers else self.FIELDS + ("probabilities",)
+            if archives:
+                fields = ("archive",) + fields
+            self._csv = csv.DictWriter(stream, fieldnames=fields)
+            if header:
+                self._csv.writeheader()
+
+    def write_prediction(self, name, digit, probabilities, **extra):
+        row = {
+            "path": name,
+            "digit": int(digit),
+            "confidence": float(probabilities[digit]),
+            "probabilities": [round(float(p), 6) for p in probabilities],
+            **extra,
+        }
+        self._write(row)
+
+    def write_numbers(self, name, result, **extra):
+        """One row per image for multi-digit recognition; confidence is the least confident digit."""
+        confidences = [number["confidence"] for number in result["numbers"]]
+        row = {
+            "path": name,
+            "text": result["text"],
+            "confidence": min(confidences) if confidences else None,
+            "numbers": result["numbers"],
+            **extra,
+        }
+        self._write(row)
+
+    def write_error(self, name, error, **extra):
+        self._write({"path": name, "error": error, **extra})
+
+    def flush(self):
+        self.stream.flush()
+
+    def _write(self, row):
+        if self._csv is not None:
+            if "probabilities" in row:
+                row = {**row, "probabilities": " ".join(map(str, row["probabilities"]))}
+            if "numbers" in row:
+                row = {**row, "numbers": json.dumps(row["numbers"])}
+            self._csv.writerow(row)
+        else:
+            self.stream.write(json.dumps(row) + "\n")
+
+
+def iter_preprocessed(paths, jobs: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE, worker=load_and_preprocess):
+    """
+    Decode/preprocess `paths` in a process pool, yielding `worker`'s result
+    per chunk: (names, batch, errors) for the default `load_and_preprocess`.
+
+    Chunks come back in input order and at most `2 * jobs` are in flight, so
+    memory stays bounded no matter how many paths are given.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    max_in_flight = 2 * jobs
+
+    # Spawned workers: forking a process that already runs TensorFlow threads can deadlock
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as executor:
+        pending = deque()
+        chunks = _chunks(paths, chunk_size)
+
+        def fill():
+            while len(pending) < max_in_flight:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                pending.append(executor.submit(worker, chunk))
+
+        fill()
+        while pending:
+            result = pending.popleft().result()
+            fill()
+            yield result
+
+
+def write_chunk(model, writer: ResultWriter, result, numbers: bool = False, **extra):
+    """
+    Predict one worker result in a single forward pass and write its rows
+    (with `extra` fields on each). Returns (images, errors, digit crops).
+    """
+    if numbers:
+        names, batch, layouts, errors = result
+        digits, probabilities = predict_preprocessed_batch(model, batch)
+        position = 0
+        for name, layout in zip(names, layouts):
+            end = position + sum(len(entry["boxes"]) for entry in layout)
+            writer.write_numbers(name, assemble_numbers(layout, digits[position:end], probabilities[position:end]), **extra)
+            position = end
+    else:
+        names, batch, errors = result
+        digits, probabilities = predict_preprocessed_batch(model, batch)
+        for name, digit, probs in zip(names, digits, probabilities):
+            writer.write_prediction(name, digit, probs, **extra)
+    for name, error in errors:
+        writer.write_error(name, error, **extra)
+    writer.flush()
+    return len(names), len(errors), len(batch)
+
+
+def run_bulk(model, paths, writer: ResultWriter, jobs: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+             numbers: bool = False):
+    """
+    Decode/preprocess `paths` in a process pool and predict them in batches.
+
+    With `numbers`, every image is segmented into digits in the workers and
+    all the crops of a chunk are classified in one forward pass, writing the
+    numbers read from each image. Results are written in input order as each
+    chunk finishes, with memory bounded by `iter_preprocessed`. Returns a
+    throughput summary.
+    """
+    start = time.perf_counter()
+    processed = failed = digit_count = 0
+
+    worker = load_and_segment if numbers else load_and_preprocess
+    for result in iter_preprocessed(paths, jobs, chunk_size, worker):
+        images, errors, crops = write_chunk(model, writer, result, numbers)
+        processed += images
+        failed += errors
+        digit_count += crops
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "images": processed,
+        "errors": failed,
+        "seconds": elapsed,
+        "images_per_second": processed / elapsed if elapsed else 0.0,
+    }
+    if numbers:
+        summary["digits"] = digit_count
+    return summary
@@ -0,0 +1,95 @@
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = 1024
+
+
+def array_key(preprocessed) -> bytes:
+    """Fast digest of a preprocessed image, quantized to 8 bits per pixel."""
+    arr = np.asarray(preprocessed, dtype="float32")
+    quantized = np.rint(np.clip(arr, 0.0, 1.0) * 255).astype(np.uint8)
+    digest = hashlib.blake2b(quantized.tobytes(), digest_size=16)
+    digest.update(str(quantized.shape).encode())
+    return digest.digest()
+
+
+class PredictionCache:
+    """
+    Thread-safe, bounded LRU cache of (digit, probabilities) results.
+
+    Entries are keyed on `array_key` of the preprocessed input plus the
+    generation of the model that produced them. Passing a different model
+    object (e.g. after a reload) starts a new generation and drops every
+    entry, so stale predictions are never served.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_ref = None
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, model, preprocessed, compute):
+        """Return the cached result for `preprocessed`, or call `compute(preprocessed)`."""
+        key = array_key(preprocessed)
+        with self._lock:
+            generation = self._sync_model(model)
+            entry = self._entries.get((generation, key))
+            if entry is not None:
+                self._entries.move_to_end((generation, key))
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        digit, probabilities = compute(preprocessed)
+        probabilities = np.array(probabilities)
+        probabilities.setflags(write=False)
+        entry = (int(digit), probabilities)
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[(generation, key)] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "generation": self._generation,
+            }
+
+    def _sync_model(self, model):
+        # Called with the lock held
+        current = self._model_ref() if self._model_ref is not None else None
+        if current is not model:
+            self._entries.clear()
+            self._generation += 1
+            try:
+                self._model_ref = weakref.ref(model)
+            except TypeError:
+                self._model_ref = lambda: model
+        return self._generation
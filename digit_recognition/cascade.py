@@ -0,0 +1,181 @@
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from .data import to_serving_scale
+from .numpy_model import NumpyDigitModel
+from .paths import CASCADE_MODEL_PATH
+from .quantize import load_numpy_model
+
+NUM_CLASSES = 10
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_MARGIN = 0.0
+# Largest accuracy loss against the full model that calibration may accept
+DEFAULT_MAX_ACCURACY_DROP = 0.001
+DEFAULT_FIT_BATCH_SIZE = 4096
+
+
+def _as_inputs(batch):
+    batch = np.asarray(batch)
+    return to_serving_scale(batch) if batch.dtype == np.uint8 else batch.astype("float32")
+
+
+def fit_nearest_centroid(x, y, calibration_size: int = 10000, batch_size: int = DEFAULT_FIT_BATCH_SIZE):
+    """
+    Nearest-centroid classifier over the flattened 28x28 input, as a NumpyDigitModel.
+
+    Class means are accumulated in batches, so `x` can be a memory map. Raw
+    uint8 MNIST is scaled per batch with `to_serving_scale`, so the centroids
+    match the inputs the app serves. The softmax over -||x - c||^2 / T is a
+    single dense layer (the ||x||^2 term is the same for every class and
+    cancels), with the temperature T picked to minimise log loss on the first
+    `calibration_size` images.
+    """
+    sums = np.zeros((NUM_CLASSES, 28 * 28))
+    counts = np.zeros(NUM_CLASSES)
+    for i in range(0, len(x), batch_size):
+        batch = _as_inputs(x[i:i + batch_size]).reshape(-1, 28 * 28)
+        one_hot = np.eye(NUM_CLASSES)[np.asarray(y[i:i + batch_size])]
+        sums += one_hot.T @ batch
+        counts += one_hot.sum(axis=0)
+    centroids = (sums / np.maximum(counts, 1)[:, None]).astype("float32")
+    kernel, bias = 2 * centroids.T, -np.sum(centroids ** 2, axis=1)
+
+    sample = _as_inputs(x[:calibration_size]).reshape(-1, 28 * 28)
+    labels = np.asarray(y[:calibration_size])
+    logits = sample @ kernel + bias
+
+    def log_loss(temperature):
+        scaled = logits / temperature
+        scaled -= scaled.max(axis=1, keepdims=True)
+        log_probs = scaled - np.log(np.exp(scaled).sum(axis=1, keepdims=True))
+        return -log_probs[np.arange(len(labels)), labels].mean()
+
+    temperature = min(np.geomspace(0.5, 200, 60), key=log_loss)
+    return NumpyDigitModel([kernel / temperature], [bias / temperature], ["softmax"])
+
+
+def escalation_mask(probabilities, threshold: float = DEFAULT_THRESHOLD, margin: float = DEFAULT_MARGIN):
+    """True where the top-class probability is below `threshold` or the top-2 gap below `margin`."""
+    top_two = np.partition(probabilities, -2, axis=1)[:, -2:]
+    return (top_two[:, 1] < threshold) | (top_two[:, 1] - top_two[:, 0] < margin)
+
+
+class CascadeModel:
+    """
+    Confidence-gated two-stage model.
+
+    Every batch goes through the cheap `fast` model first; only the images
+    it is unsure about (see `escalation_mask`) are sent, as one batch, to the
+    `full` model. Exposes the Keras `predict` interface, so it can be passed
+    anywhere a model is expected.
+    """
+
+    def __init__(self, fast, full, threshold: float = DEFAULT_THRESHOLD, margin: float = DEFAULT_MARGIN):
+        self.fast = fast
+        self.full = full
+        self.threshold = float(threshold)
+        self.margin = float(margin)
+        self._lock = threading.Lock()
+        self.images = 0
+        self.escalated = 0
+
+    @classmethod
+    def load(cls, full, path: Path = CASCADE_MODEL_PATH) -> "CascadeModel":
+        """Wrap `full` with the first stage and thresholds written by `save_cascade`."""
+        path = Path(path)
+        fast = load_numpy_model(path)
+        with np.load(path) as data:
+            threshold = float(data["cascade_threshold"])
+            margin = float(data["cascade_margin"])
+        return cls(fast, full, threshold, margin)
+
+    def predict(self, x, batch_size=None, verbose=0):
+        """Return class probabilities of shape (N, 10), from whichever stage decided."""
+        x = np.asarray(x, dtype="float32")
+        probabilities = np.array(self.fast.predict(x, verbose=0), dtype="float32")
+        escalate = escalation_mask(probabilities, self.threshold, self.margin)
+        count = int(np.count_nonzero(escalate))
+        if count:
+            probabilities[escalate] = np.asarray(self.full.predict(x[escalate], verbose=0))
+        with self._lock:
+            self.images += len(x)
+            self.escalated += count
+        return probabilities
+
+    def __call__(self, x):
+        return self.predict(x)
+
+    def reset_stats(self):
+        with self._lock:
+            self.images = self.escalated = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "margin": self.margin,
+                "images": self.images,
+                "escalated": self.escalated,
+                "escalation_rate": self.escalated / self.images if self.images else 0.0,
+            }
+
+
+def save_cascade(fast: NumpyDigitModel, threshold: float, margin: float = DEFAULT_MARGIN,
+                 path: Path = CASCADE_MODEL_PATH) -> Path:
+    """Write the first-stage weights together with the gating thresholds."""
+    path = fast.save(path)
+    with np.load(path) as data:
+        arrays = dict(data)
+    np.savez(path, cascade_threshold=np.float32(threshold), cascade_margin=np.float32(margin), **arrays)
+    return path
+
+
+def cascade_report(fast_probabilities, full_probabilities, labels,
+                   threshold: float = DEFAULT_THRESHOLD, margin: float = DEFAULT_MARGIN):
+    """Escalation rate and accuracy of the cascade against each stage on its own."""
+    labels = np.asarray(labels)
+    escalate = escalation_mask(fast_probabilities, threshold, margin)
+    fast_correct = fast_probabilities.argmax(axis=1) == labels
+    full_correct = full_probabilities.argmax(axis=1) == labels
+    cascade_correct = np.where(escalate, full_correct, fast_correct)
+    return {
+        "threshold": float(threshold),
+        "margin": float(margin),
+        "images": len(labels),
+        "escalation_rate": float(escalate.mean()),
+        "fast_accuracy": float(fast_correct.mean()),
+        "full_accuracy": float(full_correct.mean()),
+        "cascade_accuracy": float(cascade_correct.mean()),
+        "accuracy_delta": float(cascade_correct.mean() - full_correct.mean()),
+        # Accuracy of the first stage on the images it kept
+        "kept_accuracy": float(fast_correct[~escalate].mean()) if (~escalate).any() else 0.0,
+    }
+
+
+def calibrate_threshold(fast_probabilities, full_probabilities, labels,
+                        max_accuracy_drop: float = DEFAULT_MAX_ACCURACY_DROP, margin: float = DEFAULT_MARGIN):
+    """
+    The lowest confidence threshold (fewest escalations) whose cascade accuracy
+    is within `max_accuracy_drop` of the full model's. Returns its report.
+    """
+    labels = np.asarray(labels)
+    fast_correct = (fast_probabilities.argmax(axis=1) == labels).astype(np.int64)
+    full_correct = (full_probabilities.argmax(axis=1) == labels).astype(np.int64)
+    forced = escalation_mask(fast_probabilities, 0.0, margin)
+
+    # Escalating images in order of increasing confidence: correct[k] is the
+    # number right when the k least confident ones go to the full model
+    confidence = fast_probabilities.max(axis=1)
+    order = np.argsort(confidence, kind="stable")
+    gain = np.where(forced, 0, full_correct - fast_correct)[order]
+    correct = np.where(forced, full_correct, fast_correct).sum() + np.concatenate([[0], np.cumsum(gain)])
+
+    ranked = confidence[order]
+    thresholds = np.concatenate([ranked, [np.nextafter(np.float32(1.0), np.float32(2.0))]])
+    # A threshold can only split the ranking between two different confidences
+    reachable = np.concatenate([[True], ranked[1:] != ranked[:-1], [True]])
+    target = full_correct.sum() - max_accuracy_drop * len(labels)
+    k = int(np.flatnonzero(reachable & (correct >= target - 1e-9))[0])
+    return cascade_report(fast_probabilities, full_probabilities, labels, float(thresholds[k]), margin)
@@ -1,11 +1,189 @@
-import tensorflow as tf
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
 
+import numpy as np
 
-def load_mnist_data(normalize: bool = True):
-    """Load MNIST dataset with optional normalization."""
-    mnist = tf.keras.datasets.mnist
-    (x_train, y_train), (x_test, y_test) = mnist.load_data()
-    if normalize:
-        x_train = tf.keras.utils.normalize(x_train, axis=1)
-        x_test = tf.keras.utils.normalize(x_test, axis=1)
-    return (x_train, y_train), (x_test, y_test)
+from .paths import DATA_CACHE_DIR, MNIST_DIR
+from .preprocess import preprocess_fast
+
+CACHE_VERSION = 1
+MNIST_URL = "https://storage.googleapis.com/tensorflow/tf-keras-datasets/mnist.npz"
+SPLITS = ("x_train", "y_train", "x_test", "y_test")
+IDX_FILES = {
+    "x_train": "train-images-idx3-ubyte",
+    "y_train": "train-labels-idx1-ubyte",
+    "x_test": "t10k-images-idx3-ubyte",
+    "y_test": "t10k-labels-idx1-ubyte",
+}
+
+
+def normalize_images(x, axis: int = 1):
+    """NumPy equivalent of `tf.keras.utils.normalize` (L2 norm), as float32."""
+    x = np.asarray(x, dtype="float32")
+    norm = np.atleast_1d(np.linalg.norm(x, 2, axis))
+    norm[norm == 0] = 1
+    return x / np.expand_dims(norm, axis)
+
+
+def to_serving_scale(images):
+    """
+    Raw MNIST images (`normalize=False`: uint8, light ink on black) as float32
+    scaled exactly as `preprocess_fast` scales the images the app serves, for
+    calibrating or checking a model on what it sees in production.
+    """
+    return preprocess_fast(np.asarray(images), invert=False)
+
+
+def load_mnist_data(
+    normalize: bool = True,
+    mmap: bool = True,
+    mnist_dir: Path = MNIST_DIR,
+    cache_dir: Path = DATA_CACHE_DIR,
+):
+    """
+    Load MNIST dataset with optional normalization.
+
+    Arrays come from an on-disk `.npy` cache keyed by the normalization
+    settings and opened with `mmap_mode="r"`, so repeated runs skip the
+    normalization and concurrent processes share pages. The cache is rebuilt
+    when the source data's checksum changes. The source is `mnist.npz` or the
+    IDX files in `mnist_dir`, falling back to a download when neither exists.
+    """
+    key, settings = _cache_key(normalize)
+    cache = Path(cache_dir) / f"mnist-{key}"
+    sources = find_mnist_source(mnist_dir)
+    if not _cache_is_valid(cache, sources):
+        if sources is None:
+            sources = [_download_mnist()]
+        _build_cache(cache, sources, normalize, settings)
+
+    mmap_mode = "r" if mmap else None
+    arrays = {name: np.load(cache / f"{name}.npy", mmap_mode=mmap_mode) for name in SPLITS}
+    return (arrays["x_train"], arrays["y_train"]), (arrays["x_test"], arrays["y_test"])
+
+
+def find_mnist_source(directory: Path = MNIST_DIR):
+    """Return the local MNIST files in `directory` (one `.npz` or four IDX files), or None."""
+    directory = Path(directory)
+    npz = directory / "mnist.npz"
+    if npz.is_file():
+        return [npz]
+    idx_files = [_find_idx_file(directory, stem) for stem in IDX_FILES.values()]
+    if all(idx_files):
+        return idx_files
+    return None
+
+
+def read_mnist_source(files):
+    """Read raw uint8 MNIST splits from the files returned by `find_mnist_source`."""
+    if len(files) == 1:
+        with np.load(files[0]) as data:
+            return {name: data[name] for name in SPLITS}
+    return {name: _read_idx(path) for name, path in zip(SPLITS, files)}
+
+
+def _find_idx_file(directory: Path, stem: str):
+    # Some mirrors name the files "train-images.idx3-ubyte"
+    for name in (stem, f"{stem}.gz", stem.replace("-idx", ".idx")):
+        path = directory / name
+        if path.is_file():
+            return path
+    return None
+
+
+def _read_idx(path: Path):
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rb") as f:
+        data = f.read()
+    ndim = data[3]
+    dims = [int.from_bytes(data[4 + 4 * i:8 + 4 * i], "big") for i in range(ndim)]
+    return np.frombuffer(data, dtype=np.uint8, offset=4 + 4 * ndim).reshape(dims)
+
+
+def _download_mnist() -> Path:
+    import tensorflow as tf
+
+    return Path(tf.keras.utils.get_file("mnist.npz", MNIST_URL))
+
+
+def _cache_key(normalize: bool):
+    settings = {
+        "version": CACHE_VERSION,
+        "normalize": "l2-axis1" if normalize else None,
+        "dtype": "float32" if normalize else "uint8",
+    }
+    digest = hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+    return digest[:16], settings
+
+
+def _source_stats(files):
+    return [[str(path), path.stat().st_size, path.stat().st_mtime_ns] for path in files]
+
+
+def _source_checksum(files) -> str:
+    digest = hashlib.sha256()
+    for path in files:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_is_valid(cache: Path, sources) -> bool:
+    manifest_path = cache / "manifest.json"
+    if not manifest_path.is_file():
+        return False
+    if not all((cache / f"{name}.npy").is_file() for name in SPLITS):
+        return False
+    if sources is None:
+        return True  # Offline with no source files: trust the existing cache
+
+    manifest = json.loads(manifest_path.read_text())
+    if manifest.get("source_stats") == _source_stats(sources):
+        return True
+    # Files were touched or moved; only the content checksum decides
+    if manifest.get("source_sha256") != _source_checksum(sources):
+        return False
+    manifest["source_stats"] = _source_stats(sources)
+    _write_atomically(manifest_path, lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+    return True
+
+
+def _write_atomically(path: Path, write):
+    """
+    Call `write(file)` on a uniquely named temp file next to `path`, then
+    rename it into place, so concurrent builders never share a temp file and
+    readers only ever see a complete file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def _build_cache(cache: Path, sources, normalize: bool, settings):
+    cache.mkdir(parents=True, exist_ok=True)
+    # An interrupted rebuild must not leave a manifest vouching for mixed arrays
+    (cache / "manifest.json").unlink(missing_ok=True)
+    raw = read_mnist_source(sources)
+    for name in SPLITS:
+        array = raw[name]
+        if normalize and name.startswith("x_"):
+            array = normalize_images(array, axis=1)
+        _write_atomically(cache / f"{name}.npy", lambda f: np.save(f, np.ascontiguousarray(array)))
+
+    manifest = {
+        "settings": settings,
+        "source_stats": _source_stats(sources),
+        "source_sha256": _source_checksum(sources),
+        "shapes": {name: list(raw[name].shape) for name in SPLITS},
+    }
+    _write_atomically(cache / "manifest.json", lambda f: f.write(json.dumps(manifest, indent=2).encode()))
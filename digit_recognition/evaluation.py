@@ -0,0 +1,200 @@
+import csv
+import json
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .bulk import DEFAULT_CHUNK_SIZE, expand_inputs, iter_preprocessed
+from .data import load_mnist_data, to_serving_scale
+from .predict import predict_preprocessed_batch
+
+NUM_CLASSES = 10
+DEFAULT_CALIBRATION_BINS = 10
+DEFAULT_BATCH_SIZE = 256
+MNIST_SCALES = ("serving", "normalized")
+DEFAULT_MNIST_SCALE = "serving"
+
+# "3_anything.png", "3-07.jpg" or "3.png": the leading digit is the label
+_FILENAME_LABEL = re.compile(r"(\d)(?:[_\-.]|$)")
+
+
+class Evaluator:
+    """
+    Accumulates a confusion matrix and calibration bins batch by batch, so
+    arbitrarily large datasets can be scored in constant memory.
+    """
+
+    def __init__(self, bins: int = DEFAULT_CALIBRATION_BINS):
+        self.confusion = np.zeros((NUM_CLASSES, NUM_CLASSES), dtype=np.int64)
+        self.bins = bins
+        self._bin_count = np.zeros(bins, dtype=np.int64)
+        self._bin_confidence = np.zeros(bins)
+        self._bin_correct = np.zeros(bins, dtype=np.int64)
+        self.errors = 0
+
+    def update(self, labels, probabilities):
+        labels = np.asarray(labels, dtype=np.int64)
+        probabilities = np.asarray(probabilities)
+        predicted = probabilities.argmax(axis=1)
+        confidence = probabilities.max(axis=1)
+        np.add.at(self.confusion, (labels, predicted), 1)
+
+        index = np.minimum((confidence * self.bins).astype(np.int64), self.bins - 1)
+        self._bin_count += np.bincount(index, minlength=self.bins)
+        self._bin_confidence += np.bincount(index, weights=confidence, minlength=self.bins)
+        self._bin_correct += np.bincount(index, weights=predicted == labels, minlength=self.bins).astype(np.int64)
+
+    @property
+    def images(self) -> int:
+        return int(self.confusion.sum())
+
+    def report(self, seconds: float = None, inference_seconds: float = None):
+        """Accuracy, confusion matrix, per-class precision/recall, calibration and throughput."""
+        total = self.images
+        correct = int(np.trace(self.confusion))
+        predicted_counts = self.confusion.sum(axis=0)
+        true_counts = self.confusion.sum(axis=1)
+
+        per_class = {}
+        for digit in range(NUM_CLASSES):
+            hits = int(self.confusion[digit, digit])
+            precision = hits / predicted_counts[digit] if predicted_counts[digit] else 0.0
+            recall = hits / true_counts[digit] if true_counts[digit] else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            per_class[str(digit)] = {
+                "precision": float(precision),
+                "recall": float(recall),
+                "f1": float(f1),
+                "support": int(true_counts[digit]),
+            }
+
+        bins = []
+        expected_calibration_error = 0.0
+        for i in range(self.bins):
+            count = int(self._bin_count[i])
+            mean_confidence = self._bin_confidence[i] / count if count else 0.0
+            bin_accuracy = self._bin_correct[i] / count if count else 0.0
+            if total:
+                expected_calibration_error += count / total * abs(bin_accuracy - mean_confidence)
+            bins.append({
+                "lower": i / self.bins,
+                "upper": (i + 1) / self.bins,
+                "count": count,
+                "mean_confidence": float(mean_confidence),
+                "accuracy": float(bin_accuracy),
+            })
+
+        report = {
+            "images": total,
+            "errors": self.errors,
+            "accuracy": correct / total if total else 0.0,
+            "confusion_matrix": self.confusion.tolist(),
+            "per_class": per_class,
+            "calibration": {
+                "expected_calibration_error": float(expected_calibration_error),
+                "mean_confidence": float(self._bin_confidence.sum() / total) if total else 0.0,
+                "bins": bins,
+            },
+        }
+        if seconds is not None:
+            report["seconds"] = seconds
+            report["images_per_second"] = total / seconds if seconds else 0.0
+        if inference_seconds is not None:
+            report["inference_seconds"] = inference_seconds
+            report["inference_images_per_second"] = total / inference_seconds if inference_seconds else 0.0
+        return report
+
+
+def evaluate_batches(model, batches, bins: int = DEFAULT_CALIBRATION_BINS, evaluator: Evaluator = None):
+    """Score an iterable of (images, labels) batches; returns `Evaluator.report()`."""
+    evaluator = evaluator or Evaluator(bins)
+    inference_seconds = 0.0
+    start = time.perf_counter()
+    for images, labels in batches:
+        if not len(images):
+            continue
+        predict_start = time.perf_counter()
+        _, probabilities = predict_preprocessed_batch(model, images)
+        inference_seconds += time.perf_counter() - predict_start
+        evaluator.update(labels, probabilities)
+    return evaluator.report(time.perf_counter() - start, inference_seconds)
+
+
+def mnist_test_batches(batch_size: int = DEFAULT_BATCH_SIZE, limit: int = None, scale: str = DEFAULT_MNIST_SCALE):
+    """
+    Stream the (memory-mapped) MNIST test split in batches.
+
+    With `scale="serving"` the raw images are scaled as the app scales what it
+    serves (`to_serving_scale`); `"normalized"` gives the L2-normalized arrays
+    used for training, which served images never look like.
+    """
+    if scale not in MNIST_SCALES:
+        raise ValueError(f"Unknown MNIST scale {scale!r}; expected one of {MNIST_SCALES}")
+    _, (x_test, y_test) = load_mnist_data(normalize=scale == "normalized")
+    end = len(x_test) if limit is None else min(limit, len(x_test))
+    for i in range(0, end, batch_size):
+        stop = min(i + batch_size, end)
+        images = to_serving_scale(x_test[i:stop]) if scale == "serving" else np.asarray(x_test[i:stop], dtype=np.float32)
+        yield images, np.asarray(y_test[i:stop])
+
+
+def label_from_path(path: Path):
+    """Label from a single-digit parent directory (`7/a.png`) or filename prefix (`7_a.png`), else None."""
+    path = Path(path)
+    if len(path.parent.name) == 1 and path.parent.name.isdigit():
+        return int(path.parent.name)
+    match = _FILENAME_LABEL.match(path.stem + path.suffix)
+    return int(match.group(1)) if match else None
+
+
+def read_manifest(path: Path):
+    """
+    Labels from a manifest: a CSV with `path` and `label` columns or a JSON
+    object mapping paths to labels. Paths are relative to the manifest.
+    """
+    path = Path(path)
+    if path.suffix == ".json":
+        entries = json.loads(path.read_text()).items()
+    else:
+        with open(path, newline="") as handle:
+            entries = [(row["path"], row["label"]) for row in csv.DictReader(handle)]
+    return {(path.parent / name).resolve(): int(label) for name, label in entries}
+
+
+def labelled_images(inputs, manifest: Path = None):
+    """
+    Return (path -> label, unlabelled count) for the images under `inputs`.
+
+    Labels come from `manifest` when given (only its images are used),
+    otherwise from the directory or filename.
+    """
+    labels, unlabelled = {}, 0
+    manifest_labels = read_manifest(manifest) if manifest else None
+    for path in expand_inputs(inputs):
+        if manifest_labels is not None:
+            label = manifest_labels.get(path.resolve())
+        else:
+            label = label_from_path(path)
+        if label is None or not 0 <= label < NUM_CLASSES:
+            unlabelled += 1
+            continue
+        labels[str(path)] = label
+    return labels, unlabelled
+
+
+def evaluate_images(model, inputs, manifest: Path = None, jobs: int = None,
+                    batch_size: int = DEFAULT_CHUNK_SIZE, bins: int = DEFAULT_CALIBRATION_BINS):
+    """Evaluate labelled image files, decoding them in a process pool with bounded memory."""
+    labels, unlabelled = labelled_images(inputs, manifest)
+    evaluator = Evaluator(bins)
+
+    def batches():
+        for names, batch, errors in iter_preprocessed(list(labels), jobs, batch_size):
+            evaluator.errors += len(errors)
+            yield batch, [labels[name] for name in names]
+
+    report = evaluate_batches(model, batches(), bins, evaluator) if labels else evaluator.report()
+    report["unlabelled"] = unlabelled
+    return report
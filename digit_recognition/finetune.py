@@ -0,0 +1,178 @@
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .bulk import iter_preprocessed, load_and_preprocess_fast
+from .data import load_mnist_data, to_serving_scale
+from .evaluation import labelled_images
+from .serving import list_versions
+
+DEFAULT_REPLAY_RATIO = 10
+DEFAULT_MIN_REPLAY = 1000
+DEFAULT_EPOCHS = 3
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_LEARNING_RATE = 1e-4
+DEFAULT_HOLDOUT_FRACTION = 0.2
+# MNIST test images used to check the update doesn't forget the original task
+DEFAULT_MNIST_HOLDOUT = 10000
+
+
+def load_labelled_samples(inputs, manifest: Path = None, jobs: int = None):
+    """
+    Preprocess labelled image files (labels as for `evaluation.labelled_images`)
+    into in-memory (x, y) arrays, plus the number of unlabelled and unreadable files.
+    They go through `preprocess_fast` like served images, so a correction is
+    learned from exactly the input the model got wrong.
+    """
+    labels, unlabelled = labelled_images(inputs, manifest)
+    images, targets, failed = [], [], 0
+    for names, batch, errors in iter_preprocessed(list(labels), jobs, worker=load_and_preprocess_fast):
+        images.append(batch)
+        targets.extend(labels[name] for name in names)
+        failed += len(errors)
+    x = np.concatenate(images) if images else np.empty((0, 28, 28), dtype="float32")
+    return x, np.asarray(targets, dtype="int64"), unlabelled, failed
+
+
+def replay_sample(size: int, seed=None):
+    """
+    A random sample of the memory-mapped MNIST training split, scaled like
+    served images (and the new samples) rather than L2-normalized.
+
+    Indices are sorted before reading so the gather walks the map in order,
+    and only the sampled rows are ever paged in.
+    """
+    (x_train, y_train), _ = load_mnist_data(normalize=False)
+    rng = np.random.default_rng(seed)
+    indices = np.sort(rng.choice(len(x_train), size=min(size, len(x_train)), replace=False))
+    return to_serving_scale(x_train[indices]), np.asarray(y_train[indices], dtype="int64")
+
+
+def next_version_path(directory: Path) -> Path:
+    """`vN.keras` one past the highest `vN` already in `directory` (v1 when there is none)."""
+    numbers = [
+        int(match.group(1))
+        for match in (re.fullmatch(r"v(\d+)", path.stem) for path in list_versions(directory, settle=0))
+        if match
+    ]
+    return Path(directory) / f"v{max(numbers, default=0) + 1}.keras"
+
+
+def save_atomically(model, path: Path) -> Path:
+    """Save a Keras model so a directory watcher never sees a partly written file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=path.parent, prefix=".incoming-") as staging:
+        staged = Path(staging) / path.name
+        model.save(staged)
+        os.replace(staged, path)
+    return path
+
+
+def load_trainable_model(path: Path):
+    """The model at `path` as a Keras model that can be trained (`.keras`, or `.npz` rebuilt via `prune.to_keras`)."""
+    from .model import load_trained_model
+    from .prune import to_keras
+    from .quantize import load_numpy_model
+
+    path = Path(path)
+    if path.suffix == ".npz":
+        return to_keras(load_numpy_model(path))
+    if path.suffix != ".keras":
+        raise ValueError(f"Can only fine-tune .keras or .npz models, not {path.name}")
+    return load_trained_model(path)
+
+
+def _accuracy(model, x, y):
+    if not len(y):
+        return None
+    probabilities = np.asarray(model.predict(x, batch_size=1024, verbose=0))
+    return float(np.mean(probabilities.argmax(axis=1) == y))
+
+
+def fine_tune_incremental(
+    model,
+    x_new,
+    y_new,
+    replay_ratio: int = DEFAULT_REPLAY_RATIO,
+    min_replay: int = DEFAULT_MIN_REPLAY,
+    epochs: int = DEFAULT_EPOCHS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    learning_rate: float = DEFAULT_LEARNING_RATE,
+    holdout_fraction: float = DEFAULT_HOLDOUT_FRACTION,
+    mnist_holdout: int = DEFAULT_MNIST_HOLDOUT,
+    tolerance: float = 0.0,
+    seed=None,
+    verbose: int = 0,
+):
+    """
+    Fine-tune `model` in place on new labelled samples mixed with MNIST replay.
+
+    A shuffled `holdout_fraction` of the new samples is kept back. Before and
+    after training, accuracy is measured on that holdout and on `mnist_holdout`
+    MNIST test images (scaled like served images); the update is accepted only
+    if neither drops by more than `tolerance`. With fewer than 5 new samples
+    there is no holdout, so an accepted update is reported as not `verified`
+    on the new samples. Each epoch sees every remaining new sample once alongside
+    `replay_ratio` times as many replayed MNIST training images (at least
+    `min_replay`), so the model learns the new samples without forgetting MNIST.
+
+    Returns a report dict; `report["accepted"]` says whether to keep `model`.
+    """
+    import tensorflow as tf
+
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(y_new))
+    holdout_count = int(len(order) * holdout_fraction) if len(order) >= 5 else 0
+    holdout, train = order[:holdout_count], order[holdout_count:]
+    if not len(train):
+        raise ValueError("No new labelled samples to train on")
+
+    _, (x_test, y_test) = load_mnist_data(normalize=False)
+    x_check = to_serving_scale(x_test[:mnist_holdout])
+    y_check = np.asarray(y_test[:mnist_holdout])
+    before = {
+        "mnist": _accuracy(model, x_check, y_check),
+        "new": _accuracy(model, x_new[holdout], y_new[holdout]),
+    }
+
+    x_replay, y_replay = replay_sample(max(min_replay, replay_ratio * len(train)), seed)
+    x_fit = np.concatenate([x_new[train], x_replay])
+    y_fit = np.concatenate([y_new[train], y_replay])
+
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate),
+        loss="sparse_categorical_crossentropy",
+        metrics=["accuracy"],
+    )
+    train_start = time.perf_counter()
+    model.fit(x_fit, y_fit, epochs=epochs, batch_size=batch_size, shuffle=True, verbose=verbose)
+    train_seconds = time.perf_counter() - train_start
+
+    after = {
+        "mnist": _accuracy(model, x_check, y_check),
+        "new": _accuracy(model, x_new[holdout], y_new[holdout]),
+    }
+    regressions = [
+        name for name in ("mnist", "new")
+        if before[name] is not None and after[name] < before[name] - tolerance
+    ]
+    return {
+        "accepted": not regressions,
+        # Whether the new-sample holdout checked the update at all
+        "verified": bool(len(holdout)),
+        "regressions": regressions,
+        "new_samples": int(len(y_new)),
+        "trained_on": {"new": int(len(train)), "replay": int(len(y_replay))},
+        "holdout": {"new": int(len(holdout)), "mnist": int(len(y_check))},
+        "before": before,
+        "after": after,
+        "epochs": epochs,
+        "train_seconds": train_seconds,
+        "seconds": time.perf_counter() - start,
+    }
@@ -0,0 +1,259 @@
+import secrets
+import threading
+import time
+
+import numpy as np
+
+from .predict import predict_preprocessed_batch
+from .raster import IncrementalRaster
+
+# 4x supersampled 28x28: ~70 KB of raster state per session
+DEFAULT_RASTER_SIZE = 112
+DEFAULT_DEBOUNCE = 0.06
+# A session that keeps drawing still gets a prediction at least this often
+DEFAULT_MAX_DELAY = 0.25
+DEFAULT_IDLE_TIMEOUT = 60.0
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_MAX_BATCH_SIZE = 64
+# Points accepted per stroke update, so one request can't do unbounded work
+MAX_POINTS_PER_UPDATE = 4096
+
+
+class LiveSession:
+    """One drawing surface: an incremental raster plus the latest prediction for it."""
+
+    def __init__(self, session_id: str, canvas_size: float, raster_size: int):
+        self.id = session_id
+        self.raster = IncrementalRaster(raster_size)
+        self.scale = raster_size / canvas_size
+        self.version = 0
+        self.result = None
+        self.last_active = time.monotonic()
+        self.dirty_since = None
+        self.last_update = None
+        self.closed = False
+        # Guards the raster, so drawing doesn't hold up other sessions
+        self.lock = threading.Lock()
+
+
+class LiveSessions:
+    """
+    Server-side state for live drawing clients.
+
+    Clients send only stroke deltas in canvas coordinates; each session keeps
+    a supersampled `IncrementalRaster` that is updated in place. A background
+    worker predicts a session once it has been quiet for `debounce` seconds
+    (or has been drawing for `max_delay`), coalescing every due session into
+    one forward pass, and publishes the result for `wait` to pick up. Sessions
+    idle for `idle_timeout` seconds are dropped, and at most `max_sessions`
+    exist at once, so memory is bounded.
+    """
+
+    def __init__(
+        self,
+        model,
+        raster_size: int = DEFAULT_RASTER_SIZE,
+        debounce: float = DEFAULT_DEBOUNCE,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    ):
+        self.model = model
+        self.raster_size = raster_size
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.max_batch_size = max_batch_size
+
+        self._sessions = {}
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self._created = 0
+        self._expired = 0
+        self._updates = 0
+        self._predictions = 0
+        self._batches = 0
+
+        self._worker = threading.Thread(target=self._run, name="live-sessions", daemon=True)
+        self._worker.start()
+
+    def create(self, canvas_size: float) -> LiveSession:
+        """Open a session for a square canvas of `canvas_size` pixels."""
+        if not canvas_size or canvas_size <= 0:
+            raise ValueError("canvas size must be positive")
+        with self._cond:
+            self._expire_idle(time.monotonic())
+            if len(self._sessions) >= self.max_sessions:
+                raise RuntimeError(f"Too many live sessions ({self.max_sessions})")
+            session = LiveSession(secrets.token_urlsafe(12), float(canvas_size), self.raster_size)
+            self._sessions[session.id] = session
+            self._created += 1
+            return session
+
+    def get(self, session_id: str):
+        with self._cond:
+            return self._sessions.get(session_id)
+
+    def update(self, session_id: str, strokes=(), width: float = 8, clear: bool = False):
+        """
+        Apply a stroke delta: optionally clear, then draw each polyline
+        (a flat [x0, y0, x1, y1, ...] list in canvas coordinates). Returns the
+        new session version, or None if the session does not exist.
+        """
+        if sum(len(stroke) for stroke in strokes) > 2 * MAX_POINTS_PER_UPDATE:
+            raise ValueError(f"At most {MAX_POINTS_PER_UPDATE} points per update")
+        polylines = []
+        for stroke in strokes:
+            coords = np.asarray(stroke, dtype=np.float64)
+            if coords.ndim != 1 or coords.size % 2:
+                raise ValueError("Strokes are flat [x0, y0, x1, y1, ...] lists")
+            polylines.append(coords.reshape(-1, 2))
+
+        session = self.get(session_id)
+        if session is None:
+            return None
+        scaled_width = max(1, round(float(width) * session.scale))
+        with session.lock:
+            if clear:
+                session.raster.clear()
+            for points in polylines:
+                session.raster.stroke((points * session.scale).tolist(), scaled_width)
+
+        with self._cond:
+            if session.closed:
+                return None
+            now = time.monotonic()
+            session.version += 1
+            session.last_active = session.last_update = now
+            if session.dirty_since is None:
+                session.dirty_since = now
+            self._updates += 1
+            self._cond.notify_all()
+            return session.version
+
+    def wait(self, session: LiveSession, after_version: int, timeout: float):
+        """
+        Block until `session` has a result newer than `after_version`, it
+        closes, or `timeout` passes. Returns (version, digit, probabilities)
+        (digit None for an empty canvas) or None. A session with a waiter
+        connected counts as active, so it doesn't expire while being watched.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not session.closed:
+                now = time.monotonic()
+                session.last_active = now
+                if session.result is not None and session.result[0] > after_version:
+                    return session.result
+                remaining = deadline - now
+                if remaining <= 0:
+                    return None
+                self._cond.wait(min(remaining, self.idle_timeout / 2))
+            return None
+
+    def close(self, session_id: str):
+        with self._cond:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                session.closed = True
+                self._cond.notify_all()
+            return session is not None
+
+    def stats(self):
+        with self._cond:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "created": self._created,
+                "expired": self._expired,
+                "updates": self._updates,
+                "predictions": self._predictions,
+                "batches": self._batches,
+                "mean_batch_size": self._predictions / self._batches if self._batches else 0.0,
+                "debounce_ms": self.debounce * 1000,
+                "idle_timeout_seconds": self.idle_timeout,
+            }
+
+    def shutdown(self, timeout=None):
+        """Close every session and join the worker."""
+        with self._cond:
+            self._closed = True
+            for session in self._sessions.values():
+                session.closed = True
+            self._sessions.clear()
+            self._cond.notify_all()
+        self._worker.join(timeout)
+
+    def _expire_idle(self, now):
+        idle = [s.id for s in self._sessions.values() if now - s.last_active > self.idle_timeout]
+        for session_id in idle:
+            self._sessions.pop(session_id).closed = True
+            self._expired += 1
+        if idle:
+            self._cond.notify_all()
+
+    def _due(self, now):
+        """Dirty sessions whose debounce (or max delay) has passed, and the next wake-up time."""
+        due, wake_at = [], now + min(self.idle_timeout, 1.0)
+        for session in self._sessions.values():
+            if session.dirty_since is None:
+                continue
+            ready_at = min(session.last_update + self.debounce, session.dirty_since + self.max_delay)
+            if ready_at <= now:
+                due.append(session)
+            else:
+                wake_at = min(wake_at, ready_at)
+        return due, wake_at
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._closed:
+                now = time.monotonic()
+                self._expire_idle(now)
+                due, wake_at = self._due(now)
+                if due:
+                    due = due[:self.max_batch_size]
+                    batch = []
+                    for session in due:
+                        # Snapshot so drawing can continue during the forward pass
+                        with session.lock:
+                            batch.append((session, session.version, session.raster.raster[0].copy(),
+                                          session.raster.version == 0))
+                        session.dirty_since = None
+                    return batch
+                self._cond.wait(max(wake_at - now, 0.001))
+            return []
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+
+            drawn = [item for item in batch if not item[3]]
+            try:
+                images = np.stack([raster for _, _, raster, _ in drawn]) if drawn else np.empty((0, 28, 28), np.float32)
+                digits, probabilities = predict_preprocessed_batch(self.model, images)
+            except Exception:
+                # Leave the sessions dirty so the next pass retries them
+                with self._cond:
+                    for session, _, _, _ in batch:
+                        if session.dirty_since is None:
+                            session.dirty_since = time.monotonic()
+                time.sleep(self.debounce)
+                continue
+
+            results = iter(zip(digits, probabilities))
+            with self._cond:
+                for session, version, _, empty in batch:
+                    if empty:
+                        session.result = (version, None, None)
+                    else:
+                        digit, probs = next(results)
+                        session.result = (version, int(digit), probs)
+                self._predictions += len(drawn)
+                self._batches += 1 if drawn else 0
+                self._cond.notify_all()
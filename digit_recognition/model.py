@@ -1,20 +1,54 @@
+from __future__ import annotations
+
+import os
+import tempfile
 from pathlib import Path
-from typing import Tuple
+from typing import TYPE_CHECKING, Optional, Sequence, Tuple
 
-import tensorflow as tf
+import numpy as np
 
+from .cascade import CascadeModel
 from .data import load_mnist_data
-from .paths import MODEL_PATH
+from .numpy_model import NumpyDigitModel
+from .paths import CHECKPOINT_DIR, MODEL_PATH, NUMPY_MODEL_PATH
+from .quantize import load_numpy_model, quantize_model, quantized_model_path
+from .tflite_model import TFLiteDigitModel, export_tflite, tflite_model_path
+
+if TYPE_CHECKING:
+    import tensorflow as tf
+
+# TensorFlow is imported inside the functions that need it so that importing
+# this module (or the NumPy backend through `load_trained_model`) stays cheap.
 
 DEFAULT_EPOCHS = 3
+DEFAULT_MAX_EPOCHS = 20
+DEFAULT_BATCH_SIZE = 128
+DEFAULT_PATIENCE = 3
+DEFAULT_VALIDATION_SPLIT = 0.1
+DEFAULT_HIDDEN_UNITS = (128, 128)
+DEFAULT_ACTIVATION = "leaky_relu"
+
+BACKENDS = ("keras", "numpy", "float16", "int8", "tflite", "tflite-dynamic", "cascade")
+# Backend the apps load when none is given on the command line
+DEFAULT_BACKEND = os.environ.get("DIGIT_BACKEND", "keras")
+
 
+def build_model(
+    hidden_units: Sequence[int] = DEFAULT_HIDDEN_UNITS,
+    activation: str = DEFAULT_ACTIVATION,
+):
+    """
+    Create the classifier architecture.
+
+    One Dense layer of each width in `hidden_units` (so its length is the
+    depth), all using `activation`, followed by the 10-way softmax.
+    """
+    import tensorflow as tf
 
-def build_model():
-    """Create the classifier architecture."""
     model = tf.keras.models.Sequential(name="digit_classifier")
     model.add(tf.keras.layers.Flatten(input_shape=(28, 28)))
-    model.add(tf.keras.layers.Dense(units=128, activation="leaky_relu"))
-    model.add(tf.keras.layers.Dense(units=128, activation="leaky_relu"))
+    for units in hidden_units:
+        model.add(tf.keras.layers.Dense(units=int(units), activation=activation))
     model.add(tf.keras.layers.Dense(units=10, activation="softmax"))
     model.compile(
         optimizer="adam",
@@ -38,16 +72,160 @@ def train_model(
     return model, (float(val_loss), float(val_acc))
 
 
-def load_trained_model(path: Path = MODEL_PATH) -> tf.keras.Model:
-    """Load a saved model, handling safe_mode compatibility."""
+def make_dataset(x, y, batch_size: int = DEFAULT_BATCH_SIZE, shuffle: bool = False, seed=None):
+    """
+    Build a `tf.data` pipeline that streams batches out of (memory-mapped) arrays.
+
+    Only indices are shuffled and batched; each batch is gathered from the
+    arrays in a parallel `map` and prefetched while the previous step trains.
+    """
+    import tensorflow as tf
+
+    def gather(indices):
+        indices = np.sort(indices)  # Ascending reads are kinder to the page cache
+        return np.asarray(x[indices], dtype=np.float32), np.asarray(y[indices], dtype=np.int32)
+
+    def load_batch(indices):
+        images, labels = tf.numpy_function(gather, [indices], (tf.float32, tf.int32))
+        images.set_shape((None,) + tuple(x.shape[1:]))
+        labels.set_shape((None,))
+        return images, labels
+
+    dataset = tf.data.Dataset.range(len(x))
+    if shuffle:
+        dataset = dataset.shuffle(len(x), seed=seed, reshuffle_each_iteration=True)
+    return (
+        dataset.batch(batch_size)
+        .map(load_batch, num_parallel_calls=tf.data.AUTOTUNE)
+        .prefetch(tf.data.AUTOTUNE)
+    )
+
+
+def train_model_streaming(
+    epochs: int = DEFAULT_MAX_EPOCHS,
+    save_path: Path = MODEL_PATH,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    validation_split: float = DEFAULT_VALIDATION_SPLIT,
+    patience: Optional[int] = DEFAULT_PATIENCE,
+    checkpoint_dir: Path = CHECKPOINT_DIR,
+    checkpoint_freq="epoch",
+    verbose: int = 1,
+    hidden_units: Sequence[int] = DEFAULT_HIDDEN_UNITS,
+    activation: str = DEFAULT_ACTIVATION,
+) -> Tuple[tf.keras.Model, Tuple[float, float]]:
+    """
+    Train on a streaming `tf.data` pipeline with resumable checkpoints.
+
+    Progress is backed up to `checkpoint_dir` every `checkpoint_freq` ("epoch"
+    or a number of steps); an interrupted run restarts from the last backup
+    instead of epoch 0. Training stops early once validation loss has not
+    improved for `patience` epochs, keeping the best weights. `hidden_units`
+    and `activation` are passed to `build_model`.
+    """
+    import tensorflow as tf
+
+    (x_train, y_train), (x_test, y_test) = load_mnist_data()
+    split = int(len(x_train) * (1 - validation_split))
+    train_ds = make_dataset(x_train[:split], y_train[:split], batch_size, shuffle=True)
+    val_ds = make_dataset(x_train[split:], y_train[split:], batch_size)
+
+    callbacks = [
+        tf.keras.callbacks.BackupAndRestore(str(checkpoint_dir), save_freq=checkpoint_freq)
+    ]
+    if patience:
+        callbacks.append(
+            tf.keras.callbacks.EarlyStopping(
+                monitor="val_loss", patience=patience, restore_best_weights=True
+            )
+        )
+
+    model = build_model(hidden_units, activation)
+    model.fit(
+        train_ds,
+        validation_data=val_ds,
+        epochs=epochs,
+        callbacks=callbacks,
+        verbose=verbose,
+    )
+    val_loss, val_acc = model.evaluate(make_dataset(x_test, y_test, batch_size), verbose=0)
+    save_path.parent.mkdir(parents=True, exist_ok=True)
+    model.save(save_path)
+    return model, (float(val_loss), float(val_acc))
+
+
+def load_trained_model(path: Path = MODEL_PATH, backend: str = "keras"):
+    """
+    Load a saved model, handling safe_mode compatibility.
+
+    With backend="numpy", "float16" or "int8" (or a `.npz` path) the exported
+    weights are loaded into a `NumpyDigitModel` instead of the full Keras model;
+    with "tflite" or "tflite-dynamic" (or a `.tflite` path) the flatbuffer runs
+    in a `TFLiteDigitModel`. "cascade" puts the calibrated first stage from
+    `scripts/cascade.py` in front of the Keras model at `path`.
+
+    Those exported backends load their default artifact, so they only accept
+    the default `path`: pass a `.npz`/`.tflite` file directly, or convert
+    another `.keras` file with `load_model_version`.
+    """
+    path = Path(path)
+    if path.suffix == ".npz":
+        return load_numpy_model(path)
+    if path.suffix == ".tflite":
+        return TFLiteDigitModel(path)
+    if backend in ("numpy", "float16", "int8", "tflite", "tflite-dynamic") and path.resolve() != MODEL_PATH.resolve():
+        raise ValueError(
+            f"The {backend} backend loads its exported artifact, not {path.name}; pass the "
+            f".npz/.tflite file itself or use load_model_version to convert {path.name}"
+        )
+    if backend == "numpy":
+        return load_numpy_model(NUMPY_MODEL_PATH)
+    if backend in ("float16", "int8"):
+        return load_numpy_model(quantized_model_path(backend))
+    if backend in ("tflite", "tflite-dynamic"):
+        return TFLiteDigitModel(tflite_model_path(dynamic_range=backend == "tflite-dynamic"))
+    if backend == "cascade":
+        return CascadeModel.load(load_trained_model(path))
+    if backend != "keras":
+        raise ValueError(f"Unknown backend {backend!r}; expected one of {', '.join(BACKENDS)}")
     if not path.exists():
         raise FileNotFoundError(f"Model file not found at {path}")
+    import tensorflow as tf
+
     try:
         return tf.keras.models.load_model(path, safe_mode=False)
     except Exception:
         return tf.keras.models.load_model(path)
 
 
+def load_model_version(path: Path, backend: str = DEFAULT_BACKEND):
+    """
+    Load a file from the versioned model directory as `backend` would serve it.
+
+    `.npz` and `.tflite` versions load as themselves. A `.keras` version is
+    converted to NumPy weights for "numpy" (rounded in memory for "float16"
+    and "int8") and exported to a flatbuffer for the TFLite backends, and
+    "cascade" puts the calibrated first stage in front of whatever loaded,
+    so a hot swap never falls back to a different backend.
+    """
+    path = Path(path)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+    if backend == "cascade":
+        return CascadeModel.load(load_model_version(path, "keras"))
+    if path.suffix in (".npz", ".tflite") or backend == "keras":
+        return load_trained_model(path)
+
+    keras_model = load_trained_model(path)
+    if backend in ("tflite", "tflite-dynamic"):
+        with tempfile.TemporaryDirectory() as staging:
+            exported = export_tflite(
+                keras_model, Path(staging) / f"{path.stem}.tflite", dynamic_range=backend == "tflite-dynamic"
+            )
+            return TFLiteDigitModel(exported)
+    model = NumpyDigitModel.from_keras(keras_model)
+    return model if backend == "numpy" else quantize_model(model, backend)
+
+
 def ensure_model(
     path: Path = MODEL_PATH,
     epochs: int = DEFAULT_EPOCHS,
@@ -0,0 +1,143 @@
+from pathlib import Path
+
+import numpy as np
+
+from .paths import NUMPY_MODEL_PATH
+
+# Keras' "leaky_relu" activation uses this slope for negative inputs
+DEFAULT_NEGATIVE_SLOPE = 0.2
+
+
+def _leaky_relu(x, negative_slope):
+    return np.maximum(x, x * negative_slope, out=x)
+
+
+def _relu(x, negative_slope):
+    return np.maximum(x, 0.0, out=x)
+
+
+def _softmax(x, negative_slope):
+    x -= x.max(axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=1, keepdims=True)
+    return x
+
+
+def _sigmoid(x, negative_slope):
+    np.negative(x, out=x)
+    np.exp(x, out=x)
+    x += 1.0
+    return np.reciprocal(x, out=x)
+
+
+def _tanh(x, negative_slope):
+    return np.tanh(x, out=x)
+
+
+def _linear(x, negative_slope):
+    return x
+
+
+ACTIVATIONS = {
+    "leaky_relu": _leaky_relu,
+    "relu": _relu,
+    "softmax": _softmax,
+    "sigmoid": _sigmoid,
+    "tanh": _tanh,
+    "linear": _linear,
+}
+
+
+def _activation_name(layer) -> str:
+    activation = getattr(layer, "activation", None)
+    return getattr(activation, "__name__", "linear")
+
+
+class NumpyDigitModel:
+    """
+    Pure NumPy forward pass for the Dense digit classifier.
+
+    Exposes the subset of the Keras `Model.predict` interface used by the
+    predict helpers, so it can be passed anywhere a Keras model is expected.
+    """
+
+    def __init__(self, kernels, biases, activations, negative_slope=DEFAULT_NEGATIVE_SLOPE):
+        if not (len(kernels) == len(biases) == len(activations)):
+            raise ValueError("kernels, biases and activations must have equal length")
+        unknown = set(activations) - set(ACTIVATIONS)
+        if unknown:
+            raise ValueError(f"Unsupported activations: {sorted(unknown)}")
+        self.kernels = [np.ascontiguousarray(k, dtype="float32") for k in kernels]
+        self.biases = [np.asarray(b, dtype="float32") for b in biases]
+        self.activations = list(activations)
+        self.negative_slope = float(negative_slope)
+        self.input_size = self.kernels[0].shape[0]
+
+    @classmethod
+    def load(cls, path: Path = NUMPY_MODEL_PATH) -> "NumpyDigitModel":
+        """Load weights written by `export_numpy_weights`."""
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"NumPy weights not found at {path}")
+        with np.load(path) as data:
+            activations = [str(name) for name in data["activations"]]
+            kernels = [data[f"kernel_{i}"] for i in range(len(activations))]
+            biases = [data[f"bias_{i}"] for i in range(len(activations))]
+            negative_slope = float(data["negative_slope"])
+        return cls(kernels, biases, activations, negative_slope)
+
+    @classmethod
+    def from_keras(cls, model) -> "NumpyDigitModel":
+        """Build directly from an in-memory Keras model."""
+        kernels, biases, activations = [], [], []
+        for layer in model.layers:
+            weights = layer.get_weights()
+            if not weights:
+                continue
+            kernels.append(weights[0])
+            biases.append(weights[1])
+            activations.append(_activation_name(layer))
+        return cls(kernels, biases, activations)
+
+    def save(self, path: Path = NUMPY_MODEL_PATH) -> Path:
+        """Write kernels, biases and activations to a compact `.npz`."""
+        arrays = {}
+        for index, (kernel, bias) in enumerate(zip(self.kernels, self.biases)):
+            arrays[f"kernel_{index}"] = kernel
+            arrays[f"bias_{index}"] = bias
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            activations=np.array(self.activations),
+            negative_slope=np.float32(self.negative_slope),
+            **arrays,
+        )
+        return path
+
+    def count_params(self) -> int:
+        return sum(k.size + b.size for k, b in zip(self.kernels, self.biases))
+
+    def predict(self, x, batch_size=None, verbose=0):
+        """Return class probabilities of shape (N, 10) for an (N, 28, 28) batch."""
+        x = np.asarray(x, dtype="float32").reshape(-1, self.input_size)
+        if batch_size is None or len(x) <= batch_size:
+            return self._forward(x)
+        return np.concatenate(
+            [self._forward(x[i:i + batch_size]) for i in range(0, len(x), batch_size)]
+        )
+
+    def __call__(self, x):
+        return self.predict(x)
+
+    def _forward(self, x):
+        for kernel, bias, activation in zip(self.kernels, self.biases, self.activations):
+            x = x @ kernel
+            x += bias
+            x = ACTIVATIONS[activation](x, self.negative_slope)
+        return x
+
+
+def export_numpy_weights(model, path: Path = NUMPY_MODEL_PATH) -> Path:
+    """Write the Dense kernels, biases and activations of a Keras model to `.npz`."""
+    return NumpyDigitModel.from_keras(model).save(path)
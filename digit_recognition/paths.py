@@ -1,5 +1,23 @@
+import os
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
-MODEL_PATH = PROJECT_ROOT / "models" / "handwritten_digits.model.keras"
+MODEL_PATH = Path(
+    os.environ.get("DIGIT_MODEL_PATH", PROJECT_ROOT / "models" / "handwritten_digits.model.keras")
+)
+NUMPY_MODEL_PATH = PROJECT_ROOT / "models" / "handwritten_digits.weights.npz"
+TFLITE_MODEL_PATH = PROJECT_ROOT / "models" / "handwritten_digits.tflite"
+# First stage and thresholds of the confidence-gated cascade (scripts/cascade.py)
+CASCADE_MODEL_PATH = PROJECT_ROOT / "models" / "handwritten_digits.cascade.npz"
+# Drop v1.keras, v2.npz, ... here and the web app hot-swaps to the newest version
+MODEL_VERSIONS_DIR = Path(
+    os.environ.get("DIGIT_MODEL_DIR", PROJECT_ROOT / "models" / "versions")
+)
+CHECKPOINT_DIR = PROJECT_ROOT / "models" / "checkpoints"
 DIGITS_DIR = PROJECT_ROOT / "digits"
+DATA_DIR = PROJECT_ROOT / "data"
+# Labelled corrections from the web app (<label>/<id>.png), consumed by scripts/fine_tune.py
+CORRECTIONS_DIR = Path(os.environ.get("DIGIT_CORRECTIONS_DIR", DATA_DIR / "corrections"))
+# Drop mnist.npz or the four IDX files here to train without network access
+MNIST_DIR = Path(os.environ.get("DIGIT_MNIST_DIR", DATA_DIR / "mnist"))
+DATA_CACHE_DIR = Path(os.environ.get("DIGIT_DATA_CACHE", DATA_DIR / "cache"))
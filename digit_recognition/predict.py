@@ -1,13 +1,58 @@
 import numpy as np
 
-from .preprocess import preprocess_image_array
+from .cache import PredictionCache
+from .preprocess import preprocess_batch, preprocess_image_array
+
+# Optional process-wide cache consulted by predict_preprocessed / predict_digit
+_prediction_cache = None
+
+
+def set_prediction_cache(cache):
+    """Install a `PredictionCache` (or None to disable caching); returns the previous one."""
+    global _prediction_cache
+    previous, _prediction_cache = _prediction_cache, cache
+    return previous
+
+
+def enable_prediction_cache(max_entries: int):
+    """Install a fresh `PredictionCache` with room for `max_entries` results."""
+    cache = PredictionCache(max_entries)
+    set_prediction_cache(cache)
+    return cache
+
+
+def get_prediction_cache():
+    return _prediction_cache
+
+
+def predict_preprocessed_batch(model, preprocessed_batch):
+    """Run one forward pass over an (N, H, W) batch and return digits and probabilities."""
+    if len(preprocessed_batch) == 0:
+        return np.empty(0, dtype="int64"), np.empty((0, 10), dtype="float32")
+    probabilities = np.asarray(model.predict(preprocessed_batch, verbose=0))
+    digits = np.argmax(probabilities, axis=1)
+    return digits, probabilities
 
 
 def predict_preprocessed(model, preprocessed_batch):
     """Run prediction for a batch already shaped and normalized for the model."""
-    probabilities = model.predict(preprocessed_batch, verbose=0)[0]
-    digit = int(np.argmax(probabilities))
-    return digit, probabilities
+    cache = _prediction_cache
+    if cache is not None:
+        return cache.get_or_compute(
+            model, preprocessed_batch, lambda batch: _predict_uncached(model, batch)
+        )
+    return _predict_uncached(model, preprocessed_batch)
+
+
+def _predict_uncached(model, preprocessed_batch):
+    digits, probabilities = predict_preprocessed_batch(model, preprocessed_batch)
+    return int(digits[0]), probabilities[0]
+
+
+def predict_batch(model, images, **preprocess_kwargs):
+    """Preprocess N images and predict them all in a single forward pass."""
+    prepped = preprocess_batch(images, **preprocess_kwargs)
+    return predict_preprocessed_batch(model, prepped)
 
 
 def predict_digit(model, img_array, **preprocess_kwargs):
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Optional, Tuple
 
 import numpy as np
@@ -39,3 +40,141 @@ def preprocess_image_array(
         height, width = arr.shape
 
     return arr.reshape(1, height, width)
+
+
+def preprocess_batch(
+    images,
+    target_size: ImageSize = (28, 28),
+    invert: bool = True,
+):
+    """
+    Normalize and shape a batch of images for the model.
+
+    Accepts a sequence of arrays/PIL Images or a stacked array of shape
+    (N, H, W) or (N, H, W, C). Applies the same steps as
+    `preprocess_image_array` to every image and returns shape (N, H, W).
+    """
+    if not isinstance(images, np.ndarray):
+        arrays = [np.asarray(img) for img in images]
+        if arrays and len({arr.shape for arr in arrays}) == 1:
+            images = np.stack(arrays)
+        else:
+            images = arrays
+
+    if isinstance(images, np.ndarray) and images.ndim >= 3:
+        batch = images[..., 0] if images.ndim == 4 else images
+        if not target_size or batch.shape[1:] == tuple(target_size):
+            return _normalize_stack(batch, invert)
+        images = list(batch)
+
+    prepped = [
+        preprocess_image_array(img, target_size=target_size, invert=invert)
+        for img in images
+    ]
+    if not prepped:
+        height, width = target_size or (0, 0)
+        return np.empty((0, height, width), dtype="float32")
+    return np.concatenate(prepped, axis=0)
+
+
+def _normalize_stack(batch, invert: bool):
+    """Invert and scale an (N, H, W) stack, deciding the scale per image."""
+    if invert:
+        batch = np.invert(batch)
+    batch = batch.astype("float32")
+    if batch.size:
+        needs_scaling = batch.reshape(len(batch), -1).max(axis=1) > 1.0
+        batch[needs_scaling] /= 255.0
+    return batch
+
+
+# Trailing axis sizes read as channels (gray, RGB, RGBA) rather than image width
+_CHANNEL_COUNTS = (1, 3, 4)
+
+# uint8 -> float32 lookup tables that invert (optionally) and scale to [0, 1] in one pass
+_UINT8_LUTS = {
+    True: (1.0 - np.arange(256, dtype=np.float32) / 255.0).astype(np.float32),
+    False: (np.arange(256, dtype=np.float32) / 255.0).astype(np.float32),
+}
+
+
+@lru_cache(maxsize=32)
+def _area_weights(src: int, dst: int):
+    """(dst, src) matrix whose rows average the source pixels each target pixel covers."""
+    scale = src / dst
+    edges = np.arange(dst + 1) * scale
+    pixels = np.arange(src)
+    overlap = (
+        np.minimum(edges[1:, None], pixels[None, :] + 1)
+        - np.maximum(edges[:-1, None], pixels[None, :])
+    )
+    weights = (np.clip(overlap, 0.0, None) / scale).astype(np.float32)
+    weights.setflags(write=False)
+    return weights
+
+
+def preprocess_fast(
+    images,
+    out=None,
+    input_range: float = 255.0,
+    invert: bool = True,
+    target_size: Tuple[int, int] = (28, 28),
+):
+    """
+    Allocation-light preprocessing for grayscale images with a known value range.
+
+    Takes one (H, W) image or an (N, H, W) stack whose values span
+    [0, input_range] and writes the (N, 28, 28) float32 result into `out`
+    (allocated if not given, so hot loops can reuse one buffer). Inversion and
+    scaling are fused into a single lookup for uint8 input, and larger inputs
+    are reduced by vectorized area averaging instead of a PIL resize. Because
+    the range is explicit, no `max()` scan of the data is needed.
+
+    Channel images, (H, W, C) or (N, H, W, C) with C of 1, 3 or 4, are reduced
+    to their first channel like the rest of the pipeline does, so a 3-D array
+    whose last axis is 1, 3 or 4 is read as one image, not a stack.
+    """
+    arr = np.asarray(images)
+    if arr.ndim in (3, 4) and arr.shape[-1] in _CHANNEL_COUNTS:
+        arr = arr[..., 0]
+    if arr.ndim == 2:
+        arr = arr[np.newaxis]
+    if arr.ndim != 3:
+        raise ValueError(
+            f"Expected an (H, W) or (N, H, W) grayscale array or an (H, W, C) or (N, H, W, C) "
+            f"array with C in {_CHANNEL_COUNTS}, got shape {arr.shape}"
+        )
+
+    count, height, width = arr.shape
+    target_height, target_width = target_size
+    if out is None:
+        out = np.empty((count, target_height, target_width), dtype=np.float32)
+    elif out.shape != (count, target_height, target_width) or out.dtype != np.float32:
+        raise ValueError(
+            f"out must be float32 with shape {(count, target_height, target_width)}, "
+            f"got {out.dtype} {out.shape}"
+        )
+
+    same_size = (height, width) == (target_height, target_width)
+    if arr.dtype == np.uint8 and input_range == 255:
+        lut = _UINT8_LUTS[bool(invert)]
+        if same_size:
+            return np.take(lut, arr, out=out, mode="clip")
+        normalized = lut[arr]
+    else:
+        normalized = arr.astype(np.float32) * np.float32(1.0 / input_range)
+        if invert:
+            np.subtract(np.float32(1.0), normalized, out=normalized)
+        if same_size:
+            out[...] = normalized
+            return out
+
+    row_factor, col_factor = divmod(height, target_height), divmod(width, target_width)
+    if row_factor[1] == 0 and col_factor[1] == 0:
+        blocks = normalized.reshape(
+            count, target_height, row_factor[0], target_width, col_factor[0]
+        )
+        return np.mean(blocks, axis=(2, 4), out=out)
+
+    rows = np.matmul(_area_weights(height, target_height), normalized)
+    return np.matmul(rows, _area_weights(width, target_width).T, out=out)
@@ -0,0 +1,117 @@
+from pathlib import Path
+
+import numpy as np
+
+from .numpy_model import ACTIVATIONS, NumpyDigitModel
+from .paths import MODEL_PATH
+
+FORMATS = ("float32", "float16", "int8")
+
+
+def quantized_model_path(fmt: str) -> Path:
+    """Default artifact location for a weight format."""
+    return MODEL_PATH.parent / f"handwritten_digits.{fmt}.npz"
+
+
+def quantize_per_channel(kernel):
+    """Symmetric int8 quantization with one scale per output unit."""
+    kernel = np.asarray(kernel, dtype="float32")
+    scale = np.abs(kernel).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    quantized = np.clip(np.rint(kernel / scale), -127, 127).astype("int8")
+    return quantized, scale.astype("float32")
+
+
+def quantize_model(model: NumpyDigitModel, fmt: str) -> NumpyDigitModel:
+    """`model` with its weights rounded to `fmt`, dequantized exactly as `load_numpy_model` loads them."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+    kernels = []
+    for kernel in model.kernels:
+        if fmt == "int8":
+            quantized, scale = quantize_per_channel(kernel)
+            kernels.append(quantized.astype("float32") * scale)
+        else:
+            kernels.append(np.asarray(kernel).astype(fmt).astype("float32"))
+    return NumpyDigitModel(kernels, model.biases, model.activations, model.negative_slope)
+
+
+def save_quantized(model: NumpyDigitModel, fmt: str, path: Path = None) -> Path:
+    """Write `model` as a float32, float16 or per-channel int8 `.npz` artifact."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+    path = Path(path or quantized_model_path(fmt))
+    arrays = {}
+    for index, (kernel, bias) in enumerate(zip(model.kernels, model.biases)):
+        if fmt == "int8":
+            arrays[f"kernel_{index}"], arrays[f"scale_{index}"] = quantize_per_channel(kernel)
+        else:
+            arrays[f"kernel_{index}"] = kernel.astype(fmt)
+        arrays[f"bias_{index}"] = bias.astype("float32")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(
+        path,
+        format=np.array(fmt),
+        activations=np.array(model.activations),
+        negative_slope=np.float32(model.negative_slope),
+        **arrays,
+    )
+    return path
+
+
+def load_numpy_model(path: Path, integer_arithmetic: bool = False) -> NumpyDigitModel:
+    """
+    Load any `.npz` weight artifact.
+
+    float16 and int8 weights are dequantized to float32 once at load time, which
+    keeps inference on the BLAS fast path. With `integer_arithmetic=True`, int8
+    artifacts instead run as an `Int8DigitModel` that multiplies in int32.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"NumPy weights not found at {path}")
+    with np.load(path) as data:
+        fmt = str(data["format"]) if "format" in data else "float32"
+        activations = [str(name) for name in data["activations"]]
+        kernels = [data[f"kernel_{i}"] for i in range(len(activations))]
+        biases = [data[f"bias_{i}"] for i in range(len(activations))]
+        scales = [data[f"scale_{i}"] for i in range(len(activations))] if fmt == "int8" else []
+        negative_slope = float(data["negative_slope"])
+
+    if fmt == "int8":
+        if integer_arithmetic:
+            return Int8DigitModel(kernels, scales, biases, activations, negative_slope)
+        kernels = [q.astype("float32") * scale for q, scale in zip(kernels, scales)]
+    return NumpyDigitModel(kernels, biases, activations, negative_slope)
+
+
+class Int8DigitModel(NumpyDigitModel):
+    """
+    Int8 weights with dynamically quantized activations.
+
+    Each layer quantizes its input per row to int8, multiplies the integer
+    values and rescales the result by the row and per-channel weight scales.
+    The integers are held as float32 so the matmul stays on BLAS (NumPy has
+    no BLAS path for integer arrays); every product and partial sum is an
+    integer below 2**24 for layers up to 1040 inputs wide, so the result is
+    exactly what int32 accumulation would give.
+    """
+
+    def __init__(self, qkernels, scales, biases, activations, negative_slope):
+        dequantized = [q.astype("float32") * s for q, s in zip(qkernels, scales)]
+        super().__init__(dequantized, biases, activations, negative_slope)
+        self.qkernels = [np.asarray(q, dtype="float32") for q in qkernels]
+        self.scales = [np.asarray(s, dtype="float32") for s in scales]
+
+    def _forward(self, x):
+        layers = zip(self.qkernels, self.scales, self.biases, self.activations)
+        for qkernel, scale, bias, activation in layers:
+            row_scale = np.abs(x).max(axis=1, keepdims=True) / 127.0
+            row_scale[row_scale == 0] = 1.0
+            xq = np.rint(x / row_scale)
+            x = xq @ qkernel
+            x *= row_scale
+            x *= scale
+            x += bias
+            x = ACTIVATIONS[activation](x, self.negative_slope)
+        return x
@@ -0,0 +1,81 @@
+import numpy as np
+from PIL import Image, ImageDraw
+
+from .preprocess import _UINT8_LUTS, _area_weights
+
+
+class IncrementalRaster:
+    """
+    Square drawing surface that keeps its 28x28 model input up to date per stroke.
+
+    Strokes are drawn black-on-white into a full-size grayscale image (the
+    same way the apps draw them). After each stroke only the 28x28 cells its
+    bounding box touches are re-averaged, so `raster` always equals
+    `preprocess_fast(image)` without reprocessing the whole canvas.
+    """
+
+    def __init__(self, size: int, target: int = 28):
+        self.size = size
+        self.target = target
+        self._weights = _area_weights(size, target)
+        self.clear()
+
+    def clear(self):
+        self.image = Image.new("L", (self.size, self.size), 255)
+        self._draw = ImageDraw.Draw(self.image)
+        # Ink coverage in [0, 1] at canvas resolution (already inverted and scaled)
+        self._ink = np.zeros((self.size, self.size), dtype=np.float32)
+        self.raster = np.zeros((1, self.target, self.target), dtype=np.float32)
+        self.version = 0
+
+    def line(self, x0, y0, x1, y1, width: int = 8):
+        self._draw.line([(x0, y0), (x1, y1)], fill=0, width=width)
+        pad = width // 2 + 1
+        self._refresh(min(x0, x1) - pad, min(y0, y1) - pad, max(x0, x1) + pad, max(y0, y1) + pad)
+
+    def stroke(self, points, width: int = 8):
+        """Draw a polyline with round joints and caps, refreshing its bounding box once."""
+        points = [(float(x), float(y)) for x, y in points]
+        if not points:
+            return
+        radius = width / 2
+        if len(points) > 1:
+            self._draw.line(points, fill=0, width=width, joint="curve")
+        for x, y in (points[0], points[-1]):
+            self._draw.ellipse([x - radius, y - radius, x + radius, y + radius], fill=0, outline=0)
+        xs, ys = [x for x, _ in points], [y for _, y in points]
+        pad = int(radius) + 1
+        self._refresh(min(xs) - pad, min(ys) - pad, max(xs) + pad, max(ys) + pad)
+
+    def dot(self, x, y, radius: int = 4):
+        self._draw.ellipse([x - radius, y - radius, x + radius, y + radius], fill=0, outline=0)
+        self._refresh(x - radius - 1, y - radius - 1, x + radius + 1, y + radius + 1)
+
+    def _refresh(self, left, top, right, bottom):
+        left, top = max(int(left), 0), max(int(top), 0)
+        right, bottom = min(int(right) + 1, self.size), min(int(bottom) + 1, self.size)
+        if left >= right or top >= bottom:
+            return
+
+        pixels = np.asarray(self.image.crop((left, top, right, bottom)))
+        self._ink[top:bottom, left:right] = _UINT8_LUTS[True][pixels]
+
+        # Target cells touched by the dirty box, and every source pixel they average
+        rows = self._cells(top, bottom)
+        cols = self._cells(left, right)
+        row_src = self._sources(rows)
+        col_src = self._sources(cols)
+        self.raster[0, rows, cols] = (
+            self._weights[rows, row_src]
+            @ self._ink[row_src, col_src]
+            @ self._weights[cols, col_src].T
+        )
+        self.version += 1
+
+    def _cells(self, start, stop):
+        touched = np.flatnonzero(self._weights[:, start:stop].any(axis=1))
+        return slice(int(touched[0]), int(touched[-1]) + 1)
+
+    def _sources(self, cells):
+        covered = np.flatnonzero(self._weights[cells].any(axis=0))
+        return slice(int(covered[0]), int(covered[-1]) + 1)
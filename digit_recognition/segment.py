@@ -0,0 +1,208 @@
+import cv2
+import numpy as np
+
+from .predict import predict_preprocessed_batch
+from .preprocess import preprocess_fast
+
+# MNIST digits are scaled into a 20x20 box and centred by mass in a 28x28 frame
+DIGIT_BOX = 20
+FRAME = 28
+DEFAULT_MIN_AREA = 12
+# Components shorter than this fraction of their line's median height are specks
+DEFAULT_MIN_HEIGHT_RATIO = 0.35
+# A horizontal gap wider than this many median digit heights starts a new number
+DEFAULT_GAP_RATIO = 0.4
+# Fragments stacked in a column merge only across a vertical gap smaller than this
+# fraction of the taller one, so digits on single-spaced lines stay apart
+FRAGMENT_GAP_RATIO = 0.25
+
+
+def _grayscale(image):
+    arr = np.asarray(image)
+    if arr.ndim == 3:
+        arr = arr[:, :, 0]
+    if arr.dtype != np.uint8:
+        arr = arr.astype(np.float32)
+        if arr.max() <= 1.0:
+            arr *= 255.0
+        arr = np.clip(arr, 0, 255).astype(np.uint8)
+    return arr
+
+
+def _merge_fragments(boxes):
+    """Group component boxes that share a column (a broken stroke, the parts of a 5)."""
+    order = np.argsort(boxes[:, 0], kind="stable")
+    # Group extents as x0, y0, x1, y1, compared against each new box in one vector op
+    extents = np.empty((len(boxes), 4), dtype=np.int64)
+    members = []
+    for index in order:
+        x, y, w, h = (int(v) for v in boxes[index, :4])
+        current = extents[:len(members)]
+        overlap = np.minimum(current[:, 2], x + w) - np.maximum(current[:, 0], x)
+        vertical_gap = np.maximum(y - current[:, 3], current[:, 1] - (y + h))
+        matches = np.flatnonzero(
+            (overlap >= 0.5 * np.minimum(w, current[:, 2] - current[:, 0]))
+            & (vertical_gap < FRAGMENT_GAP_RATIO * np.maximum(h, current[:, 3] - current[:, 1]))
+        )
+        if len(matches):
+            group = matches[0]
+            members[group].append(index)
+            extents[group] = np.minimum(extents[group], [x, y, x, y])
+            extents[group, 2:] = np.maximum(extents[group, 2:], [x + w, y + h])
+        else:
+            extents[len(members)] = (x, y, x + w, y + h)
+            members.append([index])
+    return [{"ids": ids, "box": [int(v) for v in extents[i]]} for i, ids in enumerate(members)]
+
+
+def _group_lines(groups):
+    """Assign groups to text lines by vertical overlap, top to bottom, each sorted left to right."""
+    lines = []
+    for group in sorted(groups, key=lambda g: (g["box"][1] + g["box"][3]) / 2):
+        x0, y0, x1, y1 = group["box"]
+        for line in lines:
+            overlap = min(y1, line["bottom"]) - max(y0, line["top"])
+            if overlap >= 0.5 * min(y1 - y0, line["bottom"] - line["top"]):
+                line["groups"].append(group)
+                line["top"], line["bottom"] = min(line["top"], y0), max(line["bottom"], y1)
+                break
+        else:
+            lines.append({"groups": [group], "top": y0, "bottom": y1})
+    return [sorted(line["groups"], key=lambda g: g["box"][0]) for line in lines]
+
+
+def _frame(crop):
+    """Scale a dark-on-light crop into the MNIST 20x20 box and centre it by mass in 28x28."""
+    height, width = crop.shape
+    scale = DIGIT_BOX / max(height, width)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    digit = cv2.resize(crop, size, interpolation=cv2.INTER_AREA)
+
+    frame = np.full((FRAME, FRAME), 255, dtype=np.uint8)
+    ink = 255.0 - digit
+    total = ink.sum()
+    if total:
+        rows, cols = np.indices(ink.shape)
+        cy, cx = (rows * ink).sum() / total, (cols * ink).sum() / total
+    else:
+        cy, cx = (size[1] - 1) / 2, (size[0] - 1) / 2
+    top = int(np.clip(round(FRAME / 2 - 0.5 - cy), 0, FRAME - size[1]))
+    left = int(np.clip(round(FRAME / 2 - 0.5 - cx), 0, FRAME - size[0]))
+    frame[top:top + size[1], left:left + size[0]] = digit
+    return frame
+
+
+def segment_digits(image, min_area: int = DEFAULT_MIN_AREA,
+                   min_height_ratio: float = DEFAULT_MIN_HEIGHT_RATIO,
+                   gap_ratio: float = DEFAULT_GAP_RATIO):
+    """
+    Split an image of dark digits on a light background into digit crops.
+
+    Ink is found with Otsu's threshold and one connected-components pass;
+    fragments in the same column are merged, specks dropped, and the rest
+    grouped into lines and then into numbers at wide horizontal gaps. Each
+    crop keeps only its own components' ink and is framed like MNIST.
+
+    Returns (crops, layout): an (N, 28, 28) float32 batch normalized as by
+    `preprocess_image_array`, and one {"line", "boxes"} entry per number in
+    reading order whose [x, y, w, h] boxes line up with the crops.
+    """
+    gray = _grayscale(image)
+    if gray.size == 0 or int(gray.max()) - int(gray.min()) < 32:
+        return np.empty((0, FRAME, FRAME), dtype=np.float32), []
+
+    _, ink = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    _, labels, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    boxes = stats[1:]
+    ids = np.flatnonzero(boxes[:, cv2.CC_STAT_AREA] >= min_area)
+    if not len(ids):
+        return np.empty((0, FRAME, FRAME), dtype=np.float32), []
+
+    groups = _merge_fragments(boxes[ids])
+    for group in groups:
+        group["ids"] = ids[group["ids"]] + 1  # label 0 is the background
+
+    frames, layout = [], []
+    kernel = np.ones((3, 3), dtype=np.uint8)
+    for line in _group_lines(groups):
+        heights = np.array([g["box"][3] - g["box"][1] for g in line])
+        line = [g for g, h in zip(line, heights) if h >= min_height_ratio * np.median(heights)]
+        median_height = np.median([g["box"][3] - g["box"][1] for g in line])
+        line_number = layout[-1]["line"] + 1 if layout else 0
+
+        number = None
+        previous_right = None
+        for group in line:
+            x0, y0, x1, y1 = group["box"]
+            if number is None or x0 - previous_right > gap_ratio * median_height:
+                number = {"line": line_number, "boxes": []}
+                layout.append(number)
+            previous_right = x1 if previous_right is None else max(previous_right, x1)
+
+            # Keep this group's ink (plus a pixel of anti-aliasing) and blank everything else
+            mask = np.isin(labels[y0:y1, x0:x1], group["ids"]).astype(np.uint8)
+            mask = cv2.dilate(mask, kernel)
+            frames.append(_frame(np.where(mask, gray[y0:y1, x0:x1], 255).astype(np.uint8)))
+            number["boxes"].append([int(x0), int(y0), int(x1 - x0), int(y1 - y0)])
+
+    if not frames:
+        return np.empty((0, FRAME, FRAME), dtype=np.float32), []
+    return preprocess_fast(np.stack(frames)), layout
+
+
+def assemble_numbers(layout, digits, probabilities):
+    """Combine a `segment_digits` layout with one prediction per crop into a result dict."""
+    numbers, position = [], 0
+    for entry in layout:
+        count = len(entry["boxes"])
+        entries = [
+            {
+                "digit": int(digit),
+                "confidence": float(probs[digit]),
+                "box": box,
+            }
+            for digit, probs, box in zip(
+                digits[position:position + count], probabilities[position:position + count], entry["boxes"]
+            )
+        ]
+        position += count
+        xs = [b[0] for b in entry["boxes"]] + [b[0] + b[2] for b in entry["boxes"]]
+        ys = [b[1] for b in entry["boxes"]] + [b[1] + b[3] for b in entry["boxes"]]
+        numbers.append({
+            "value": "".join(str(d["digit"]) for d in entries),
+            "confidence": min(d["confidence"] for d in entries),
+            "line": entry["line"],
+            "box": [min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)],
+            "digits": entries,
+        })
+
+    lines = {}
+    for number in numbers:
+        lines.setdefault(number["line"], []).append(number["value"])
+    return {
+        "text": "\n".join(" ".join(values) for values in lines.values()),
+        "numbers": numbers,
+    }
+
+
+def recognize_numbers(model, images, **segment_kwargs):
+    """
+    Read every number in each image, classifying the digit crops of all the
+    images in a single batched forward pass. Returns one result dict per image.
+    """
+    segmented = [segment_digits(image, **segment_kwargs) for image in images]
+    crops = [batch for batch, _ in segmented]
+    batch = np.concatenate(crops) if crops else np.empty((0, FRAME, FRAME), dtype=np.float32)
+    digits, probabilities = predict_preprocessed_batch(model, batch)
+
+    results, position = [], 0
+    for crops_for_image, (_, layout) in zip(crops, segmented):
+        end = position + len(crops_for_image)
+        results.append(assemble_numbers(layout, digits[position:end], probabilities[position:end]))
+        position = end
+    return results
+
+
+def recognize_number(model, image, **segment_kwargs):
+    """Read the number(s) in one image: text, and per-digit confidences and boxes."""
+    return recognize_numbers(model, [image], **segment_kwargs)[0]
@@ -0,0 +1,174 @@
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .predict import predict_preprocessed_batch
+
+DEFAULT_WARMUP_BATCH_SIZES = (1, 8, 32)
+DEFAULT_POLL_INTERVAL = 2.0
+# A version file must be unmodified this long before it is loaded, so a
+# model that is still being copied into the directory is never picked up
+DEFAULT_SETTLE_SECONDS = 1.0
+MODEL_SUFFIXES = (".keras", ".npz", ".tflite")
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up(model, batch_sizes=DEFAULT_WARMUP_BATCH_SIZES) -> float:
+    """
+    Run one prediction per batch size so lazy work (Keras tracing, BLAS
+    thread start-up) happens now rather than on the first real request.
+    Models that count their traffic (`reset_stats`) are reset afterwards.
+    Returns the time taken in seconds.
+    """
+    start = time.perf_counter()
+    for batch_size in batch_sizes:
+        predict_preprocessed_batch(model, np.zeros((batch_size, 28, 28), dtype="float32"))
+    if hasattr(model, "reset_stats"):
+        model.reset_stats()
+    return time.perf_counter() - start
+
+
+def version_key(name: str):
+    """Sort key that orders v2 before v10 and 2024-01-09 before 2024-01-10."""
+    return [(0, int(part), "") if part.isdigit() else (1, 0, part) for part in re.split(r"(\d+)", name)]
+
+
+def list_versions(directory: Path, settle: float = DEFAULT_SETTLE_SECONDS):
+    """Model files in `directory` that have finished being written, oldest version first."""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    now = time.time()
+    versions = [
+        path for path in directory.iterdir()
+        if path.is_file() and path.suffix in MODEL_SUFFIXES and now - path.stat().st_mtime >= settle
+    ]
+    return sorted(versions, key=lambda path: version_key(path.stem))
+
+
+def latest_version(directory: Path, settle: float = DEFAULT_SETTLE_SECONDS):
+    versions = list_versions(directory, settle)
+    return versions[-1] if versions else None
+
+
+class ServedModel:
+    """
+    The model currently being served, together with its version.
+
+    `swap` warms the incoming model up before publishing it, and publishing
+    is a single reference assignment: requests already holding the previous
+    model finish with it, every later `model` read sees the new one, and no
+    request ever waits on a load.
+    """
+
+    def __init__(self, warmup_batch_sizes=DEFAULT_WARMUP_BATCH_SIZES):
+        self.warmup_batch_sizes = tuple(warmup_batch_sizes)
+        self._active = (None, None)
+        self._swap_lock = threading.Lock()
+        self._listeners = []
+        self.loaded_at = None
+        self.warmup_seconds = None
+        self.swaps = 0
+        self.last_error = None
+
+    @property
+    def model(self):
+        return self._active[0]
+
+    @property
+    def version(self):
+        return self._active[1]
+
+    @property
+    def ready(self) -> bool:
+        return self._active[0] is not None
+
+    def on_swap(self, listener):
+        """Call `listener(model, version)` after every swap (e.g. to repoint a batcher)."""
+        self._listeners.append(listener)
+
+    def swap(self, model, version):
+        with self._swap_lock:
+            warmup_seconds = warm_up(model, self.warmup_batch_sizes)
+            previous = self._active[1]
+            self._active = (model, version)
+            self.loaded_at = time.time()
+            self.warmup_seconds = warmup_seconds
+            if previous is not None:
+                self.swaps += 1
+            for listener in self._listeners:
+                listener(model, version)
+        logger.info("Serving model version %s (warm-up %.3fs)", version, warmup_seconds)
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "model_version": self.version,
+            "loaded_at": self.loaded_at,
+            "warmup_seconds": self.warmup_seconds,
+            "swaps": self.swaps,
+            "last_error": self.last_error,
+        }
+
+
+class ModelWatcher:
+    """
+    Polls a versioned model directory and hot-swaps in newer versions.
+
+    Files named e.g. `v3.keras` or `2024-06-01.npz` are ordered by
+    `version_key`; whenever one sorts after the served version it is loaded
+    and warmed up on this background thread, then swapped in. A version that
+    fails to load is logged and skipped (falling back to the next newest)
+    until its file changes.
+    """
+
+    def __init__(self, served: ServedModel, directory: Path, loader, current=None,
+                 interval: float = DEFAULT_POLL_INTERVAL, settle: float = DEFAULT_SETTLE_SECONDS):
+        self.served = served
+        self.directory = Path(directory)
+        self.loader = loader
+        # Version (file stem) of the directory's model being served, if any;
+        # a model loaded from elsewhere is replaced by any version that appears
+        self.current = current
+        self.interval = interval
+        self.settle = settle
+        self._failed = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def check(self):
+        """Swap in the newest loadable version newer than the served one; return it or None."""
+        for candidate in reversed(list_versions(self.directory, self.settle)):
+            if self.current is not None and version_key(candidate.stem) <= version_key(self.current):
+                return None
+            mtime = candidate.stat().st_mtime
+            if self._failed.get(candidate) == mtime:
+                continue
+            try:
+                model = self.loader(candidate)
+                self.served.swap(model, candidate.stem)
+            except Exception as exc:
+                self._failed[candidate] = mtime
+                self.served.last_error = f"{candidate.name}: {exc}"
+                logger.exception("Could not load model version %s", candidate.name)
+                continue
+            self.current = candidate.stem
+            return candidate
+        return None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
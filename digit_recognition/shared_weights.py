@@ -0,0 +1,108 @@
+import json
+import os
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+
+from .numpy_model import NumpyDigitModel
+
+# Each array starts on a cache-line boundary inside the segment
+_ALIGNMENT = 64
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+class SharedWeights:
+    """
+    The weights of a `NumpyDigitModel` packed into one shared memory segment.
+
+    The serving process creates the segment once; every worker attaches to it
+    by `spec` and builds a model whose kernels and biases are read-only views
+    of the same physical pages, so N workers cost one copy of the weights.
+    """
+
+    def __init__(self, segment: shared_memory.SharedMemory, layout, activations, negative_slope,
+                 version=None, owner=False):
+        self.segment = segment
+        self.layout = layout
+        self.activations = list(activations)
+        self.negative_slope = float(negative_slope)
+        self.version = version
+        self.owner = owner
+
+    @classmethod
+    def create(cls, model: NumpyDigitModel, version=None) -> "SharedWeights":
+        """Copy the model's float32 weights into a new segment."""
+        arrays = [a for pair in zip(model.kernels, model.biases) for a in pair]
+        layout, offset = [], 0
+        for array in arrays:
+            offset = _aligned(offset)
+            layout.append((offset, list(array.shape)))
+            offset += array.nbytes
+        segment = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for array, (start, shape) in zip(arrays, layout):
+            np.ndarray(shape, dtype="float32", buffer=segment.buf, offset=start)[...] = array
+        return cls(segment, layout, model.activations, model.negative_slope, version, owner=True)
+
+    @classmethod
+    def attach(cls, spec: str) -> "SharedWeights":
+        """Attach to a segment described by another process's `spec`."""
+        info = json.loads(spec)
+        segment = shared_memory.SharedMemory(name=info["name"])
+        layout = [(offset, shape) for offset, shape in info["layout"]]
+        return cls(segment, layout, info["activations"], info["negative_slope"], info.get("version"))
+
+    @classmethod
+    def attach_published(cls, path: Path, attempts: int = 3) -> "SharedWeights":
+        """
+        Attach to the segment whose spec was last written to `path` by `publish`.
+
+        The publisher writes the new spec before removing the old segment, so
+        a spec that vanished between reading and attaching is simply re-read.
+        """
+        for attempt in range(attempts):
+            try:
+                return cls.attach(Path(path).read_text())
+            except FileNotFoundError:
+                if attempt == attempts - 1:
+                    raise
+
+    def publish(self, path: Path):
+        """Atomically write `spec` to `path` for `attach_published` to pick up."""
+        path = Path(path)
+        staged = path.with_name(path.name + ".tmp")
+        staged.write_text(self.spec)
+        os.replace(staged, path)
+
+    @property
+    def spec(self) -> str:
+        """JSON description of the segment, small enough to pass in an env var."""
+        return json.dumps({
+            "name": self.segment.name,
+            "layout": self.layout,
+            "activations": self.activations,
+            "negative_slope": self.negative_slope,
+            "version": self.version,
+        })
+
+    def model(self) -> NumpyDigitModel:
+        """A model backed directly by the shared pages (no copy)."""
+        arrays = []
+        for offset, shape in self.layout:
+            view = np.ndarray(shape, dtype="float32", buffer=self.segment.buf, offset=offset)
+            view.flags.writeable = False
+            arrays.append(view)
+        return NumpyDigitModel(arrays[0::2], arrays[1::2], self.activations, self.negative_slope)
+
+    @property
+    def nbytes(self) -> int:
+        return self.segment.size
+
+    def close(self):
+        """Detach; the creating process also removes the segment."""
+        self.segment.close()
+        if self.owner:
+            self.segment.unlink()
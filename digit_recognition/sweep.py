@@ -0,0 +1,199 @@
+import multiprocessing
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .data import load_mnist_data
+from .model import DEFAULT_ACTIVATION, DEFAULT_HIDDEN_UNITS
+from .numpy_model import NumpyDigitModel
+from .predict import predict_preprocessed_batch
+
+DEFAULT_ARCHITECTURES = ("32", "64", "128", "32x2", "64x2", "128x2", "256x2")
+DEFAULT_LATENCY_BATCH = 256
+LATENCY_METRICS = ("single", "batch")
+
+
+def parse_architecture(spec: str) -> Tuple[int, ...]:
+    """Hidden layer widths from "128x2" (two 128-unit layers) or "256,64"."""
+    spec = spec.strip()
+    match = re.fullmatch(r"(\d+)x(\d+)", spec)
+    if match:
+        return (int(match.group(1)),) * int(match.group(2))
+    widths = tuple(int(part) for part in spec.split(",") if part.strip())
+    if not widths or min(widths) < 1:
+        raise ValueError(f"Invalid architecture {spec!r}; expected e.g. '128x2' or '256,64'")
+    return widths
+
+
+def architecture_name(hidden_units, activation) -> str:
+    units = list(hidden_units)
+    if len(set(units)) == 1:
+        widths = f"{units[0]}x{len(units)}"
+    else:
+        widths = ",".join(str(u) for u in units)
+    return f"{widths}-{activation}"
+
+
+def _limit_threads(threads: int):
+    # Set before TensorFlow is imported in the worker so every pool honours it
+    for name in ("OMP_NUM_THREADS", "TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS"):
+        os.environ[name] = str(threads)
+
+
+def train_candidate(hidden_units, activation, output_dir: Path, epochs: int, patience: int,
+                    batch_size: int, threads: int):
+    """
+    Train one candidate (runs in a worker process) and export its weights.
+
+    Returns (test_loss, test_accuracy, train_seconds, weights_path).
+    """
+    import tensorflow as tf
+
+    from .model import train_model_streaming
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(threads)
+
+    name = architecture_name(hidden_units, activation)
+    output_dir = Path(output_dir)
+    checkpoint_dir = output_dir / "checkpoints" / name
+    shutil.rmtree(checkpoint_dir, ignore_errors=True)
+    start = time.perf_counter()
+    model, (test_loss, test_accuracy) = train_model_streaming(
+        epochs=epochs,
+        save_path=output_dir / f"{name}.keras",
+        batch_size=batch_size,
+        patience=patience,
+        checkpoint_dir=checkpoint_dir,
+        verbose=0,
+        hidden_units=hidden_units,
+        activation=activation,
+    )
+    train_seconds = time.perf_counter() - start
+    shutil.rmtree(checkpoint_dir, ignore_errors=True)
+    weights_path = NumpyDigitModel.from_keras(model).save(output_dir / f"{name}.npz")
+    return test_loss, test_accuracy, train_seconds, str(weights_path)
+
+
+def measure_latency(model, batch_size: int, repeats: int, warmup: int = 5) -> float:
+    """Median milliseconds per `predict_preprocessed_batch` call on random input."""
+    x = np.random.default_rng(0).random((batch_size, 28, 28), dtype=np.float32)
+    for _ in range(warmup):
+        predict_preprocessed_batch(model, x)
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict_preprocessed_batch(model, x)
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples) * 1000)
+
+
+def pareto_front(results, latency_metric: str = "batch"):
+    """Flag results that no other result beats on both test accuracy and latency."""
+    key = _latency_key(latency_metric)
+    for result in results:
+        accuracy, latency = result["test_accuracy"], result[key]
+        result["pareto"] = not any(
+            other["test_accuracy"] >= accuracy
+            and other[key] <= latency
+            and (other["test_accuracy"] > accuracy or other[key] < latency)
+            for other in results
+        )
+    return [result for result in results if result["pareto"]]
+
+
+def _latency_key(latency_metric):
+    if latency_metric not in LATENCY_METRICS:
+        raise ValueError(f"latency_metric must be one of {LATENCY_METRICS}")
+    return "single_ms" if latency_metric == "single" else "batch_us_per_image"
+
+
+def run_sweep(
+    candidates,
+    output_dir: Path,
+    epochs: int,
+    patience: Optional[int],
+    batch_size: int,
+    jobs: int = None,
+    threads_per_job: int = 1,
+    repeats: int = 200,
+    latency_batch: int = DEFAULT_LATENCY_BATCH,
+    latency_metric: str = "batch",
+    progress=None,
+):
+    """
+    Train every (hidden_units, activation) candidate in parallel, then
+    benchmark them one at a time.
+
+    Training runs in `jobs` spawned processes limited to `threads_per_job`
+    threads each, so candidates don't fight over cores. Latency is measured
+    afterwards in this process with the NumPy backend (the serving path), one
+    model at a time, so the numbers aren't skewed by concurrent training.
+    Returns one result dict per candidate, in input order.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    jobs = jobs or max(1, (os.cpu_count() or 1) // threads_per_job)
+
+    # Build the MNIST cache once here; otherwise every worker finds it cold and rebuilds it
+    load_mnist_data()
+    trained = {}
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=jobs, mp_context=context, initializer=_limit_threads, initargs=(threads_per_job,)
+    ) as executor:
+        futures = {
+            executor.submit(
+                train_candidate, tuple(hidden_units), activation, output_dir, epochs, patience,
+                batch_size, threads_per_job,
+            ): (tuple(hidden_units), activation)
+            for hidden_units, activation in candidates
+        }
+        for future in as_completed(futures):
+            trained[futures[future]] = future.result()
+            if progress:
+                name = architecture_name(*futures[future])
+                progress(f"trained {name}: test accuracy {trained[futures[future]][1]:.4f}")
+
+    results = []
+    for hidden_units, activation in candidates:
+        hidden_units = tuple(hidden_units)
+        test_loss, test_accuracy, train_seconds, weights_path = trained[(hidden_units, activation)]
+        model = NumpyDigitModel.load(Path(weights_path))
+        batch_ms = measure_latency(model, latency_batch, max(repeats // 10, 5))
+        results.append({
+            "name": architecture_name(hidden_units, activation),
+            "hidden_units": list(hidden_units),
+            "activation": activation,
+            "params": model.count_params(),
+            "test_accuracy": float(test_accuracy),
+            "test_loss": float(test_loss),
+            "train_seconds": train_seconds,
+            "single_ms": measure_latency(model, 1, repeats),
+            "batch_us_per_image": batch_ms * 1000 / latency_batch,
+            "weights": weights_path,
+            "current": hidden_units == tuple(DEFAULT_HIDDEN_UNITS) and activation == DEFAULT_ACTIVATION,
+        })
+    pareto_front(results, latency_metric)
+    return results
+
+
+def format_table(results, latency_metric: str = "batch") -> str:
+    """Plain-text report, fastest first; `*` marks the Pareto frontier."""
+    key = _latency_key(latency_metric)
+    header = f"{'':2}{'architecture':<22}{'params':>10}{'accuracy':>10}{'single ms':>11}{'batch us/img':>14}"
+    lines = [header, "-" * len(header)]
+    for result in sorted(results, key=lambda r: r[key]):
+        marker = "* " if result["pareto"] else "  "
+        note = "  (current)" if result["current"] else ""
+        lines.append(
+            f"{marker}{result['name']:<22}{result['params']:>10,}{result['test_accuracy']:>10.4f}"
+            f"{result['single_ms']:>11.3f}{result['batch_us_per_image']:>14.2f}{note}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,124 @@
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from .paths import TFLITE_MODEL_PATH
+
+# Batches are run through a second interpreter of this fixed size, padding the
+# last chunk, so the interpreter never has to be resized and reallocated
+DEFAULT_CHUNK_SIZE = 32
+
+
+def tflite_model_path(dynamic_range: bool = False) -> Path:
+    """Default location of the float32 or dynamic-range quantized flatbuffer."""
+    if dynamic_range:
+        return TFLITE_MODEL_PATH.with_suffix(".dynamic.tflite")
+    return TFLITE_MODEL_PATH
+
+
+def _interpreter_class():
+    # Prefer the standalone runtimes, which don't need TensorFlow installed
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+def export_tflite(model, path: Path = None, dynamic_range: bool = False) -> Path:
+    """
+    Convert a Keras model to a `.tflite` flatbuffer.
+
+    With `dynamic_range=True` the weights are stored as int8 and dequantized
+    on the fly by the interpreter (TFLite's dynamic-range quantization).
+    """
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if dynamic_range:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    path = Path(path or tflite_model_path(dynamic_range))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(converter.convert())
+    return path
+
+
+class _Runner:
+    """One interpreter allocated for a fixed batch size, with its input tensor."""
+
+    def __init__(self, interpreter_class, content, batch_size, num_threads):
+        self.interpreter = interpreter_class(model_content=content, num_threads=num_threads)
+        input_details = self.interpreter.get_input_details()[0]
+        self.input_index = input_details["index"]
+        self.output_index = self.interpreter.get_output_details()[0]["index"]
+        if input_details["shape"][0] != batch_size:
+            self.interpreter.resize_tensor_input(
+                self.input_index, [batch_size, *input_details["shape"][1:]]
+            )
+        self.interpreter.allocate_tensors()
+        self.input = np.zeros(self.interpreter.get_input_details()[0]["shape"], dtype="float32")
+
+    def run(self, x):
+        self.input[:len(x)] = x
+        self.input[len(x):] = 0.0
+        self.interpreter.set_tensor(self.input_index, self.input)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index)[:len(x)].copy()
+
+
+class TFLiteDigitModel:
+    """
+    Runs a `.tflite` export through the TFLite interpreter.
+
+    Interpreters are not thread-safe, so every thread that predicts lazily
+    gets its own pair (one for single images, one for `chunk_size` batches),
+    each with a preallocated input buffer. Exposes the same `predict`
+    interface as the Keras and NumPy models.
+    """
+
+    def __init__(self, path: Path = TFLITE_MODEL_PATH, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 num_threads: int = 1):
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"TFLite model not found at {path}")
+        self.path = path
+        self.chunk_size = chunk_size
+        self.num_threads = num_threads
+        self._content = path.read_bytes()
+        self._interpreter_class = _interpreter_class()
+        self._local = threading.local()
+        runner = self._runner(1)
+        self.input_size = int(np.prod(runner.input.shape[1:]))
+        self._input_shape = tuple(runner.input.shape[1:])
+
+    def predict(self, x, batch_size=None, verbose=0):
+        """Return class probabilities of shape (N, 10) for an (N, 28, 28) batch."""
+        x = np.asarray(x, dtype="float32").reshape((-1, *self._input_shape))
+        if len(x) == 1:
+            return self._runner(1).run(x)
+        runner = self._runner(self.chunk_size)
+        if len(x) == 0:
+            return np.empty((0, runner.interpreter.get_output_details()[0]["shape"][-1]), dtype="float32")
+        return np.concatenate(
+            [runner.run(x[i:i + self.chunk_size]) for i in range(0, len(x), self.chunk_size)]
+        )
+
+    def __call__(self, x):
+        return self.predict(x)
+
+    def _runner(self, batch_size):
+        runners = getattr(self._local, "runners", None)
+        if runners is None:
+            runners = self._local.runners = {}
+        runner = runners.get(batch_size)
+        if runner is None:
+            runner = runners[batch_size] = _Runner(
+                self._interpreter_class, self._content, batch_size, self.num_threads
+            )
+        return runner
@@ -39,14 +39,18 @@ def check_model():
             return False
     return True
 
-def run_web():
-    """Run the web interface."""
+def run_web(workers=0, extra_args=()):
+    """Run the web interface (pre-forked worker processes when workers > 0)."""
     print("🌐 Starting web interface...")
     print("   Open http://localhost:5000 in your browser")
     print("   Press Ctrl+C to stop\n")
     try:
-        web_app = PROJECT_ROOT / 'apps' / 'web_app.py'
-        subprocess.run([sys.executable, str(web_app)], cwd=str(PROJECT_ROOT))
+        if workers:
+            serve = PROJECT_ROOT / 'apps' / 'serve.py'
+            command = [sys.executable, str(serve), '--workers', str(workers), *extra_args]
+        else:
+            command = [sys.executable, str(PROJECT_ROOT / 'apps' / 'web_app.py')]
+        subprocess.run(command, cwd=str(PROJECT_ROOT))
     except KeyboardInterrupt:
         print("\n\n👋 Web interface stopped.")
 
@@ -60,12 +64,16 @@ def run_gui():
     except KeyboardInterrupt:
         print("\n\n👋 GUI stopped.")
 
-def run_recognition():
+def run_recognition(extra_args=()):
     """Run the original recognition script."""
-    print("📸 Processing images from digits/ folder...\n")
+    if extra_args:
+        # Headless output may be streamed to stdout, so keep banners off it
+        print("📸 Running bulk recognition...\n", file=sys.stderr)
+    else:
+        print("📸 Processing images from digits/ folder...\n")
     try:
         recognition_script = PROJECT_ROOT / 'scripts' / 'recognition.py'
-        subprocess.run([sys.executable, str(recognition_script)], cwd=str(PROJECT_ROOT))
+        subprocess.run([sys.executable, str(recognition_script), *extra_args], cwd=str(PROJECT_ROOT))
     except KeyboardInterrupt:
         print("\n\n👋 Recognition stopped.")
 
@@ -76,8 +84,10 @@ def main():
         epilog="""
 Examples:
   python run.py web      # Start web interface
+  python run.py web --workers 4   # Serve with 4 pre-forked worker processes
   python run.py gui      # Start desktop GUI
   python run.py images   # Process images from digits/ folder
+  python run.py images --headless --jobs 8 scans/ --output results.jsonl
   python run.py          # Show interactive menu
         """
     )
@@ -89,7 +99,15 @@ Examples:
         help='Application mode to run'
     )
     
-    args = parser.parse_args()
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=0,
+        help='web: serve with N pre-forked worker processes sharing one copy of the weights'
+    )
+    
+    # Anything else (e.g. --headless --jobs N for images) goes to the selected app
+    args, extra_args = parser.parse_known_args()
     
     # Check model exists
     if not check_model():
@@ -98,11 +116,11 @@ Examples:
     # If mode specified, run directly
     if args.mode:
         if args.mode == 'web':
-            run_web()
+            run_web(args.workers, extra_args)
         elif args.mode == 'gui':
             run_gui()
         elif args.mode == 'images':
-            run_recognition()
+            run_recognition(extra_args)
         return
     
     # Interactive menu
@@ -0,0 +1,132 @@
+"""
+Build and calibrate the confidence-gated cascade, and report its escalation
+rate, accuracy delta and speed against always using the full model.
+
+    python scripts/cascade.py
+    python scripts/cascade.py --fast models/sweep/32x1-leaky_relu.npz --max-accuracy-drop 0.0005
+
+The first stage is a nearest-centroid classifier fitted on the training split
+(or any `.npz`/`.keras` model given with --fast). The threshold is the lowest
+one whose accuracy on the validation tail of the training split stays within
+--max-accuracy-drop of the full model; the report uses the test split. Both
+use raw MNIST scaled the way served images are (`preprocess_fast`), not the
+L2-normalized training arrays. Serve the result with `--backend cascade` or
+DIGIT_BACKEND=cascade.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from digit_recognition import MODEL_PATH, NumpyDigitModel, load_trained_model
+from digit_recognition.cascade import (
+    DEFAULT_MARGIN,
+    DEFAULT_MAX_ACCURACY_DROP,
+    CascadeModel,
+    calibrate_threshold,
+    cascade_report,
+    fit_nearest_centroid,
+    save_cascade,
+)
+from digit_recognition.data import load_mnist_data, to_serving_scale
+from digit_recognition.model import DEFAULT_VALIDATION_SPLIT
+from digit_recognition.paths import CASCADE_MODEL_PATH
+
+
+def predict_all(model, x, batch_size):
+    return np.concatenate([
+        np.asarray(model.predict(to_serving_scale(x[i:i + batch_size]), verbose=0))
+        for i in range(0, len(x), batch_size)
+    ])
+
+
+def images_per_second(model, x, batch_size):
+    x = to_serving_scale(x)
+    model.predict(x[:batch_size], verbose=0)  # warm-up
+    start = time.perf_counter()
+    for i in range(0, len(x), batch_size):
+        model.predict(x[i:i + batch_size], verbose=0)
+    return len(x) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--model", type=Path, default=MODEL_PATH, help="Full (second-stage) model")
+    parser.add_argument("--fast", type=Path, help="First-stage model (default: fit a nearest-centroid classifier)")
+    parser.add_argument(
+        "--max-accuracy-drop", type=float, default=DEFAULT_MAX_ACCURACY_DROP,
+        help="Accuracy the cascade may lose against the full model on validation data (0.001 = 0.1 points)",
+    )
+    parser.add_argument("--threshold", type=float, help="Use this confidence threshold instead of calibrating")
+    parser.add_argument("--margin", type=float, default=DEFAULT_MARGIN, help="Also escalate when top-2 probabilities are closer than this")
+    parser.add_argument("--batch-size", type=int, default=256, help="Batch size for the throughput comparison")
+    parser.add_argument("--output", type=Path, default=CASCADE_MODEL_PATH, help="Where the calibrated first stage is saved")
+    parser.add_argument("--json", type=Path, help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    (x_train, y_train), (x_test, y_test) = load_mnist_data(normalize=False)
+    split = int(len(x_train) * (1 - DEFAULT_VALIDATION_SPLIT))
+    full = load_trained_model(args.model)
+
+    if args.fast:
+        fast = load_trained_model(args.fast)
+        if not isinstance(fast, NumpyDigitModel):
+            fast = NumpyDigitModel.from_keras(fast)
+        print(f"First stage: {args.fast} ({fast.count_params():,} parameters)")
+    else:
+        fast = fit_nearest_centroid(x_train[:split], y_train[:split])
+        print(f"First stage: nearest centroid ({fast.count_params():,} parameters)")
+
+    if args.threshold is None:
+        x_val, y_val = x_train[split:], np.asarray(y_train[split:])
+        calibration = calibrate_threshold(
+            predict_all(fast, x_val, args.batch_size), predict_all(full, x_val, args.batch_size), y_val,
+            args.max_accuracy_drop, args.margin,
+        )
+        threshold = calibration["threshold"]
+        print(
+            f"Calibrated threshold {threshold:.4f} on {len(y_val)} validation images "
+            f"({calibration['escalation_rate']:.1%} escalated, "
+            f"{calibration['accuracy_delta'] * 100:+.2f} points vs full model)"
+        )
+    else:
+        calibration, threshold = None, args.threshold
+
+    path = save_cascade(fast, threshold, args.margin, args.output)
+    cascade = CascadeModel.load(full, path)
+
+    y_test = np.asarray(y_test)
+    report = cascade_report(
+        predict_all(fast, x_test, args.batch_size), predict_all(full, x_test, args.batch_size), y_test,
+        threshold, args.margin,
+    )
+    report["full_images_per_second"] = images_per_second(full, x_test, args.batch_size)
+    report["cascade_images_per_second"] = images_per_second(cascade, x_test, args.batch_size)
+    report["speedup"] = report["cascade_images_per_second"] / report["full_images_per_second"]
+
+    print(f"\nTest split ({report['images']} images):")
+    print(f"  escalated to full model   {report['escalation_rate']:.1%}")
+    print(f"  first stage alone         {report['fast_accuracy'] * 100:.2f}%")
+    print(f"  full model alone          {report['full_accuracy'] * 100:.2f}%")
+    print(f"  cascade                   {report['cascade_accuracy'] * 100:.2f}% ({report['accuracy_delta'] * 100:+.2f} points)")
+    print(
+        f"  throughput                {report['cascade_images_per_second']:,.0f} vs "
+        f"{report['full_images_per_second']:,.0f} images/s ({report['speedup']:.1f}x)"
+    )
+    print(f"\n✓ Cascade first stage saved to {path}")
+    if args.json:
+        args.json.write_text(json.dumps({"calibration": calibration, "test": report}, indent=2))
+        print(f"✓ Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
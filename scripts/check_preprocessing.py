@@ -0,0 +1,149 @@
+"""
+Check that the serving preprocessing (`preprocess_fast`, area averaging)
+predicts the same digits as the LANCZOS resize it replaced.
+
+    python scripts/check_preprocessing.py
+    python scripts/check_preprocessing.py --images my_digits/ --min-agreement 0.995
+    python scripts/check_preprocessing.py --backend int8 --limit 2000 --json agreement.json
+
+Every labelled image goes through both pipelines: the old one resized the
+grayscale image to 28x28 with LANCZOS and then ran `preprocess_image_array`,
+the new one hands the full-size image to `preprocess_fast`. The report gives
+the argmax agreement between the two, each one's accuracy and the mean
+per-pixel difference. Without --images, MNIST test digits are drawn as they
+would be on the app's canvas (dark on light, upscaled to --canvas-size).
+Exits with status 1 when agreement is below --min-agreement.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from digit_recognition import MODEL_PATH, load_trained_model, preprocess_fast, preprocess_image_array
+from digit_recognition.data import load_mnist_data
+from digit_recognition.evaluation import labelled_images
+from digit_recognition.model import BACKENDS, DEFAULT_BACKEND
+from digit_recognition.predict import predict_preprocessed_batch
+
+DEFAULT_CANVAS_SIZE = 250
+DEFAULT_MIN_AGREEMENT = 0.99
+
+
+def preprocess_lanczos(gray):
+    """The preprocessing the web app and GUI used before `preprocess_fast`."""
+    resized = np.array(Image.fromarray(gray).resize((28, 28), Image.Resampling.LANCZOS))
+    return preprocess_image_array(resized)[0]
+
+
+def mnist_canvases(limit, canvas_size):
+    """(grayscale canvas, label) pairs: MNIST test digits, dark on light, at canvas size."""
+    _, (x_test, y_test) = load_mnist_data(normalize=False)
+    for image, label in zip(x_test[:limit], y_test[:limit]):
+        canvas = Image.fromarray(255 - np.asarray(image)).resize((canvas_size, canvas_size), Image.Resampling.BILINEAR)
+        yield np.asarray(canvas), int(label)
+
+
+def image_files(inputs, manifest):
+    labels, _ = labelled_images(inputs, manifest)
+    for path, label in labels.items():
+        try:
+            with Image.open(path) as img:
+                gray = np.asarray(img.convert("L"))
+        except OSError as exc:
+            print(f"✗ Skipping {path}: {exc}", file=sys.stderr)
+            continue
+        yield gray, label
+
+
+def compare(model, samples, batch_size):
+    old_digits, new_digits, labels, pixel_diffs = [], [], [], []
+
+    def flush(old, new):
+        old, new = np.stack(old), np.stack(new)
+        old_digits.append(predict_preprocessed_batch(model, old)[0])
+        new_digits.append(predict_preprocessed_batch(model, new)[0])
+        pixel_diffs.append(np.abs(old - new).mean(axis=(1, 2)))
+
+    old, new = [], []
+    for gray, label in samples:
+        old.append(preprocess_lanczos(gray))
+        new.append(preprocess_fast(gray)[0])
+        labels.append(label)
+        if len(old) == batch_size:
+            flush(old, new)
+            old, new = [], []
+    if old:
+        flush(old, new)
+    if not labels:
+        return None
+
+    old_digits, new_digits = np.concatenate(old_digits), np.concatenate(new_digits)
+    labels = np.asarray(labels)
+    return {
+        "images": len(labels),
+        "agreement": float(np.mean(old_digits == new_digits)),
+        "disagreements": int(np.count_nonzero(old_digits != new_digits)),
+        "lanczos_accuracy": float(np.mean(old_digits == labels)),
+        "fast_accuracy": float(np.mean(new_digits == labels)),
+        "mean_pixel_difference": float(np.concatenate(pixel_diffs).mean()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--model", type=Path, default=MODEL_PATH, help="Model file (.keras, .npz or .tflite)")
+    parser.add_argument(
+        "--backend", default=DEFAULT_BACKEND, choices=BACKENDS,
+        help="Model backend (default: $DIGIT_BACKEND or keras)",
+    )
+    parser.add_argument("--images", action="append", default=[], help="Labelled image directory or glob (repeatable)")
+    parser.add_argument("--manifest", type=Path, help="Labels for the --images files (CSV or JSON)")
+    parser.add_argument("--limit", type=int, default=10000, help="MNIST test images used without --images")
+    parser.add_argument("--canvas-size", type=int, default=DEFAULT_CANVAS_SIZE, help="Canvas size MNIST digits are drawn at")
+    parser.add_argument("--batch-size", type=int, default=256, help="Images per forward pass")
+    parser.add_argument(
+        "--min-agreement", type=float, default=DEFAULT_MIN_AGREEMENT,
+        help="Fail when fewer predictions than this fraction agree",
+    )
+    parser.add_argument("--json", type=Path, help="Also write the report as JSON")
+    args = parser.parse_args()
+    if args.manifest and not args.images:
+        parser.error("--manifest labels the --images files")
+
+    model = load_trained_model(args.model, backend=args.backend)
+    if args.images:
+        samples, source = image_files(args.images, args.manifest), ", ".join(args.images)
+    else:
+        samples, source = mnist_canvases(args.limit, args.canvas_size), f"MNIST test at {args.canvas_size}px"
+
+    report = compare(model, samples, args.batch_size)
+    if report is None:
+        sys.exit("No labelled images to compare")
+    report.update(model=str(args.model), backend=args.backend, source=source)
+
+    print(f"{source}: {report['images']} images")
+    print(f"  argmax agreement      {report['agreement'] * 100:.2f}% ({report['disagreements']} differ)")
+    print(f"  LANCZOS accuracy      {report['lanczos_accuracy'] * 100:.2f}%")
+    print(f"  preprocess_fast       {report['fast_accuracy'] * 100:.2f}%")
+    print(f"  mean pixel difference {report['mean_pixel_difference']:.4f}")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"✓ Report written to {args.json}")
+    if report["agreement"] < args.min_agreement:
+        print(f"✗ Agreement below {args.min_agreement * 100:.2f}%")
+        sys.exit(1)
+    print(f"✓ Agreement at least {args.min_agreement * 100:.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Regression check: importing the package must not load TensorFlow."""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Runs in a fresh interpreter so modules imported by this script don't leak in
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import digit_recognition
+from digit_recognition import MODEL_PATH, predict_digit, preprocess_image_array
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "import_seconds": elapsed,
+    "tensorflow_loaded": any(
+        name == "tensorflow" or name.startswith("tensorflow.") for name in sys.modules
+    ),
+}))
+"""
+
+
+def check_startup():
+    """Import the package in a subprocess and report whether TensorFlow was loaded."""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=str(PROJECT_ROOT),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    report = check_startup()
+    print(f"import digit_recognition: {report['import_seconds'] * 1000:.1f} ms")
+    if report["tensorflow_loaded"]:
+        print("✗ tensorflow was imported at package import time")
+        sys.exit(1)
+    print("✓ tensorflow not loaded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Evaluate a model on the MNIST test split and labelled image directories.
+
+    python scripts/evaluate.py --output eval.json
+    python scripts/evaluate.py --backend int8 --images my_digits/ --skip-mnist
+    python scripts/evaluate.py --images digits/ --manifest digits/labels.csv
+    python scripts/evaluate.py --scale normalized
+
+Images are labelled by a single-digit parent directory (`7/a.png`), a leading
+digit in the filename (`7_a.png`), or a manifest (CSV with `path,label`
+columns or a JSON object of path -> label, paths relative to the manifest).
+MNIST test images are scaled as the app scales the images it serves unless
+--scale normalized asks for the L2-normalized training arrays; the scale is
+recorded in the report. Everything is streamed through batched inference, so
+memory stays bounded.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from digit_recognition import MODEL_PATH, load_trained_model
+from digit_recognition.evaluation import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CALIBRATION_BINS,
+    DEFAULT_MNIST_SCALE,
+    MNIST_SCALES,
+    evaluate_batches,
+    evaluate_images,
+    mnist_test_batches,
+)
+from digit_recognition.model import BACKENDS, DEFAULT_BACKEND
+
+
+def print_summary(name, report):
+    print(f"\n{name}: {report['images']} images", end="")
+    if report.get("errors") or report.get("unlabelled"):
+        print(f" ({report['errors']} unreadable, {report.get('unlabelled', 0)} unlabelled)", end="")
+    print()
+    if not report["images"]:
+        return
+    print(f"  accuracy      {report['accuracy'] * 100:.2f}%")
+    print(f"  ECE           {report['calibration']['expected_calibration_error']:.4f}")
+    print(f"  throughput    {report['images_per_second']:,.0f} images/s "
+          f"({report['inference_images_per_second']:,.0f} images/s inference only)")
+    print(f"  {'digit':>5}{'precision':>11}{'recall':>9}{'support':>9}")
+    for digit, stats in report["per_class"].items():
+        print(f"  {digit:>5}{stats['precision'] * 100:>10.1f}%{stats['recall'] * 100:>8.1f}%{stats['support']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--model", type=Path, default=MODEL_PATH, help="Model file (.keras, .npz or .tflite)")
+    parser.add_argument(
+        "--backend", default=DEFAULT_BACKEND, choices=BACKENDS,
+        help="Model backend (default: $DIGIT_BACKEND or keras)",
+    )
+    parser.add_argument("--images", action="append", default=[], help="Labelled image directory or glob (repeatable)")
+    parser.add_argument("--manifest", type=Path, help="Labels for the --images files (CSV or JSON)")
+    parser.add_argument("--skip-mnist", action="store_true", help="Don't evaluate the MNIST test split")
+    parser.add_argument("--limit", type=int, help="Only the first N MNIST test images")
+    parser.add_argument(
+        "--scale", default=DEFAULT_MNIST_SCALE, choices=MNIST_SCALES,
+        help="MNIST scaling: as served images are scaled (default) or L2-normalized as in training",
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Images per forward pass")
+    parser.add_argument("--jobs", type=int, help="Image decode worker processes (default: CPU count)")
+    parser.add_argument("--bins", type=int, default=DEFAULT_CALIBRATION_BINS, help="Calibration bins")
+    parser.add_argument("--output", type=Path, help="Write the full report as JSON")
+    args = parser.parse_args()
+    if args.skip_mnist and not args.images:
+        parser.error("nothing to evaluate: give --images or drop --skip-mnist")
+    if args.manifest and not args.images:
+        parser.error("--manifest labels the --images files")
+
+    model = load_trained_model(args.model, backend=args.backend)
+    results = {
+        "model": str(args.model),
+        "backend": args.backend,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "datasets": {},
+    }
+
+    if not args.skip_mnist:
+        report = evaluate_batches(model, mnist_test_batches(args.batch_size, args.limit, args.scale), args.bins)
+        report["scale"] = args.scale
+        results["datasets"]["mnist_test"] = report
+        print_summary(f"MNIST test ({args.scale} scale)", report)
+    if args.images:
+        report = evaluate_images(model, args.images, args.manifest, args.jobs, args.batch_size, args.bins)
+        results["datasets"]["images"] = report
+        print_summary(", ".join(args.images), report)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"\n✓ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
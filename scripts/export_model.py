@@ -0,0 +1,80 @@
+"""Export the trained Keras model to lightweight inference formats."""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from digit_recognition import (
+    MODEL_PATH,
+    NUMPY_MODEL_PATH,
+    NumpyDigitModel,
+    TFLiteDigitModel,
+    export_numpy_weights,
+    export_tflite,
+    load_trained_model,
+)
+from digit_recognition.data import load_mnist_data
+from digit_recognition.tflite_model import tflite_model_path
+
+DEFAULT_TOLERANCE = 1e-4
+# int8 weights shift probabilities by up to a few percent; predictions must still agree
+DYNAMIC_RANGE_TOLERANCE = 0.05
+
+
+def verify_export(keras_model, exported_model, samples=1000, tolerance=DEFAULT_TOLERANCE):
+    """Compare an exported model's outputs with Keras on the MNIST test split."""
+    _, (x_test, _) = load_mnist_data()
+    x = np.asarray(x_test[:samples], dtype="float32")
+    expected = np.asarray(keras_model.predict(x, verbose=0))
+    actual = exported_model.predict(x)
+    max_diff = float(np.max(np.abs(expected - actual)))
+    agreement = float(np.mean(expected.argmax(axis=1) == actual.argmax(axis=1)))
+    print(f"  Max abs difference: {max_diff:.2e} (tolerance {tolerance:.0e})")
+    print(f"  Top-1 agreement:    {agreement * 100:.2f}% over {len(x)} images")
+    return max_diff <= tolerance
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", type=Path, default=MODEL_PATH, help="Keras model to export")
+    parser.add_argument("--format", choices=["numpy", "tflite"], default="numpy", help="Export format")
+    parser.add_argument("--dynamic-range", action="store_true", help="tflite: quantize weights to int8 (dynamic range)")
+    parser.add_argument("--output", type=Path, help="Destination (default: models/handwritten_digits.weights.npz or .tflite)")
+    parser.add_argument("--samples", type=int, default=1000, help="Test images used for verification")
+    parser.add_argument("--tolerance", type=float, help=f"Max abs probability difference (default {DEFAULT_TOLERANCE:.0e}, {DYNAMIC_RANGE_TOLERANCE} with --dynamic-range)")
+    parser.add_argument("--skip-verify", action="store_true", help="Do not compare against Keras")
+    args = parser.parse_args()
+    if args.dynamic_range and args.format != "tflite":
+        parser.error("--dynamic-range requires --format tflite")
+    tolerance = args.tolerance
+    if tolerance is None:
+        tolerance = DYNAMIC_RANGE_TOLERANCE if args.dynamic_range else DEFAULT_TOLERANCE
+
+    print(f"Loading Keras model from {args.model}...")
+    keras_model = load_trained_model(args.model)
+
+    if args.format == "tflite":
+        path = export_tflite(keras_model, args.output or tflite_model_path(args.dynamic_range), args.dynamic_range)
+        print(f"✓ TFLite model written to {path} ({path.stat().st_size / 1024:.1f} KiB)")
+        backend, load = "TFLite", TFLiteDigitModel
+    else:
+        path = export_numpy_weights(keras_model, args.output or NUMPY_MODEL_PATH)
+        print(f"✓ NumPy weights written to {path} ({path.stat().st_size / 1024:.1f} KiB)")
+        backend, load = "NumPy", NumpyDigitModel.load
+
+    if args.skip_verify:
+        return
+    print("Verifying against Keras...")
+    if not verify_export(keras_model, load(path), args.samples, tolerance):
+        print(f"✗ {backend} backend does not match Keras within tolerance")
+        sys.exit(1)
+    print(f"✓ {backend} backend matches Keras")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Fine-tune the current model on a small set of newly labelled images, mixed
+with a replay sample of MNIST, and save it as a new model version only if
+held-out accuracy doesn't regress.
+
+    python scripts/fine_tune.py
+    python scripts/fine_tune.py my_digits/ --manifest labels.csv --epochs 5
+    python scripts/fine_tune.py --dry-run --json report.json
+
+Labels come from a single-digit parent directory (data/corrections/7/x.png,
+which is where the web app's /feedback endpoint stores corrections), a
+filename prefix (7_a.png) or --manifest, exactly as for scripts/evaluate.py.
+The starting model is the newest version in models/versions (or MODEL_PATH
+when there is none), and an accepted update is written as the next vN.keras
+there, so a running web app hot-swaps to it.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from digit_recognition import MODEL_PATH, MODEL_VERSIONS_DIR
+from digit_recognition.finetune import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_EPOCHS,
+    DEFAULT_HOLDOUT_FRACTION,
+    DEFAULT_LEARNING_RATE,
+    DEFAULT_MIN_REPLAY,
+    DEFAULT_MNIST_HOLDOUT,
+    DEFAULT_REPLAY_RATIO,
+    fine_tune_incremental,
+    load_labelled_samples,
+    load_trainable_model,
+    next_version_path,
+    save_atomically,
+)
+from digit_recognition.paths import CORRECTIONS_DIR
+from digit_recognition.serving import latest_version
+
+
+def format_accuracy(value):
+    return "n/a" if value is None else f"{value * 100:.2f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "inputs", nargs="*", type=Path, default=[CORRECTIONS_DIR],
+        help=f"Labelled image files or directories (default: {CORRECTIONS_DIR})",
+    )
+    parser.add_argument("--manifest", type=Path, help="CSV (path,label) or JSON {path: label} of labels")
+    parser.add_argument("--model", type=Path, help="Model to start from (default: newest version, else MODEL_PATH)")
+    parser.add_argument("--output", type=Path, help="Where to save an accepted model (default: next vN.keras in the versions dir)")
+    parser.add_argument("--epochs", type=int, default=DEFAULT_EPOCHS)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--learning-rate", type=float, default=DEFAULT_LEARNING_RATE)
+    parser.add_argument(
+        "--replay-ratio", type=int, default=DEFAULT_REPLAY_RATIO,
+        help="MNIST training images replayed per new image",
+    )
+    parser.add_argument("--min-replay", type=int, default=DEFAULT_MIN_REPLAY, help="Replay at least this many MNIST images")
+    parser.add_argument("--holdout", type=float, default=DEFAULT_HOLDOUT_FRACTION, help="Fraction of new images held out")
+    parser.add_argument("--mnist-holdout", type=int, default=DEFAULT_MNIST_HOLDOUT, help="MNIST test images checked for forgetting")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.0,
+        help="Accuracy either holdout may lose and still be accepted (0.001 = 0.1 points)",
+    )
+    parser.add_argument("--jobs", type=int, help="Image decoding processes (default: all cores)")
+    parser.add_argument("--seed", type=int, help="Seed for the holdout split and replay sample")
+    parser.add_argument("--dry-run", action="store_true", help="Report only; never save")
+    parser.add_argument("--json", type=Path, help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    start_path = args.model or latest_version(MODEL_VERSIONS_DIR, settle=0) or MODEL_PATH
+    x_new, y_new, unlabelled, failed = load_labelled_samples(args.inputs, args.manifest, args.jobs)
+    print(f"New samples: {len(y_new)} labelled ({unlabelled} unlabelled, {failed} unreadable skipped)")
+    if not len(y_new):
+        sys.exit("No labelled images to fine-tune on")
+
+    model = load_trainable_model(start_path)
+    print(f"Fine-tuning {start_path}")
+    report = fine_tune_incremental(
+        model, x_new, y_new,
+        replay_ratio=args.replay_ratio,
+        min_replay=args.min_replay,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        learning_rate=args.learning_rate,
+        holdout_fraction=args.holdout,
+        mnist_holdout=args.mnist_holdout,
+        tolerance=args.tolerance,
+        seed=args.seed,
+    )
+    report["model"] = str(start_path)
+
+    trained = report["trained_on"]
+    print(f"  trained on {trained['new']} new + {trained['replay']} replayed images in {report['train_seconds']:.1f}s")
+    for name, label in (("mnist", "MNIST holdout"), ("new", "new-sample holdout")):
+        print(
+            f"  {label:<20} {format_accuracy(report['before'][name])} -> {format_accuracy(report['after'][name])}"
+            f" ({report['holdout'][name]} images)"
+        )
+
+    report["saved"] = None
+    # Too few new images for a holdout: only the MNIST check could run
+    status = "✓ Accepted" if report["verified"] else "? Unverified: no new-sample holdout, MNIST did not regress"
+    if not report["accepted"]:
+        print(f"✗ Rejected: accuracy regressed on {', '.join(report['regressions'])}; nothing saved")
+    elif args.dry_run:
+        print(f"{status} (dry run, nothing saved)")
+    else:
+        path = save_atomically(model, args.output or next_version_path(MODEL_VERSIONS_DIR))
+        report["saved"] = str(path)
+        print(f"{status}; saved to {path}")
+    print(f"  total {report['seconds']:.1f}s")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"✓ Report written to {args.json}")
+    if not report["accepted"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Prune and compact the trained model and report size, latency and accuracy per pruning level."""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from digit_recognition import MODEL_PATH, NumpyDigitModel, load_trained_model
+from digit_recognition.data import load_mnist_data
+from digit_recognition.prune import (
+    DEFAULT_FINE_TUNE_EPOCHS,
+    DEFAULT_LEVELS,
+    measured_sparsity,
+    nonzero_params,
+    prune_progressively,
+)
+from digit_recognition.sweep import measure_latency
+
+BATCH_SIZES = (1, 32, 256)
+
+
+def accuracy(model, x, y):
+    return float(np.mean(model.predict(x).argmax(axis=1) == y))
+
+
+def describe(level, model, dense_params, path, x_test, y_test, repeats):
+    return {
+        "level": level,
+        "sparsity": measured_sparsity(model, dense_params),
+        "hidden_units": [kernel.shape[1] for kernel in model.kernels[:-1]],
+        "params": model.count_params(),
+        "nonzero_params": nonzero_params(model),
+        "path": str(path),
+        "size_bytes": Path(path).stat().st_size,
+        "accuracy": accuracy(model, x_test, y_test),
+        "latency_ms": {
+            batch_size: measure_latency(model, batch_size, repeats) for batch_size in BATCH_SIZES
+        },
+    }
+
+
+def build_report(model_path=MODEL_PATH, levels=DEFAULT_LEVELS, fine_tune_epochs=DEFAULT_FINE_TUNE_EPOCHS,
+                 output_dir=PROJECT_ROOT / "models" / "pruned", repeats=50):
+    keras_model = load_trained_model(model_path)
+    _, (x_test, y_test) = load_mnist_data()
+    x_test = np.asarray(x_test, dtype="float32")
+
+    baseline = NumpyDigitModel.from_keras(keras_model)
+    dense_params = baseline.count_params()
+    rows = [describe(0.0, baseline, dense_params, baseline.save(Path(output_dir) / "pruned_00.npz"), x_test, y_test, repeats)]
+    for level, compacted, paths in prune_progressively(
+        keras_model, levels, fine_tune_epochs, output_dir,
+        progress=lambda message: print(f"  {message}", flush=True),
+    ):
+        rows.append(describe(level, compacted, dense_params, paths[0], x_test, y_test, repeats))
+    return rows
+
+
+def print_report(rows):
+    header = f"{'level':>6}{'sparsity':>10}  {'hidden units':<14}{'nonzero':>10}{'size (KiB)':>12}{'accuracy':>10}"
+    header += "".join(f"{f'batch {b} (ms)':>16}" for b in BATCH_SIZES)
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        widths = "x".join(str(units) for units in row["hidden_units"])
+        line = f"{row['level'] * 100:>5.0f}%{row['sparsity'] * 100:>9.1f}%  {widths:<14}{row['nonzero_params']:>10,}"
+        line += f"{row['size_bytes'] / 1024:>12.1f}{row['accuracy'] * 100:>9.2f}%"
+        line += "".join(f"{row['latency_ms'][b]:>16.3f}" for b in BATCH_SIZES)
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", type=Path, default=MODEL_PATH, help="Trained Keras model")
+    parser.add_argument(
+        "--levels", type=float, nargs="+", default=list(DEFAULT_LEVELS),
+        help="Pruning levels (0-1), applied progressively in increasing order",
+    )
+    parser.add_argument("--fine-tune-epochs", type=int, default=DEFAULT_FINE_TUNE_EPOCHS, help="Epochs of masked fine-tuning per level")
+    parser.add_argument("--output-dir", type=Path, default=PROJECT_ROOT / "models" / "pruned", help="Where compacted models are saved")
+    parser.add_argument("--repeats", type=int, default=50, help="Timed calls per batch size")
+    parser.add_argument("--json", type=Path, help="Also write the report to this JSON file")
+    args = parser.parse_args()
+    if not all(0 < level < 1 for level in args.levels):
+        parser.error("--levels must be between 0 and 1")
+
+    print(f"Pruning {args.model} at {', '.join(f'{level:.0%}' for level in sorted(args.levels))}...")
+    rows = build_report(args.model, args.levels, args.fine_tune_epochs, args.output_dir, args.repeats)
+    print()
+    print_report(rows)
+    print(f"\nCompacted models saved to {args.output_dir}")
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2))
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
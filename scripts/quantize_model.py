@@ -0,0 +1,99 @@
+"""Quantize the trained model and report accuracy, size and latency per format."""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from digit_recognition import MODEL_PATH, NumpyDigitModel, load_trained_model
+from digit_recognition.data import load_mnist_data
+from digit_recognition.quantize import (
+    FORMATS,
+    load_numpy_model,
+    quantized_model_path,
+    save_quantized,
+)
+
+BATCH_SIZES = (1, 32, 256)
+
+
+def time_batches(model, x, batch_sizes=BATCH_SIZES, repeats=50):
+    """Median latency in milliseconds of one `predict` call per batch size."""
+    latencies = {}
+    for batch_size in batch_sizes:
+        batch = x[:batch_size]
+        model.predict(batch, verbose=0)  # warm-up
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.predict(batch, verbose=0)
+            timings.append(time.perf_counter() - start)
+        latencies[batch_size] = float(np.median(timings) * 1000)
+    return latencies
+
+
+def accuracy(model, x, y):
+    probabilities = np.asarray(model.predict(x, verbose=0))
+    return float(np.mean(probabilities.argmax(axis=1) == y))
+
+
+def build_report(model_path=MODEL_PATH, repeats=50):
+    keras_model = load_trained_model(model_path)
+    reference = NumpyDigitModel.from_keras(keras_model)
+    _, (x_test, y_test) = load_mnist_data()
+    x_test = np.asarray(x_test, dtype="float32")
+
+    candidates = [("keras", keras_model, model_path)]
+    for fmt in FORMATS:
+        path = save_quantized(reference, fmt, quantized_model_path(fmt))
+        candidates.append((fmt, load_numpy_model(path), path))
+        if fmt == "int8":
+            candidates.append(
+                ("int8-integer", load_numpy_model(path, integer_arithmetic=True), path)
+            )
+
+    rows = []
+    for name, model, path in candidates:
+        rows.append({
+            "format": name,
+            "path": str(path),
+            "size_bytes": Path(path).stat().st_size,
+            "accuracy": accuracy(model, x_test, y_test),
+            "latency_ms": time_batches(model, x_test, repeats=repeats),
+        })
+    return rows
+
+
+def print_report(rows):
+    header = f"{'format':<14}{'size (KiB)':>12}{'accuracy':>10}"
+    header += "".join(f"{f'batch {b} (ms)':>16}" for b in BATCH_SIZES)
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        line = f"{row['format']:<14}{row['size_bytes'] / 1024:>12.1f}{row['accuracy'] * 100:>9.2f}%"
+        line += "".join(f"{row['latency_ms'][b]:>16.3f}" for b in BATCH_SIZES)
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", type=Path, default=MODEL_PATH, help="Trained Keras model")
+    parser.add_argument("--repeats", type=int, default=50, help="Timed calls per batch size")
+    parser.add_argument("--json", type=Path, help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    rows = build_report(args.model, args.repeats)
+    print_report(rows)
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2))
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
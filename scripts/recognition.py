@@ -1,9 +1,9 @@
+import argparse
 import sys
 from itertools import count
 from pathlib import Path
 
 import cv2
-import matplotlib.pyplot as plt
 
 # Add project root to path
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
@@ -12,9 +12,13 @@ sys.path.insert(0, str(PROJECT_ROOT))
 from digit_recognition import (
     DIGITS_DIR,
     ensure_model,
-    predict_preprocessed,
-    preprocess_image_array,
+    load_trained_model,
+    predict_preprocessed_batch,
+    preprocess_batch,
 )
+from digit_recognition.archives import expand_archives, run_archives
+from digit_recognition.bulk import DEFAULT_CHUNK_SIZE, ResultWriter, expand_inputs, run_bulk
+from digit_recognition.model import BACKENDS, DEFAULT_BACKEND
 
 
 def iter_digit_images():
@@ -34,34 +38,122 @@ def load_digit_image(path):
     return img_raw[:, :, 0]
 
 
-def process_images():
-    model = ensure_model()
-    found_images = False
+def load_model(backend=DEFAULT_BACKEND):
+    """The Keras model (trained first if missing) or an exported backend."""
+    return ensure_model() if backend == "keras" else load_trained_model(backend=backend)
+
+
+def process_images(backend=DEFAULT_BACKEND):
+    import matplotlib.pyplot as plt
+
+    model = load_model(backend)
+    names, images, failed = [], [], []
 
     for image_number, image_path in iter_digit_images():
-        found_images = True
         try:
-            img = load_digit_image(image_path)
-            prepped = preprocess_image_array(img)
-            digit, probabilities = predict_preprocessed(model, prepped)
-            confidence = probabilities[digit] * 100
-
-            print(
-                f"{image_path.name}: predicted {digit} "
-                f"({confidence:.1f}% confidence)"
-            )
-
-            plt.imshow(prepped[0], cmap="binary")
-            plt.title(f"Predicted: {digit}")
-            plt.axis("off")
-            plt.show()
+            images.append(load_digit_image(image_path))
+            names.append(image_path.name)
         except Exception as exc:  # pragma: no cover - keep processing other files
             print(f"Skipping {image_path.name}: {exc}")
+            failed.append(image_path.name)
             continue
 
-    if not found_images:
+    if failed and not images:
+        sys.exit(f"✗ None of the {len(failed)} digit images in {DIGITS_DIR} could be loaded")
+    if not images:
         print(f"No digit images found in {DIGITS_DIR}")
+        return
+
+    # One forward pass for every image instead of one per file
+    prepped = preprocess_batch(images)
+    digits, probabilities = predict_preprocessed_batch(model, prepped)
+
+    for name, image, digit, probs in zip(names, prepped, digits, probabilities):
+        confidence = probs[digit] * 100
+
+        print(f"{name}: predicted {digit} ({confidence:.1f}% confidence)")
+
+        plt.imshow(image, cmap="binary")
+        plt.title(f"Predicted: {digit}")
+        plt.axis("off")
+        plt.show()
+
+
+def process_headless(inputs, output="-", fmt=None, jobs=None, chunk_size=DEFAULT_CHUNK_SIZE, backend=DEFAULT_BACKEND,
+                     numbers=False, progress_dir=None):
+    """Recognize every image matched by `inputs` without any GUI, streaming results."""
+    inputs = inputs or [str(DIGITS_DIR)]
+    archives = list(expand_archives(inputs))
+    if archives and next(expand_inputs(inputs), None) is not None:
+        sys.exit("Give either archives or loose images, not both")
+    if archives and progress_dir is None and output != "-":
+        progress_dir = Path(f"{output}.progress")
+    # An interrupted archive run resumes (appending to its output) when both its output and markers exist
+    resume = (
+        bool(archives) and progress_dir is not None and Path(progress_dir).is_dir()
+        and (output == "-" or Path(output).is_file())
+    )
+
+    model = load_model(backend)
+    fmt = fmt or ("csv" if str(output).endswith(".csv") else "jsonl")
+
+    stream = sys.stdout if output == "-" else open(output, "a" if resume else "w", newline="")
+    try:
+        writer = ResultWriter(stream, fmt, numbers, archives=bool(archives), header=not resume or output == "-")
+        if archives:
+            summary = run_archives(model, archives, writer, progress_dir, jobs, chunk_size, numbers, resume)
+        else:
+            summary = run_bulk(model, expand_inputs(inputs), writer, jobs=jobs, chunk_size=chunk_size, numbers=numbers)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+
+    digits = f", {summary['digits']} digits" if numbers else ""
+    shards = ""
+    if archives:
+        shards = (
+            f" from {summary['shards']} archives ({summary['skipped_shards']} already done, "
+            f"{summary['failed_shards']} failed)"
+        )
+    print(
+        f"Processed {summary['images']} images{digits}{shards} ({summary['errors']} errors) "
+        f"in {summary['seconds']:.1f}s: {summary['images_per_second']:.0f} images/s",
+        file=sys.stderr,
+    )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recognize handwritten digit images.")
+    parser.add_argument(
+        "inputs", nargs="*",
+        help="Image files, directories, glob patterns or tar/zip archives (headless mode; default: digits/)",
+    )
+    parser.add_argument("--headless", action="store_true", help="No plots; stream results to --output")
+    parser.add_argument("--jobs", type=int, help="Decode/preprocess worker processes (default: CPU count)")
+    parser.add_argument("--output", default="-", help="Output file (.jsonl or .csv), '-' for stdout")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Output format (default: from extension)")
+    parser.add_argument(
+        "--numbers", action="store_true",
+        help="Read whole numbers: segment each image into digits (headless mode)",
+    )
+    parser.add_argument(
+        "--progress-dir", type=Path,
+        help="Per-archive progress markers for resuming (default: <output>.progress)",
+    )
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Images per worker task and forward pass")
+    parser.add_argument(
+        "--backend", default=DEFAULT_BACKEND, choices=BACKENDS,
+        help="Model backend (default: $DIGIT_BACKEND or keras)",
+    )
+    args = parser.parse_args()
+
+    if args.headless or args.inputs or args.numbers:
+        process_headless(args.inputs, args.output, args.format, args.jobs, args.chunk_size, args.backend, args.numbers,
+                         args.progress_dir)
+    else:
+        process_images(args.backend)
 
 
 if __name__ == "__main__":
-    process_images()
+    main()
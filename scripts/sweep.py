@@ -0,0 +1,91 @@
+"""
+Train candidate architectures in parallel and report accuracy against serving latency.
+
+    python scripts/sweep.py --architectures 32 64 64x2 128x2 --activations leaky_relu relu
+    python scripts/sweep.py --jobs 4 --threads-per-job 2 --json sweep.json
+
+Each candidate is trained with the streaming trainer in its own worker
+process, then timed with the NumPy backend. Rows marked `*` are on the Pareto
+frontier: no other candidate is both at least as accurate and at least as fast.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from digit_recognition.model import DEFAULT_ACTIVATION, DEFAULT_BATCH_SIZE, DEFAULT_PATIENCE
+from digit_recognition.sweep import (
+    DEFAULT_ARCHITECTURES,
+    DEFAULT_LATENCY_BATCH,
+    LATENCY_METRICS,
+    format_table,
+    parse_architecture,
+    run_sweep,
+)
+
+ACTIVATION_CHOICES = ("leaky_relu", "relu", "tanh", "sigmoid")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--architectures", nargs="+", default=list(DEFAULT_ARCHITECTURES),
+        help='Hidden layer widths per candidate, e.g. "64" "128x2" "256,64"',
+    )
+    parser.add_argument(
+        "--activations", nargs="+", default=[DEFAULT_ACTIVATION], choices=ACTIVATION_CHOICES,
+        help="Hidden activations to try with every architecture",
+    )
+    parser.add_argument("--epochs", type=int, default=10, help="Maximum epochs per candidate")
+    parser.add_argument("--patience", type=int, default=DEFAULT_PATIENCE, help="Early-stopping patience (0 disables)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--jobs", type=int, help="Parallel training processes (default: CPUs / threads per job)")
+    parser.add_argument("--threads-per-job", type=int, default=1, help="TensorFlow/BLAS threads per training process")
+    parser.add_argument("--repeats", type=int, default=200, help="Timed single-image predictions per candidate")
+    parser.add_argument("--latency-batch", type=int, default=DEFAULT_LATENCY_BATCH, help="Batch size for batched latency")
+    parser.add_argument(
+        "--frontier", choices=LATENCY_METRICS, default="batch",
+        help="Latency used for the Pareto frontier: single-image or batched per-image",
+    )
+    parser.add_argument("--output-dir", type=Path, default=PROJECT_ROOT / "models" / "sweep", help="Where candidate models are saved")
+    parser.add_argument("--json", type=Path, help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    try:
+        architectures = [parse_architecture(spec) for spec in args.architectures]
+    except ValueError as exc:
+        parser.error(str(exc))
+    candidates = [(units, activation) for units in architectures for activation in args.activations]
+
+    print(f"Training {len(candidates)} candidates for up to {args.epochs} epochs...")
+    results = run_sweep(
+        candidates,
+        args.output_dir,
+        epochs=args.epochs,
+        patience=args.patience,
+        batch_size=args.batch_size,
+        jobs=args.jobs,
+        threads_per_job=args.threads_per_job,
+        repeats=args.repeats,
+        latency_batch=args.latency_batch,
+        latency_metric=args.frontier,
+        progress=lambda message: print(f"  {message}", flush=True),
+    )
+
+    print()
+    print(format_table(results, args.frontier))
+    print(f"\n* Pareto frontier (test accuracy vs {args.frontier} latency, NumPy backend)")
+    print(f"Models saved to {args.output_dir}")
+    if args.json:
+        args.json.write_text(json.dumps({"frontier": args.frontier, "results": results}, indent=2))
+        print(f"✓ Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
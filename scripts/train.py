@@ -0,0 +1,62 @@
+"""Train the digit classifier on a streaming tf.data pipeline with resume support."""
+import argparse
+import shutil
+import sys
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from digit_recognition import MODEL_PATH, train_model_streaming
+from digit_recognition.model import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_MAX_EPOCHS,
+    DEFAULT_PATIENCE,
+    DEFAULT_VALIDATION_SPLIT,
+)
+from digit_recognition.paths import CHECKPOINT_DIR
+
+
+def checkpoint_freq(value):
+    return value if value == "epoch" else int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--epochs", type=int, default=DEFAULT_MAX_EPOCHS, help="Maximum epochs")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--validation-split", type=float, default=DEFAULT_VALIDATION_SPLIT)
+    parser.add_argument(
+        "--patience", type=int, default=DEFAULT_PATIENCE,
+        help="Epochs without val_loss improvement before stopping (0 disables)",
+    )
+    parser.add_argument("--checkpoint-dir", type=Path, default=CHECKPOINT_DIR)
+    parser.add_argument(
+        "--checkpoint-freq", type=checkpoint_freq, default="epoch",
+        help='"epoch" or a number of training steps between checkpoints',
+    )
+    parser.add_argument("--output", type=Path, default=MODEL_PATH, help="Where to save the model")
+    parser.add_argument("--fresh", action="store_true", help="Discard checkpoints and start over")
+    args = parser.parse_args()
+
+    if args.fresh and args.checkpoint_dir.exists():
+        shutil.rmtree(args.checkpoint_dir)
+    elif args.checkpoint_dir.exists():
+        print(f"Resuming from checkpoints in {args.checkpoint_dir}")
+
+    _, (val_loss, val_acc) = train_model_streaming(
+        epochs=args.epochs,
+        save_path=args.output,
+        batch_size=args.batch_size,
+        validation_split=args.validation_split,
+        patience=args.patience,
+        checkpoint_dir=args.checkpoint_dir,
+        checkpoint_freq=args.checkpoint_freq,
+    )
+    print(f"✓ Model saved to {args.output}")
+    print(f"  Test loss: {val_loss:.4f}, acc: {val_acc:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import os
+import sys
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from digit_recognition.data import load_mnist_data, to_serving_scale
+from digit_recognition.numpy_model import NumpyDigitModel
+
+
+def random_numpy_model(seed=0, hidden=32):
+    """A small untrained NumpyDigitModel; no TensorFlow needed."""
+    rng = np.random.default_rng(seed)
+    kernels = [rng.normal(0, 0.1, (784, hidden)).astype("float32"), rng.normal(0, 0.3, (hidden, 10)).astype("float32")]
+    biases = [np.zeros(hidden, dtype="float32"), np.zeros(10, dtype="float32")]
+    return NumpyDigitModel(kernels, biases, ["relu", "softmax"])
+
+
+def _synthetic_digits(rng, templates, count):
+    labels = rng.integers(0, 10, count)
+    noise = rng.integers(0, 60, (count, 28, 28))
+    images = np.clip(templates[labels].astype(np.int64) + noise, 0, 255).astype(np.uint8)
+    return images, labels.astype(np.uint8)
+
+
+@pytest.fixture(scope="session")
+def mnist(tmp_path_factory):
+    """
+    `load_mnist_data` bound to a small learnable stand-in for MNIST (one
+    blocky template per class plus noise, light ink on black like MNIST).
+    """
+    root = tmp_path_factory.mktemp("mnist")
+    rng = np.random.default_rng(0)
+    templates = np.zeros((10, 28, 28), dtype=np.uint8)
+    for digit in range(10):
+        cells = rng.random((7, 7)) < 0.35
+        templates[digit] = np.kron(cells, np.ones((4, 4))).astype(np.uint8) * 200
+    x_train, y_train = _synthetic_digits(rng, templates, 3000)
+    x_test, y_test = _synthetic_digits(rng, templates, 600)
+    np.savez(root / "mnist.npz", x_train=x_train, y_train=y_train, x_test=x_test, y_test=y_test)
+    return partial(load_mnist_data, mnist_dir=root, cache_dir=root / "cache")
+
+
+@pytest.fixture(scope="session")
+def keras_model(mnist):
+    """A Keras model trained briefly on the synthetic data, at serving scale."""
+    tf = pytest.importorskip("tensorflow")
+    from digit_recognition.model import build_model
+
+    tf.keras.utils.set_random_seed(0)
+    (x_train, y_train), _ = mnist(normalize=False)
+    model = build_model((32,))
+    model.fit(to_serving_scale(x_train), np.asarray(y_train), epochs=3, batch_size=64, verbose=0)
+    return model
@@ -0,0 +1,78 @@
+import io
+import json
+import tarfile
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import random_numpy_model
+from digit_recognition.archives import ShardProgress, run_archives
+from digit_recognition.bulk import ResultWriter
+
+IMAGES = 30
+CHUNK_SIZE = 8
+
+
+@pytest.fixture
+def shard(tmp_path):
+    path = tmp_path / "shard.tar.gz"
+    rng = np.random.default_rng(0)
+    with tarfile.open(path, "w:gz") as archive:
+        for index in range(IMAGES):
+            ok, encoded = cv2.imencode(".png", rng.integers(0, 256, (28, 28), dtype=np.uint8))
+            data = encoded.tobytes()
+            info = tarfile.TarInfo(f"digits/{index:03d}.png")
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return path
+
+
+def run(shard, output, progress_dir, mode="w", resume=True):
+    with open(output, mode) as stream:
+        writer = ResultWriter(stream, "jsonl", archives=True)
+        return run_archives(random_numpy_model(), [shard], writer, progress_dir, jobs=1,
+                            chunk_size=CHUNK_SIZE, resume=resume)
+
+
+def read_paths(output):
+    return [json.loads(line)["path"] for line in output.read_text().splitlines()]
+
+
+def test_finished_shard_is_skipped(shard, tmp_path):
+    output, progress_dir = tmp_path / "out.jsonl", tmp_path / "progress"
+    summary = run(shard, output, progress_dir)
+    assert summary["images"] == IMAGES
+    assert ShardProgress(progress_dir).load(shard)["done"]
+
+    summary = run(shard, output, progress_dir, mode="a")
+    assert summary["skipped_shards"] == 1
+    assert summary["images"] == 0
+    assert len(read_paths(output)) == IMAGES
+
+
+def test_resume_continues_after_the_last_written_chunk(shard, tmp_path):
+    output, progress_dir = tmp_path / "out.jsonl", tmp_path / "progress"
+    run(shard, output, progress_dir)
+    expected = read_paths(output)
+
+    # Interrupted after two chunks: their rows are on disk and the marker says so
+    written = 2 * CHUNK_SIZE
+    lines = output.read_text().splitlines(keepends=True)
+    output.write_text("".join(lines[:written]))
+    ShardProgress(progress_dir).save(shard, written)
+
+    summary = run(shard, output, progress_dir, mode="a")
+    assert summary["images"] == IMAGES - written
+    paths = read_paths(output)
+    assert len(paths) == len(set(paths)) == IMAGES
+    assert paths == expected
+
+
+def test_replaced_shard_starts_over(shard, tmp_path):
+    output, progress_dir = tmp_path / "out.jsonl", tmp_path / "progress"
+    ShardProgress(progress_dir).save(shard, 2 * CHUNK_SIZE)
+    shard.write_bytes(shard.read_bytes() + b"\0" * 1024)  # different size: stale marker
+
+    summary = run(shard, output, progress_dir)
+    assert summary["images"] == IMAGES
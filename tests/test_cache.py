@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from conftest import random_numpy_model
+from digit_recognition.cache import PredictionCache
+from digit_recognition.predict import predict_preprocessed, set_prediction_cache
+from digit_recognition.serving import ServedModel
+
+
+@pytest.fixture
+def cache():
+    cache = PredictionCache(16)
+    previous = set_prediction_cache(cache)
+    yield cache
+    set_prediction_cache(previous)
+
+
+def test_hits_for_the_same_model(cache):
+    model = random_numpy_model(seed=1)
+    x = np.random.default_rng(0).random((1, 28, 28), dtype=np.float32)
+    first = predict_preprocessed(model, x)
+    second = predict_preprocessed(model, x)
+    assert first[0] == second[0]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_swap_invalidates_cached_predictions(cache):
+    old, new = random_numpy_model(seed=1), random_numpy_model(seed=2)
+    x = np.random.default_rng(0).random((1, 28, 28), dtype=np.float32)
+    served = ServedModel(warmup_batch_sizes=())
+    served.swap(old, "v1")
+    _, old_probabilities = predict_preprocessed(served.model, x)
+
+    served.swap(new, "v2")
+    digit, probabilities = predict_preprocessed(served.model, x)
+
+    expected = new.predict(x)[0]
+    assert not np.allclose(old_probabilities, expected)
+    np.testing.assert_allclose(probabilities, expected, rtol=1e-6)
+    assert digit == expected.argmax()
+    stats = cache.stats()
+    assert stats["hits"] == 0
+    assert stats["entries"] == 1
+    assert stats["generation"] == 2
+
+
+def test_same_input_new_generation_recomputes():
+    cache = PredictionCache(4)
+    calls = []
+
+    def compute(x):
+        calls.append(x)
+        return 3, np.full(10, 0.1)
+
+    model_a, model_b = random_numpy_model(seed=1), random_numpy_model(seed=2)
+    x = np.zeros((1, 28, 28), dtype=np.float32)
+    cache.get_or_compute(model_a, x, compute)
+    cache.get_or_compute(model_a, x, compute)
+    cache.get_or_compute(model_b, x, compute)
+    assert len(calls) == 2
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+
+import numpy as np
+
+from conftest import PROJECT_ROOT
+
+BUILDERS = 4
+
+
+def test_concurrent_builders_share_a_cold_cache(mnist, tmp_path):
+    mnist_dir = mnist.keywords["mnist_dir"]
+    cache_dir = tmp_path / "cache"
+    code = (
+        "import sys\n"
+        "from digit_recognition.data import load_mnist_data\n"
+        "(x_train, _), _ = load_mnist_data(mnist_dir=sys.argv[1], cache_dir=sys.argv[2])\n"
+        "print(float(x_train.sum()))\n"
+    )
+    builders = [
+        subprocess.Popen([sys.executable, "-c", code, str(mnist_dir), str(cache_dir)],
+                         cwd=str(PROJECT_ROOT), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        for _ in range(BUILDERS)
+    ]
+    outputs = [builder.communicate() for builder in builders]
+    assert all(builder.returncode == 0 for builder in builders), [err for _, err in outputs]
+    assert len({out for out, _ in outputs}) == 1
+
+    # No temp files left behind, and the finished cache is what a fresh build gives
+    assert not list(cache_dir.rglob("*.tmp"))
+    (x_train, _), _ = mnist()
+    (cached, _), _ = mnist(cache_dir=cache_dir)
+    np.testing.assert_array_equal(cached, x_train)
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from digit_recognition import evaluation
+from digit_recognition.data import to_serving_scale
+
+
+@pytest.fixture
+def mnist_test(mnist, monkeypatch):
+    monkeypatch.setattr(evaluation, "load_mnist_data", mnist)
+    return mnist
+
+
+def collect(batches):
+    images, labels = zip(*batches)
+    return np.concatenate(images), np.concatenate(labels)
+
+
+def test_mnist_batches_default_to_serving_scale(mnist_test):
+    images, labels = collect(evaluation.mnist_test_batches(batch_size=64, limit=150))
+    _, (x_test, y_test) = mnist_test(normalize=False)
+    np.testing.assert_array_equal(images, to_serving_scale(x_test[:150]))
+    np.testing.assert_array_equal(labels, y_test[:150])
+    assert images.min() >= 0 and images.max() <= 1
+
+
+def test_mnist_batches_can_use_the_training_scale(mnist_test):
+    images, _ = collect(evaluation.mnist_test_batches(batch_size=64, limit=150, scale="normalized"))
+    _, (x_test, _) = mnist_test()
+    np.testing.assert_array_equal(images, x_test[:150])
+
+
+def test_unknown_scale_is_rejected(mnist_test):
+    with pytest.raises(ValueError, match="scale"):
+        next(evaluation.mnist_test_batches(scale="raw"))
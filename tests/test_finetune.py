@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from digit_recognition import finetune
+from digit_recognition.data import to_serving_scale
+from digit_recognition.preprocess import preprocess_fast
+
+
+@pytest.fixture
+def trainable(keras_model, mnist, monkeypatch):
+    """A fresh copy of the trained model, with fine-tuning reading the synthetic MNIST."""
+    tf = pytest.importorskip("tensorflow")
+    monkeypatch.setattr(finetune, "load_mnist_data", mnist)
+    model = tf.keras.models.clone_model(keras_model)
+    model.set_weights(keras_model.get_weights())
+    return model
+
+
+def new_samples(mnist, count, mislabel=False):
+    _, (x_test, y_test) = mnist(normalize=False)
+    x = to_serving_scale(x_test[-count:])
+    y = np.asarray(y_test[-count:], dtype="int64")
+    return x, (y + 1) % 10 if mislabel else y
+
+
+def test_gate_rejects_a_regressing_update(trainable, mnist):
+    # Training only on deliberately wrong labels, fast, wrecks MNIST accuracy
+    x_new, y_new = new_samples(mnist, 40, mislabel=True)
+    report = finetune.fine_tune_incremental(
+        trainable, x_new, y_new, replay_ratio=0, min_replay=0, epochs=5,
+        learning_rate=0.05, mnist_holdout=500, seed=0,
+    )
+    assert not report["accepted"]
+    assert "mnist" in report["regressions"]
+    assert report["after"]["mnist"] < report["before"]["mnist"]
+    assert report["verified"]
+
+
+def test_gate_accepts_a_harmless_update(trainable, mnist):
+    x_new, y_new = new_samples(mnist, 40)
+    report = finetune.fine_tune_incremental(
+        trainable, x_new, y_new, min_replay=400, epochs=1, mnist_holdout=500, tolerance=0.02, seed=0,
+    )
+    assert report["accepted"]
+    assert report["regressions"] == []
+    assert report["holdout"]["new"] == 8
+    assert report["trained_on"] == {"new": 32, "replay": 400}
+
+
+def test_too_few_samples_is_unverified(trainable, mnist):
+    x_new, y_new = new_samples(mnist, 3)
+    report = finetune.fine_tune_incremental(
+        trainable, x_new, y_new, min_replay=100, epochs=1, mnist_holdout=200, tolerance=0.05, seed=0,
+    )
+    assert report["holdout"]["new"] == 0
+    assert not report["verified"]
+    assert report["before"]["new"] is None
+
+
+def test_corrections_are_preprocessed_as_served(tmp_path):
+    rng = np.random.default_rng(0)
+    canvases = {}
+    for label in (3, 7):
+        canvas = np.full((250, 250), 255, dtype=np.uint8)
+        canvas[60:190, 100 + 10 * label:130 + 10 * label] = rng.integers(0, 80, (130, 30))
+        (tmp_path / str(label)).mkdir()
+        Image.fromarray(canvas).save(tmp_path / str(label) / "a.png")
+        canvases[label] = canvas
+
+    x, y, unlabelled, failed = finetune.load_labelled_samples([str(tmp_path)], jobs=1)
+    assert (unlabelled, failed) == (0, 0)
+    expected = preprocess_fast(np.stack([canvases[label] for label in y]))
+    np.testing.assert_array_equal(x, expected)
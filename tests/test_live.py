@@ -0,0 +1,73 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from conftest import random_numpy_model
+from digit_recognition.live import LiveSessions
+
+STROKE = [[60, 40, 130, 40, 130, 200]]
+
+
+@pytest.fixture
+def live():
+    sessions = LiveSessions(random_numpy_model(), debounce=0.01, max_delay=0.05, idle_timeout=0.3)
+    yield sessions
+    sessions.shutdown(timeout=5)
+
+
+def test_prediction_matches_the_session_raster(live):
+    session = live.create(250)
+    version = live.update(session.id, STROKE)
+    result = live.wait(session, 0, timeout=5)
+    assert result is not None and result[0] == version
+    probabilities = live.model.predict(session.raster.raster[:1])[0]
+    assert result[1] == probabilities.argmax()
+    np.testing.assert_allclose(result[2], probabilities, rtol=1e-6)
+
+
+def test_empty_canvas_has_no_digit(live):
+    session = live.create(250)
+    version = live.update(session.id, clear=True)
+    assert live.wait(session, 0, timeout=5) == (version, None, None)
+
+
+def test_drawing_holds_only_its_own_session(live):
+    busy, other = live.create(250), live.create(250)
+    finished = {}
+
+    def draw(session):
+        finished[session.id] = live.update(session.id, STROKE)
+
+    with busy.lock:
+        blocked = threading.Thread(target=draw, args=(busy,))
+        free = threading.Thread(target=draw, args=(other,))
+        blocked.start()
+        free.start()
+        free.join(timeout=2)
+        assert finished.get(other.id) == 1
+        assert busy.id not in finished
+    blocked.join(timeout=2)
+    assert finished[busy.id] == 1
+
+
+def test_waiting_keeps_a_session_alive(live):
+    watched, unwatched = live.create(250), live.create(250)
+    # Nothing new ever arrives, so the wait runs out well past idle_timeout
+    assert live.wait(watched, after_version=0, timeout=3 * live.idle_timeout) is None
+    assert live.get(watched.id) is watched
+    assert live.get(unwatched.id) is None
+    assert live.stats()["expired"] == 1
+
+
+def test_update_after_close_is_rejected(live):
+    session = live.create(250)
+    assert live.close(session.id)
+    assert live.update(session.id, STROKE) is None
+    assert live.wait(session, 0, timeout=1) is None
+
+    session = live.create(250)
+    live.shutdown(timeout=5)
+    assert session.closed
+    assert live.update(session.id, STROKE) is None
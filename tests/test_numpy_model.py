@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from conftest import random_numpy_model
+from digit_recognition.data import to_serving_scale
+from digit_recognition.model import load_trained_model
+from digit_recognition.numpy_model import NumpyDigitModel
+from digit_recognition.paths import MODEL_PATH
+
+
+@pytest.fixture(scope="module")
+def batch(mnist):
+    _, (x_test, _) = mnist(normalize=False)
+    return to_serving_scale(x_test[:200])
+
+
+def test_matches_keras(keras_model, batch):
+    reference = np.asarray(keras_model.predict(batch, verbose=0))
+    probabilities = NumpyDigitModel.from_keras(keras_model).predict(batch)
+    np.testing.assert_allclose(probabilities, reference, atol=1e-5)
+    assert np.array_equal(probabilities.argmax(axis=1), reference.argmax(axis=1))
+
+
+def test_single_image_matches_batch():
+    model = random_numpy_model()
+    x = np.random.default_rng(0).random((5, 28, 28), dtype=np.float32)
+    np.testing.assert_allclose(model.predict(x[2:3]), model.predict(x)[2:3], atol=1e-6)
+
+
+def test_saved_weights_load_from_the_given_path(tmp_path):
+    model = random_numpy_model()
+    path = model.save(tmp_path / "v3.npz")
+    x = np.random.default_rng(0).random((4, 28, 28), dtype=np.float32)
+    for backend in ("keras", "numpy"):
+        np.testing.assert_allclose(load_trained_model(path, backend=backend).predict(x), model.predict(x), rtol=1e-6)
+
+
+@pytest.mark.parametrize("backend", ["numpy", "float16", "int8", "tflite"])
+def test_exported_backends_reject_another_keras_path(tmp_path, backend):
+    # Silently loading the default artifact instead would serve the wrong model
+    with pytest.raises(ValueError, match="load_model_version"):
+        load_trained_model(tmp_path / "v3.keras", backend=backend)
+
+
+def test_default_path_still_loads_the_default_artifact(tmp_path, monkeypatch):
+    import digit_recognition.model as model_module
+
+    path = random_numpy_model().save(tmp_path / "weights.npz")
+    monkeypatch.setattr(model_module, "NUMPY_MODEL_PATH", path)
+    assert isinstance(load_trained_model(MODEL_PATH, backend="numpy"), NumpyDigitModel)
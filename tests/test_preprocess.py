@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from digit_recognition.numpy_model import NumpyDigitModel
+from digit_recognition.predict import predict_preprocessed_batch
+from digit_recognition.preprocess import preprocess_fast, preprocess_image_array
+
+CANVAS_SIZE = 250  # the web and Tk canvases
+STROKE_WIDTHS = (8, 16, 24)
+
+# preprocess_fast averages areas where the old path resampled with LANCZOS,
+# which sharpens edges slightly; on [0, 1] pixels the two stay this close
+MEAN_PIXEL_TOLERANCE = 0.02
+MAX_PIXEL_TOLERANCE = 0.3
+MIN_AGREEMENT = 0.98
+
+
+def preprocess_lanczos(gray):
+    """The canvas preprocessing used before `preprocess_fast`."""
+    resized = np.array(Image.fromarray(gray).resize((28, 28), Image.Resampling.LANCZOS))
+    return preprocess_image_array(resized)[0]
+
+
+def draw_strokes(seed, width):
+    """Dark anti-aliased strokes on a light canvas, as drawn in the apps."""
+    rng = np.random.default_rng(seed)
+    canvas = np.full((CANVAS_SIZE, CANVAS_SIZE), 255, dtype=np.uint8)
+    for _ in range(rng.integers(1, 4)):
+        points = rng.integers(40, CANVAS_SIZE - 40, (rng.integers(3, 7), 1, 2)).astype(np.int32)
+        cv2.polylines(canvas, [points], False, 0, width, cv2.LINE_AA)
+    return canvas
+
+
+@pytest.fixture(scope="module")
+def canvases():
+    return [draw_strokes(seed, width) for width in STROKE_WIDTHS for seed in range(100)]
+
+
+def test_fast_path_stays_within_pixel_tolerance_of_lanczos(canvases):
+    old = np.stack([preprocess_lanczos(canvas) for canvas in canvases])
+    new = preprocess_fast(np.stack(canvases))
+    difference = np.abs(old - new)
+    assert difference.mean(axis=(1, 2)).max() <= MEAN_PIXEL_TOLERANCE
+    assert difference.max() <= MAX_PIXEL_TOLERANCE
+
+
+def test_fast_path_predicts_like_lanczos(keras_model, canvases):
+    model = NumpyDigitModel.from_keras(keras_model)
+    old_digits, _ = predict_preprocessed_batch(model, np.stack([preprocess_lanczos(canvas) for canvas in canvases]))
+    new_digits, _ = predict_preprocessed_batch(model, preprocess_fast(np.stack(canvases)))
+    assert np.mean(old_digits == new_digits) >= MIN_AGREEMENT
+
+
+@pytest.mark.parametrize("channels", [1, 3, 4])
+def test_channel_images_use_the_first_channel(canvases, channels):
+    gray = canvases[0]
+    image = np.repeat(gray[:, :, np.newaxis], channels, axis=2)
+    expected = preprocess_fast(gray)
+    np.testing.assert_array_equal(preprocess_fast(image), expected)
+    np.testing.assert_array_equal(preprocess_fast(np.stack([image, image])), np.concatenate([expected, expected]))
+
+
+def test_other_shapes_are_rejected():
+    with pytest.raises(ValueError, match="got shape"):
+        preprocess_fast(np.zeros((2, 28, 28, 2), dtype=np.uint8))
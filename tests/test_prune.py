@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from conftest import random_numpy_model
+from digit_recognition.numpy_model import NumpyDigitModel
+from digit_recognition.prune import compact, measured_sparsity, nonzero_params, prune_masks
+
+
+def masked_model(level, seed=0):
+    """A NumpyDigitModel with non-zero biases, its weights masked at `level`."""
+    model = random_numpy_model(seed=seed, hidden=64)
+    rng = np.random.default_rng(seed)
+    biases = [rng.normal(0, 0.5, bias.shape).astype("float32") for bias in model.biases]
+    kernels = [kernel * mask for kernel, mask in zip(model.kernels, prune_masks(model.kernels, level))]
+    # Cut every input to a few surviving units: they output a constant that compact() must fold
+    kept = np.flatnonzero(np.any(kernels[1] != 0, axis=1))[:3]
+    kernels[0][:, kept] = 0.0
+    return NumpyDigitModel(kernels, biases, model.activations)
+
+
+@pytest.mark.parametrize("level", [0.25, 0.5, 0.9])
+def test_compact_computes_the_masked_function_with_fewer_params(level):
+    masked = masked_model(level)
+    compacted = compact(masked)
+    x = np.random.default_rng(1).random((32, 28, 28), dtype=np.float32)
+    np.testing.assert_allclose(compacted.predict(x), masked.predict(x), rtol=1e-5, atol=1e-6)
+    assert compacted.count_params() < masked.count_params()
+    assert compacted.kernels[0].shape[1] < masked.kernels[0].shape[1]
+
+
+def test_measured_sparsity_counts_both_pruning_steps():
+    dense = random_numpy_model(hidden=64)
+    masks = prune_masks(dense.kernels, 0.5)
+    pruned = NumpyDigitModel([k * m for k, m in zip(dense.kernels, masks)], dense.biases, dense.activations)
+    sparsity = measured_sparsity(compact(pruned), dense.count_params())
+    assert sparsity == pytest.approx(1 - nonzero_params(pruned) / dense.count_params())
+    assert 0.7 < sparsity < 0.8
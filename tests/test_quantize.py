@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from conftest import random_numpy_model
+from digit_recognition.data import to_serving_scale
+from digit_recognition.numpy_model import ACTIVATIONS, NumpyDigitModel
+from digit_recognition.quantize import Int8DigitModel, load_numpy_model, quantize_model, save_quantized
+
+
+@pytest.fixture(scope="module")
+def batch(mnist):
+    _, (x_test, _) = mnist(normalize=False)
+    return to_serving_scale(x_test[:200])
+
+
+@pytest.fixture(scope="module")
+def reference(keras_model, batch):
+    return np.asarray(keras_model.predict(batch, verbose=0))
+
+
+def assert_parity(model, batch, reference, atol, min_agreement=0.98):
+    probabilities = np.asarray(model.predict(batch))
+    np.testing.assert_allclose(probabilities, reference, atol=atol)
+    assert np.mean(probabilities.argmax(axis=1) == reference.argmax(axis=1)) >= min_agreement
+
+
+@pytest.mark.parametrize("fmt, atol", [("float16", 1e-2), ("int8", 5e-2)])
+def test_quantized_matches_keras(keras_model, batch, reference, fmt, atol):
+    assert_parity(quantize_model(NumpyDigitModel.from_keras(keras_model), fmt), batch, reference, atol)
+
+
+@pytest.mark.parametrize("fmt", ["float16", "int8"])
+def test_artifact_loads_as_quantize_model(keras_model, batch, tmp_path, fmt):
+    model = NumpyDigitModel.from_keras(keras_model)
+    loaded = load_numpy_model(save_quantized(model, fmt, tmp_path / f"{fmt}.npz"))
+    np.testing.assert_allclose(loaded.predict(batch), quantize_model(model, fmt).predict(batch), atol=1e-6)
+
+
+def test_integer_arithmetic_matches_keras(keras_model, batch, reference, tmp_path):
+    path = save_quantized(NumpyDigitModel.from_keras(keras_model), "int8", tmp_path / "int8.npz")
+    model = load_numpy_model(path, integer_arithmetic=True)
+    assert isinstance(model, Int8DigitModel)
+    assert_parity(model, batch, reference, atol=5e-2)
+
+
+def test_integer_arithmetic_is_exact(tmp_path):
+    """The float32 matmul over integer values gives what int64 accumulation would."""
+    path = save_quantized(random_numpy_model(hidden=128), "int8", tmp_path / "int8.npz")
+    model = load_numpy_model(path, integer_arithmetic=True)
+    x = np.random.default_rng(0).random((64, 28, 28), dtype=np.float32)
+
+    expected = x.reshape(len(x), -1)
+    for qkernel, scale, bias, activation in zip(model.qkernels, model.scales, model.biases, model.activations):
+        row_scale = np.abs(expected).max(axis=1, keepdims=True) / 127.0
+        accumulated = np.rint(expected / row_scale).astype(np.int64) @ qkernel.astype(np.int64)
+        assert np.abs(accumulated).max() < 2 ** 24
+        expected = accumulated.astype(np.float32) * row_scale * scale + bias
+        expected = ACTIVATIONS[activation](expected, model.negative_slope)
+    np.testing.assert_allclose(model.predict(x), expected, rtol=1e-5, atol=1e-7)
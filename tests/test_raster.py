@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from digit_recognition.preprocess import preprocess_fast
+from digit_recognition.raster import IncrementalRaster
+
+
+def assert_matches_full_preprocessing(raster):
+    np.testing.assert_allclose(raster.raster, preprocess_fast(np.asarray(raster.image)), atol=1e-5)
+
+
+@pytest.mark.parametrize("size", [112, 250, 280])
+def test_strokes_match_preprocess_fast(size):
+    raster = IncrementalRaster(size)
+    rng = np.random.default_rng(size)
+    for _ in range(12):
+        points = rng.uniform(-10, size + 10, (rng.integers(1, 8), 2))
+        raster.stroke(points.tolist(), width=int(rng.integers(1, 20)))
+        assert_matches_full_preprocessing(raster)
+
+
+def test_lines_and_dots_match_preprocess_fast():
+    raster = IncrementalRaster(250)
+    raster.line(10, 10, 240, 200, width=9)
+    raster.dot(125, 125, radius=6)
+    raster.line(0, 249, 249, 0, width=3)
+    assert_matches_full_preprocessing(raster)
+
+
+def test_clear_resets_the_raster():
+    raster = IncrementalRaster(112)
+    raster.stroke([(5, 5), (100, 100)], width=8)
+    raster.clear()
+    assert raster.version == 0
+    assert not raster.raster.any()
+    raster.stroke([(50, 10), (50, 100)], width=8)
+    assert_matches_full_preprocessing(raster)
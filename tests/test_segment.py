@@ -0,0 +1,49 @@
+import cv2
+import numpy as np
+
+from digit_recognition.segment import segment_digits
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def render_lines(lines, line_gap=8, scale=1.2, thickness=3):
+    (_, height), _ = cv2.getTextSize("0", FONT, scale, thickness)
+    image = np.full((len(lines) * (height + line_gap) + 40, 300), 255, dtype=np.uint8)
+    for row, text in enumerate(lines):
+        cv2.putText(image, text, (10, 20 + height + row * (height + line_gap)), FONT, scale, 0, thickness)
+    return image
+
+
+def numbers_per_line(layout):
+    return [(entry["line"], len(entry["boxes"])) for entry in layout]
+
+
+def test_single_spaced_lines_stay_separate():
+    crops, layout = segment_digits(render_lines(["123 45", "678 90"]))
+    assert len(crops) == 10
+    assert numbers_per_line(layout) == [(0, 3), (0, 2), (1, 3), (1, 2)]
+
+
+def test_three_lines_in_reading_order():
+    crops, layout = segment_digits(render_lines(["12", "3 4", "56"], line_gap=12))
+    assert len(crops) == 6
+    assert numbers_per_line(layout) == [(0, 2), (1, 1), (1, 1), (2, 2)]
+    tops = [entry["boxes"][0][1] for entry in layout]
+    assert tops == sorted(tops)
+
+
+def test_fragments_of_one_digit_are_merged():
+    image = np.full((60, 60), 255, dtype=np.uint8)
+    # A 5 whose top bar, stem and bowl are separate components
+    cv2.line(image, (15, 10), (40, 10), 0, 4)
+    cv2.line(image, (15, 14), (15, 28), 0, 4)
+    cv2.ellipse(image, (27, 38), (13, 11), 0, -120, 160, 0, 4)
+    crops, layout = segment_digits(image)
+    assert len(crops) == 1
+    assert numbers_per_line(layout) == [(0, 1)]
+
+
+def test_blank_image_has_no_digits():
+    crops, layout = segment_digits(np.full((50, 50), 255, dtype=np.uint8))
+    assert crops.shape == (0, 28, 28)
+    assert layout == []
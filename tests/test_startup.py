@@ -0,0 +1,52 @@
+import subprocess
+import sys
+
+import pytest
+
+from conftest import PROJECT_ROOT
+
+
+def run_probe(code):
+    """Run `code` in a fresh interpreter, so modules imported by pytest don't leak in."""
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=str(PROJECT_ROOT), capture_output=True, text=True
+    )
+
+
+def assert_no_tensorflow(imports):
+    result = run_probe(
+        f"{imports}\n"
+        "import sys\n"
+        "loaded = sorted(name for name in sys.modules if name.split('.')[0] == 'tensorflow')\n"
+        "assert not loaded, loaded[:5]\n"
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_package_import_does_not_load_tensorflow():
+    assert_no_tensorflow("import digit_recognition")
+
+
+@pytest.mark.parametrize("module", ["paths", "preprocess", "predict", "numpy_model"])
+def test_backend_neutral_modules_do_not_load_tensorflow(module):
+    assert_no_tensorflow(f"import digit_recognition.{module}")
+
+
+def test_lazy_public_names_do_not_load_tensorflow():
+    assert_no_tensorflow(
+        "from digit_recognition import (\n"
+        "    MODEL_PATH, NumpyDigitModel, predict_digit, predict_preprocessed_batch,\n"
+        "    preprocess_fast, preprocess_image_array,\n"
+        ")"
+    )
+
+
+def test_probe_detects_tensorflow():
+    # Guard against a probe that could never fail
+    pytest.importorskip("tensorflow")
+    result = run_probe(
+        "import digit_recognition, sys\n"
+        "digit_recognition.build_model((4,))\n"
+        "assert 'tensorflow' not in sys.modules\n"
+    )
+    assert result.returncode != 0
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from digit_recognition.data import to_serving_scale
+from digit_recognition.model import load_trained_model
+
+pytest.importorskip("tensorflow")
+
+
+@pytest.fixture(scope="module")
+def batch(mnist):
+    _, (x_test, _) = mnist(normalize=False)
+    return to_serving_scale(x_test[:200])
+
+
+@pytest.fixture(scope="module")
+def reference(keras_model, batch):
+    return np.asarray(keras_model.predict(batch, verbose=0))
+
+
+@pytest.mark.parametrize("dynamic_range, atol, min_agreement", [(False, 1e-5, 1.0), (True, 5e-2, 0.98)])
+def test_tflite_matches_keras(keras_model, batch, reference, tmp_path, dynamic_range, atol, min_agreement):
+    from digit_recognition.tflite_model import TFLiteDigitModel, export_tflite
+
+    path = export_tflite(keras_model, tmp_path / "model.tflite", dynamic_range=dynamic_range)
+    model = TFLiteDigitModel(path, chunk_size=64)
+    probabilities = model.predict(batch)
+    np.testing.assert_allclose(probabilities, reference, atol=atol)
+    assert np.mean(probabilities.argmax(axis=1) == reference.argmax(axis=1)) >= min_agreement
+    # 200 images end on a partial chunk; a single image is smaller than one
+    np.testing.assert_allclose(model.predict(batch[:1]), reference[:1], atol=atol)
+
+
+def test_tflite_file_loads_by_suffix(keras_model, batch, tmp_path):
+    from digit_recognition.tflite_model import TFLiteDigitModel, export_tflite
+
+    path = export_tflite(keras_model, tmp_path / "model.tflite")
+    model = load_trained_model(path)
+    assert isinstance(model, TFLiteDigitModel)
+    np.testing.assert_allclose(model.predict(batch[:8]), TFLiteDigitModel(path).predict(batch[:8]), atol=1e-6)